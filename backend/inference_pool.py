@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference queue is full and the request is shed."""
+
+
+def _timed_call(submitted_at, fn, args):
+    """Runs in the worker: report how long the task waited before starting."""
+    waited = time.monotonic() - submitted_at
+    return waited, fn(*args)
+
+
+class InferencePool:
+    """
+    Runs CPU-bound inference on a thread or process pool so the asyncio
+    event loop stays free, with a bounded queue in front of it.
+
+    At most max_workers tasks run at once and at most max_queue more wait
+    for a worker; anything beyond that is rejected immediately with
+    InferenceOverloaded instead of queueing without limit.
+
+    The executor is created on first use, in the process that runs the
+    tasks: serve.py builds the pool (by importing main) before forking its
+    workers, and a process pool's queues and locks must not be shared
+    across a fork.
+    """
+
+    def __init__(self, executor='thread', max_workers=None, max_queue=64):
+        """
+        Args:
+            executor: 'thread' or 'process'
+            max_workers: pool size (default: min(4, CPU count))
+            max_queue: tasks allowed to wait for a free worker
+        """
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor type '{executor}'")
+
+        self.executor = None
+        self.executor_pid = None
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        # Only touched from the event loop thread
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_times = deque(maxlen=1024)
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from INFERENCE_EXECUTOR / INFERENCE_WORKERS / INFERENCE_QUEUE_SIZE."""
+        workers = os.environ.get('INFERENCE_WORKERS')
+        return cls(
+            executor=os.environ.get('INFERENCE_EXECUTOR', 'thread'),
+            max_workers=int(workers) if workers else None,
+            max_queue=int(os.environ.get('INFERENCE_QUEUE_SIZE', 64)),
+        )
+
+    def _get_executor(self):
+        # A pool inherited through fork belongs to the parent: start our own
+        if self.executor is None or self.executor_pid != os.getpid():
+            if self.executor_type == 'thread':
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix='inference')
+            else:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.executor_pid = os.getpid()
+        return self.executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks waiting for a worker (not yet running)."""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on the pool.
+
+        Raises:
+            InferenceOverloaded: if max_workers + max_queue tasks are already pending
+        """
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise InferenceOverloaded(
+                f"Inference queue full ({self.in_flight} pending)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            waited, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, time.monotonic(), fn, args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.wait_times.append(waited)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and recent wait-time percentiles (ms)."""
+        stats = {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+        if self.wait_times:
+            waits_ms = np.array(self.wait_times) * 1000
+            p50, p95, p99 = np.percentile(waits_ms, [50, 95, 99])
+            stats.update({
+                "wait_ms_p50": float(p50),
+                "wait_ms_p95": float(p95),
+                "wait_ms_p99": float(p99),
+                "wait_ms_max": float(waits_ms.max()),
+            })
+        return stats
+
+    def shutdown(self):
+        if self.executor is not None and self.executor_pid == os.getpid():
+            self.executor.shutdown(wait=False)
+        self.executor = None
@@ -0,0 +1,197 @@
+"""
+Structured, non-blocking logging for the backend.
+
+Records are put on an in-memory queue by a QueueHandler and written to
+stdout by a QueueListener thread, so a request never waits on a stdout
+write. Anything passed through `extra=` (request_id, timings_ms, pose,
+...) is kept on the record and written as a field.
+
+Environment:
+    LOG_LEVEL         DEBUG / INFO / WARNING ... (default INFO)
+    LOG_FORMAT        json or text (default json)
+    LOG_SAMPLE_EVERY  log 1 in N prediction records (default 100, 0 = none)
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+# uvicorn passes an ANSI-coloured copy of its message as an extra
+_RECORD_ATTRS.add('color_message')
+
+_listener = None
+_log_queue = None
+_stream_handler = None
+
+
+def _extras(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, extras, exc."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with extras appended as key=value."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += ' ' + ' '.join(f"{k}={json.dumps(v, default=str)}" for k, v in extras.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps a traceback in exc_text instead of folding it into msg."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class Sampler:
+    """Lets through 1 in every_n calls (every_n <= 0: none)."""
+
+    def __init__(self, every_n):
+        self.every_n = every_n
+        self._count = itertools.count()
+
+    def __call__(self) -> bool:
+        return self.every_n > 0 and next(self._count) % self.every_n == 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(int(os.environ.get('LOG_SAMPLE_EVERY', 100)))
+
+
+def setup_logging(level=None, fmt=None):
+    """
+    Route all logging (including uvicorn's when started with
+    log_config=None) through a queue to a background writer thread.
+    Safe to call more than once.
+    """
+    global _log_queue, _stream_handler
+    if _log_queue is not None:
+        return
+
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    _log_queue = queue.SimpleQueue()
+    _stream_handler = stream
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(_log_queue))
+    root.setLevel(level)
+
+    _start_listener()
+    atexit.register(stop_logging)
+    # The writer thread does not survive fork (serve.py workers, process
+    # pools): flush it before forking and start one on each side after
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before=stop_logging, after_in_parent=_start_listener,
+                            after_in_child=_after_fork_in_child)
+
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+        _listener.start()
+
+
+def _after_fork_in_child():
+    _new_id_prefix()
+    _start_listener()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _new_id_prefix():
+    # Per process, so forked workers do not hand out the same ids
+    global _id_prefix, _id_counter
+    _id_prefix = uuid.uuid4().hex[:8]
+    _id_counter = itertools.count(1)
+
+
+_new_id_prefix()
+
+
+def new_request_id() -> str:
+    """Unique per process without calling uuid4 on every request."""
+    return f"{_id_prefix}-{next(_id_counter):x}"
+
+
+class RequestId:
+    """
+    ASGI middleware that gives every HTTP request an id: the client's
+    X-Request-ID header if present, otherwise a new one. It is stored as
+    request.state.request_id and echoed in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get('headers', ()):
+            if name == b'x-request-id':
+                request_id = value.decode('latin-1')[:64]
+                break
+        if not request_id:
+            request_id = new_request_id()
+        scope.setdefault('state', {})['request_id'] = request_id
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'x-request-id', request_id.encode('latin-1'))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,12 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Optional, Tuple
 import sys
 import os
-import pickle
+import json
+import hashlib
+import hmac
+import logging
+import asyncio
+import time
 import numpy as np
-import mediapipe as mp
+
+from logging_config import setup_logging, Sampler, RequestId
+
+# Logging is configured by the entry point (serve.py, the __main__ block
+# below) or, under a plain `uvicorn main:app`, by the startup hook below
+logger = logging.getLogger('yoga.backend')
 
 # Add model directory to path so we can import modules from it
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,14 +26,30 @@ sys.path.append(model_dir)
 
 # Import from the model directory
 try:
-    from yoga_pose_classifier import extract_pose_features, calculate_angle, calculate_distance
-    from pose_rules import POSE_CORRECTION_RULES
+    from pose_features import extract_pose_features_batch, landmarks_to_array, FEATURE_LANDMARKS
+    from rule_engine import evaluate_rules
+    from pose_session import PoseSession
+    from motion_gate import MotionGate
+    from model_artifact import load_model_data, default_model_path
+    from model_reload import load_fixtures, validate_model, watch_model_file, ModelValidationError
 except ImportError as e:
-    print(f"Error importing model modules: {e}")
+    logger.error("Error importing model modules: %s", e)
     # We will handle this gracefully in the endpoints
+    FEATURE_LANDMARKS = None
+
+from wire_format import decode_landmarks, frame_count, max_payload_size, NUM_LANDMARKS
+from inference_pool import InferencePool, InferenceOverloaded
+from prediction_cache import PredictionCache
+from session_store import SessionStore
+from metrics import MetricsRegistry, RequestMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 app = FastAPI()
 
+@app.on_event("startup")
+def configure_logging():
+    """Queue-backed structured logging (see logging_config.py); no-op if already set up."""
+    setup_logging()
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,24 +59,89 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize MediaPipe Pose for constant/enum access
-mp_pose = mp.solutions.pose
+# Metrics (served on /metrics in Prometheus text format)
+metrics_registry = MetricsRegistry()
+stage_seconds = metrics_registry.histogram(
+    'yoga_stage_duration_seconds',
+    'Time per classification stage (parse, queue, features, scaling, prediction, rules, serialization)',
+    ['stage'])
+request_seconds = metrics_registry.histogram(
+    'yoga_request_duration_seconds', 'HTTP request latency by route', ['route'])
+requests_total = metrics_registry.counter(
+    'yoga_requests_total', 'HTTP requests by route and status', ['route', 'status'])
+errors_total = metrics_registry.counter(
+    'yoga_errors_total', 'Failed HTTP requests and streaming errors by route and status', ['route', 'status'])
+predictions_total = metrics_registry.counter(
+    'yoga_predictions_total', 'Classified frames by predicted pose', ['pose'])
+
+app.add_middleware(RequestMetrics, duration=request_seconds, requests=requests_total,
+                   errors=errors_total, stages=stage_seconds)
+app.add_middleware(RequestId)
+
+# Per-frame records are sampled (LOG_SAMPLE_EVERY); errors are always logged
+prediction_sampler = Sampler.from_env()
 
-# Load Model (Global variable)
+def request_id(request: Request) -> Optional[str]:
+    return getattr(request.state, 'request_id', None)
+
+def mark_parsed(request: Request):
+    """Observe the 'parse' stage: request start until the landmarks are an array."""
+    started_at = getattr(request.state, 'started_at', None)
+    if started_at is not None:
+        stage_seconds.observe(time.perf_counter() - started_at, 'parse')
+
+def mark_handler_done(request: Request):
+    """Start the 'serialization' stage (ends when the response starts)."""
+    request.state.handler_done = time.perf_counter()
+
+# Load Model (Global variable). A reload replaces the whole dict instead of
+# mutating it, so code that already read model_data keeps one consistent model.
 model_data = None
 
-def load_model():
+# What is being served, shown on GET /
+model_info = {"path": None, "version": None, "id": None, "loaded_at": None,
+              "reloads": 0, "last_reload_error": None}
+
+def read_model(path):
+    """
+    load_model_data plus a 'ref' of (path, id) identifying this exact model
+    (hash of the artifact manifest, or the pickle's mtime and size). The
+    artifact checksum is only verified with MODEL_VERIFY_CHECKSUM=1.
+    """
+    data = load_model_data(path, verify=os.environ.get('MODEL_VERIFY_CHECKSUM') == '1')
+    if data['manifest'] is not None:
+        manifest_json = json.dumps(data['manifest'], sort_keys=True).encode()
+        model_id = hashlib.sha256(manifest_json).hexdigest()[:16]
+    else:
+        st = os.stat(path)
+        model_id = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    data['ref'] = (path, model_id)
+    return data
+
+def set_model(data):
     global model_data
-    model_path = os.path.join(model_dir, 'svm_classifier.pkl')
+    model_data = data
+    path, model_id = data['ref']
+    manifest = data['manifest'] or {}
+    model_info.update(path=path, version=manifest.get('version'), id=model_id,
+                      loaded_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+
+def load_model():
+    """
+    Load MODEL_PATH, by default model/svm_classifier.npz (the memory-mapped
+    artifact, see model_artifact.py) or the legacy svm_classifier.pkl.
+    """
+    model_path = os.environ.get('MODEL_PATH') or default_model_path(model_dir)
+    model_info['path'] = model_path
     if os.path.exists(model_path):
         try:
-            with open(model_path, 'rb') as f:
-                model_data = pickle.load(f)
-            print("Model loaded successfully")
-        except Exception as e:
-            print(f"Failed to load model: {e}")
+            set_model(read_model(model_path))
+            logger.info("Model loaded successfully",
+                        extra={"model_path": model_path, "model_version": model_info['version']})
+        except Exception:
+            logger.exception("Failed to load model", extra={"model_path": model_path})
     else:
-        print(f"Model file not found at {model_path}")
+        logger.error("Model file not found", extra={"model_path": model_path})
 
 load_model()
 
@@ -60,176 +152,762 @@ class LandmarkPoint(BaseModel):
     z: float
     visibility: float
 
+# Session ids are client-chosen keys held in session_store
+MAX_SESSION_ID_LENGTH = 128
+
 class PoseData(BaseModel):
-    landmarks: List[LandmarkPoint]
+    landmarks: List[LandmarkPoint] = Field(min_length=NUM_LANDMARKS, max_length=NUM_LANDMARKS)
+    session_id: Optional[str] = Field(default=None, max_length=MAX_SESSION_ID_LENGTH)
 
 class PredictionResponse(BaseModel):
     pose_name: str
     confidence: float
     corrections: List[str]
+    # Only set for frames sent with a session_id
+    state: Optional[str] = None
+    status: Optional[str] = None
+
+class BatchFrame(BaseModel):
+    landmarks: List[LandmarkPoint] = Field(min_length=NUM_LANDMARKS, max_length=NUM_LANDMARKS)
+    session_id: Optional[str] = Field(default=None, max_length=MAX_SESSION_ID_LENGTH)
 
-# Helper class to mimic MediaPipe landmark object
-class LandmarkObject:
-    def __init__(self, x, y, z, visibility):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.visibility = visibility
+# Frames per /classify_batch or /classify_binary request (or binary
+# /ws/session message); a batch runs as one inference task, so an
+# unbounded one would hold a worker indefinitely
+MAX_BATCH_FRAMES = int(os.environ.get('MAX_BATCH_FRAMES', 256))
 
-class LandmarkListWrapper:
-    def __init__(self, landmarks: List[LandmarkPoint]):
-        self.landmark = [LandmarkObject(l.x, l.y, l.z, l.visibility) for l in landmarks]
+class BatchPoseData(BaseModel):
+    frames: List[BatchFrame] = Field(max_length=MAX_BATCH_FRAMES)
+
+class BatchPrediction(PredictionResponse):
+    session_id: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPrediction]
+
+# CPU-bound inference runs here, off the event loop
+inference_pool = InferencePool.from_env()
+
+@app.on_event("shutdown")
+def shutdown_inference_pool():
+    inference_pool.shutdown()
+
+def call_on_model(ref, fn, *args):
+    """
+    Process pool entry point: fn(model, *args) with the worker's copy of the
+    model identified by ref. Workers hold their own copy of the model, so a
+    worker still serving a different model than ref loads ref's file first.
+
+    Raises:
+        RuntimeError: if the file no longer holds ref's model (it changed
+            after the server loaded it); the task fails rather than answer
+            with a different model than the server reports
+    """
+    global model_data
+    if model_data is None or model_data['ref'] != ref:
+        data = read_model(ref[0])
+        if data['ref'] != ref:
+            raise RuntimeError(f"Model file {ref[0]} changed since the server loaded it "
+                               f"(server {ref[1]}, file {data['ref'][1]})")
+        model_data = data
+    return fn(model_data, *args)
+
+def on_model(model, fn, *args) -> tuple:
+    """
+    Arguments for inference_pool.run that call fn(model, *args), model being
+    the model_data a request read when it arrived. On a process pool only
+    model's ref travels: the call goes through call_on_model.
+    """
+    if inference_pool.executor_type == 'process':
+        return (call_on_model, model['ref'], fn) + args
+    return (fn, model) + args
+
+async def run_inference(model, fn, *args):
+    """Run fn(model, *args) on the inference pool, shedding load with 503 when it is full."""
+    try:
+        return await inference_pool.run(*on_model(model, fn, *args))
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+# Classifications (pose, confidence) of near-identical frames (someone
+# holding a pose), keyed only on the landmarks the features read. Only the
+# classification is cached: the correction rules also read z, which the key
+# leaves out, so they run on every frame.
+prediction_cache = PredictionCache.from_env(FEATURE_LANDMARKS)
+
+async def run_timed_predictions(model, points, timings_ms=None, known=None, rules=None) -> List[Tuple[str, float, List[str]]]:
+    """
+    predict_frames on the inference pool, observing its stage timings.
+    If timings_ms is given it receives the same timings in milliseconds.
+    """
+    started = time.perf_counter()
+    predictions, timings = await run_inference(model, predict_frames_timed, points, known, rules)
+    elapsed = time.perf_counter() - started
+    
+    # Waiting for a worker plus hand-off overhead
+    timings['queue'] = max(0.0, elapsed - sum(timings.values()))
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage)
+    if timings_ms is not None:
+        timings_ms.update({stage: round(seconds * 1000, 3) for stage, seconds in timings.items()})
+    return predictions
+
+async def run_cached_predictions(model, points, timings_ms=None, rules=None) -> List[Tuple[str, float, List[str]]]:
+    """
+    predict_frames with model over (N, 33, 4) points, reusing the classification of
+    frames that match a recent one in prediction_cache; only the misses are
+    classified. The correction rules run on every frame, except those
+    rules (optional, see predict_frames) marks False.
+    timings_ms (optional dict) receives the stage timings; it has no
+    features/scaling/prediction entries when every frame was a cache hit.
+    """
+    if not prediction_cache.enabled:
+        predictions = await run_timed_predictions(model, points, timings_ms, rules=rules)
+    else:
+        # Keyed by model too, so a request that finishes after a reload
+        # cannot cache the old model's answer for the new one
+        keys = prediction_cache.keys(points, namespace=f"classify:{model['ref'][1]}")
+        known = [prediction_cache.get(key) for key in keys]
+        missing = [i for i, classified in enumerate(known) if classified is None]
+        
+        predictions = await run_timed_predictions(model, points, timings_ms, known, rules)
+        for i in missing:
+            prediction_cache.put(keys[i], predictions[i][:2])
+    
+    for pose_name, _, _ in predictions:
+        predictions_total.inc(pose_name)
+    return predictions
+
+# ==================== MODEL RELOAD ====================
+
+model_reloads_total = metrics_registry.counter(
+    'yoga_model_reloads_total', 'Model reload attempts by result', ['result'])
+reload_lock = asyncio.Lock()
+model_watcher = None
+
+def load_validated_model(path, allow_pose_changes=False):
+    """
+    Load a candidate model and validate it (see model_reload.py). Blocking;
+    runs on a background thread.
+    """
+    data = read_model(path)
+    fixtures_path = os.environ.get('MODEL_FIXTURES')
+    current = model_data
+    data['validation'] = validate_model(
+        data,
+        fixtures=load_fixtures(fixtures_path) if fixtures_path else None,
+        expected_poses=None if allow_pose_changes or current is None else current['pose_names'],
+        min_accuracy=float(os.environ.get('MODEL_MIN_ACCURACY', 0.8)),
+    )
+    return data
+
+async def reload_model(path=None, allow_pose_changes=False, source='admin'):
+    """
+    Load and validate a model (default: the current model file again) off
+    the event loop, then swap it in. Each request reads model_data once when
+    it arrives and hands that model to the inference pool, so requests
+    already running finish on the model they started with. On a process
+    pool workers reload it by ref (see call_on_model); if its file has been
+    overwritten since, those requests fail instead. Cached predictions are
+    dropped; sessions are kept.
+
+    Raises:
+        whatever loading or validation raised; the current model stays
+    """
+    path = path or model_info['path']
+    async with reload_lock:
+        try:
+            data = await asyncio.to_thread(load_validated_model, path, allow_pose_changes)
+        except Exception as e:
+            model_reloads_total.inc('failed')
+            model_info['last_reload_error'] = str(e)
+            logger.error("Model reload failed", extra={"model_path": path, "source": source, "error": str(e)})
+            raise
+        
+        previous_version = model_info['version']
+        set_model(data)
+        prediction_cache.clear()
+        model_info['reloads'] += 1
+        model_info['last_reload_error'] = None
+        model_reloads_total.inc('ok')
+        logger.info("Model reloaded", extra={
+            "model_path": path, "source": source, "model_version": model_info['version'],
+            "previous_version": previous_version, "validation": data['validation'],
+        })
+
+@app.on_event("startup")
+async def start_model_watcher():
+    """Reload the model when its file changes, if MODEL_WATCH_INTERVAL > 0."""
+    global model_watcher
+    interval = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+    if interval > 0:
+        model_watcher = asyncio.create_task(watch_model_file(
+            lambda: model_info['path'],
+            lambda path: reload_model(path, source='watcher'),
+            interval,
+        ))
+
+@app.on_event("shutdown")
+async def stop_model_watcher():
+    if model_watcher is not None:
+        model_watcher.cancel()
+
+# Smoothing and hold state plus motion gate for HTTP clients that send a
+# session_id: (PoseSession, MotionGate) per session
+session_store = SessionStore.from_env(lambda: (PoseSession(), MotionGate.from_env()))
+
+# The store lives in one worker process's memory, so with several workers
+# (serve.py) a session whose requests land on different workers silently
+# starts over on each. serve.py turns HTTP sessions off unless they are
+# enabled with HTTP_SESSIONS=1, which needs a proxy that routes every
+# session_id to the same worker; /ws/session needs neither.
+http_sessions = os.environ.get('HTTP_SESSIONS', '1') == '1'
+
+def session_for(session_id):
+    """
+    session_store entry for a request's session_id, None without one.
+
+    Raises:
+        HTTPException: 400 if HTTP sessions are turned off
+    """
+    if session_id is None:
+        return None
+    if not http_sessions:
+        raise HTTPException(status_code=400, detail=(
+            "session_id is not supported on this server (several worker processes "
+            "without HTTP_SESSIONS=1); use /ws/session for sessions"))
+    return session_store.get(session_id)
+
+motion_gate_frames = metrics_registry.counter(
+    'yoga_motion_gate_frames_total',
+    'Session frames by motion gate outcome (reused: classification skipped)', ['result'])
+
+async def run_gated_predictions(model, points, sessions, timings_ms=None) -> List[Tuple[str, float, Optional[List[str]]]]:
+    """
+    run_cached_predictions with model over (N, 33, 4) points, except for session frames
+    whose body has barely moved since that session's last classified frame:
+    those reuse its classification (see motion_gate.py). Session frames come
+    back with corrections None: apply_session computes their own once the
+    session has settled on a pose, so the rules are not run for them here.
+
+    Args:
+        model: the model_data the request read when it arrived
+        points: (N, 33, 4) landmark array
+        sessions: one session_store entry per frame, None for frames without
+            a session
+        timings_ms: as for run_cached_predictions
+    """
+    model_id = model['ref'][1]
+    predictions = [None] * len(points)
+    missing = []
+    for i, session in enumerate(sessions):
+        reused = session[1].check(points[i], tag=model_id) if session is not None else None
+        if reused is None:
+            missing.append(i)
+        else:
+            predictions[i] = reused + (None,)
+            predictions_total.inc(reused[0])
+    
+    reused_count = len(points) - len(missing)
+    if reused_count:
+        motion_gate_frames.inc('reused', amount=reused_count)
+    if missing:
+        rules = [sessions[i] is None for i in missing]
+        computed = await run_cached_predictions(model, points[missing], timings_ms, rules)
+        for i, prediction in zip(missing, computed):
+            predictions[i] = prediction
+            if sessions[i] is not None:
+                sessions[i][1].store(points[i], prediction[:2], tag=model_id)
+                motion_gate_frames.inc('classified')
+    return predictions
+
+def apply_session(session, points, prediction) -> Dict[str, Any]:
+    """Run one classified frame through its session (see process_session_frame)."""
+    pose_name, confidence, _ = prediction
+    return process_session_frame(session[0], points, pose_name, confidence)
 
 @app.get("/")
 async def root():
-    return {"status": "ok", "model_loaded": model_data is not None}
+    return {
+        "status": "ok",
+        "model_loaded": model_data is not None,
+        "model": model_info,
+        "inference": inference_pool.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "sessions": session_store.stats()
+    }
 
-@app.post("/classify", response_model=PredictionResponse)
-async def classify_pose(data: PoseData):
-    if model_data is None:
+metrics_registry.gauge('yoga_model_loaded', 'Whether the pose model is loaded (1) or not (0)',
+                       lambda: int(model_data is not None))
+metrics_registry.gauge('yoga_inference_in_flight', 'Inference tasks running or waiting for a worker',
+                       lambda: inference_pool.in_flight)
+metrics_registry.gauge('yoga_inference_rejected_total', 'Requests shed because the inference queue was full',
+                       lambda: inference_pool.rejected, type='counter')
+metrics_registry.gauge('yoga_prediction_cache_hits_total', 'Frames answered from the prediction cache',
+                       lambda: prediction_cache.hits, type='counter')
+metrics_registry.gauge('yoga_prediction_cache_misses_total', 'Frames that missed the prediction cache',
+                       lambda: prediction_cache.misses, type='counter')
+metrics_registry.gauge('yoga_sessions', 'Sessions held in the session store',
+                       lambda: len(session_store))
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, request/error/pose
+    counters, model status. They count this worker process only; under
+    serve.py scrape every worker on its own port (--worker-ports).
+    """
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.post("/classify", response_model=PredictionResponse, response_model_exclude_none=True)
+async def classify_pose(data: PoseData, request: Request):
+    """
+    Classify one frame. With a session_id the result is smoothed over that
+    session's recent frames and includes state and status, as on /ws/session
+    (400 when HTTP sessions are off, see session_for).
+    """
+    model = model_data
+    if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Wrap landmarks to match what extract_pose_features expects
-        wrapped_landmarks = LandmarkListWrapper(data.landmarks)
-        
-        # 1. Extract features
-        features = extract_pose_features(wrapped_landmarks)
+        points = landmarks_to_array(data.landmarks)
+        mark_parsed(request)
+        timings_ms = {}
+        session = session_for(data.session_id)
+        predictions = await run_gated_predictions(model, points[np.newaxis], [session], timings_ms)
+        pose_name, confidence, corrections = predictions[0]
         
-        # 2. Normalize features
-        scaler = model_data['scaler']
-        features_scaled = scaler.transform(features.reshape(1, -1))
+        if prediction_sampler():
+            logger.info("prediction", extra={
+                "request_id": request_id(request), "pose": pose_name,
+                "confidence": round(confidence, 4), "cached": 'prediction' not in timings_ms,
+                "timings_ms": timings_ms,
+            })
         
-        # 3. Predict Pose
-        model = model_data['model']
-        pose_names = model_data['pose_names']
+        if session is not None:
+            response = PredictionResponse(**apply_session(session, points, predictions[0]))
+        else:
+            response = PredictionResponse(
+                pose_name=pose_name,
+                confidence=confidence,
+                corrections=corrections
+            )
         
-        pose_idx = model.predict(features_scaled)[0]
-        pose_name = pose_names[pose_idx]
+        mark_handler_done(request)
+        return response
         
-        # 4. Get Confidence
-        probabilities = model.predict_proba(features_scaled)[0]
-        confidence = float(probabilities[pose_idx])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error processing pose", extra={"request_id": request_id(request)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/classify_batch", response_model=BatchPredictionResponse)
+async def classify_pose_batch(data: BatchPoseData, request: Request):
+    """
+    Classify many frames (optionally from many sessions) in one request.
+    Each result is identical to what /classify returns for that frame;
+    frames with a session_id go through their session in request order.
+    At most MAX_BATCH_FRAMES frames per request (422 otherwise).
+    """
+    model = model_data
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if not data.frames:
+        return BatchPredictionResponse(results=[])
+    
+    try:
+        points = np.stack([landmarks_to_array(frame.landmarks) for frame in data.frames])
+        mark_parsed(request)
+        timings_ms = {}
+        sessions = [session_for(frame.session_id) for frame in data.frames]
+        predictions = await run_gated_predictions(model, points, sessions, timings_ms)
         
-        print(f"Pred: {pose_name} ({confidence:.2f})") # Debug log
+        if prediction_sampler():
+            logger.info("batch prediction", extra={
+                "request_id": request_id(request), "frames": len(data.frames),
+                "timings_ms": timings_ms,
+            })
         
-        # 5. Check Corrections
-        corrections = check_corrections_logic(wrapped_landmarks, pose_name, confidence)
+        results = []
+        for frame, session, frame_points, prediction in zip(data.frames, sessions, points, predictions):
+            if session is not None:
+                result = apply_session(session, frame_points, prediction)
+            else:
+                pose_name, confidence, corrections = prediction
+                result = dict(pose_name=pose_name, confidence=confidence, corrections=corrections)
+            results.append(BatchPrediction(session_id=frame.session_id, **result))
         
-        return PredictionResponse(
-            pose_name=pose_name,
-            confidence=confidence,
-            corrections=corrections
-        )
+        mark_handler_done(request)
+        return BatchPredictionResponse(results=results)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error processing pose: {e}")
+        logger.exception("Error processing batch", extra={"request_id": request_id(request)})
         raise HTTPException(status_code=500, detail=str(e))
 
-def check_corrections_logic(landmarks, pose_name: str, confidence: float) -> List[str]:
+async def read_binary_payload(request: Request) -> bytes:
     """
-    Re-implementation of check_corrections from correction.py to start from wrapper.
-    Ideally we should import this logic if it was a standalone function, 
-    but it's a method of RealtimePoseCorrector class in correction.py.
-    We'll replicate the logic here or refactor correction.py to check our constraints.
-    Constraint: 'only integrated'. We shouldn't change correction.py.
-    So we interpret 'integrated' as using the rules defined in pose_rules.py.
+    The request body, refused with 413 as soon as it is longer than a
+    MAX_BATCH_FRAMES payload can be: up front from Content-Length, or while
+    streaming when the client sends none.
     """
-    corrections = []
+    limit = max_payload_size(MAX_BATCH_FRAMES)
+    too_large = HTTPException(status_code=413,
+                              detail=f"Payload larger than {MAX_BATCH_FRAMES} frames ({limit} bytes)")
+    length = request.headers.get('content-length')
+    if length is not None and length.isdigit() and int(length) > limit:
+        raise too_large
     
-    if pose_name not in POSE_CORRECTION_RULES:
-        return ["Great form! Keep it up."]
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+@app.post("/classify_binary", response_model=BatchPredictionResponse)
+async def classify_pose_binary(request: Request):
+    """
+    Classify frames sent in the compact binary format (see wire_format.py,
+    content type application/x-yoga-landmarks). Returns one result per frame
+    in the payload, in the same shape as /classify_batch. At most
+    MAX_BATCH_FRAMES frames per request (413 otherwise).
+    """
+    model = model_data
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    payload = await read_binary_payload(request)
+    try:
+        n_frames = frame_count(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if n_frames > MAX_BATCH_FRAMES:
+        raise HTTPException(status_code=413,
+                            detail=f"{n_frames} frames in one request, at most {MAX_BATCH_FRAMES}")
+    
+    try:
+        points = decode_landmarks(payload)
+        mark_parsed(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    rules = POSE_CORRECTION_RULES[pose_name]
-    lm = landmarks.landmark
+    if len(points) == 0:
+        return BatchPredictionResponse(results=[])
     
-    for check in rules['checks']:
-        feature = check['feature']
-        message = check['message']
+    try:
+        timings_ms = {}
+        predictions = await run_cached_predictions(model, points, timings_ms)
         
-        val = 0
-        tolerance = check.get('tolerance', 10) # default tolerance
-        ideal = check.get('ideal', 0)
+        if prediction_sampler():
+            logger.info("binary batch prediction", extra={
+                "request_id": request_id(request), "frames": len(points),
+                "timings_ms": timings_ms,
+            })
         
-        # KNEE ANGLES
-        if feature == 'left_knee_angle':
-            val = calculate_angle(
-                lm[mp_pose.PoseLandmark.LEFT_HIP],
-                lm[mp_pose.PoseLandmark.LEFT_KNEE],
-                lm[mp_pose.PoseLandmark.LEFT_ANKLE]
-            )
-            # Tolerance usually in degrees
-            tolerance = check.get('tolerance', 10)
-            if abs(val - ideal) > tolerance:
-                corrections.append(f"{message} (Current: {int(val)}°, Ideal: {ideal}°)")
+        response = BatchPredictionResponse(results=[
+            BatchPrediction(pose_name=pose_name, confidence=confidence, corrections=corrections)
+            for pose_name, confidence, corrections in predictions
+        ])
+        mark_handler_done(request)
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error processing binary batch", extra={"request_id": request_id(request)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ReloadRequest(BaseModel):
+    path: Optional[str] = None
+    allow_pose_changes: bool = False
+
+@app.post("/admin/reload_model")
+async def admin_reload_model(request: Request, body: Optional[ReloadRequest] = None):
+    """
+    Load, validate and swap in a model without a restart: body.path, or the
+    current model file again (e.g. after it was overwritten). The
+    X-Admin-Token header must match ADMIN_TOKEN; with no ADMIN_TOKEN set
+    the endpoint is disabled. body.path must be an .npz artifact: pickles
+    can run arbitrary code when loaded, so they are only read from MODEL_PATH.
+    """
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        raise HTTPException(status_code=403, detail="Model reload is disabled (ADMIN_TOKEN not set)")
+    if not hmac.compare_digest(request.headers.get('x-admin-token', ''), token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    if reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+    
+    body = body or ReloadRequest()
+    if body.path is not None and not body.path.endswith('.npz'):
+        raise HTTPException(status_code=400, detail="Only .npz model artifacts can be loaded here")
+    try:
+        await reload_model(body.path, body.allow_pose_changes, source='admin')
+    except ModelValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not load model: {e}")
+    return {"status": "ok", "model": model_info, "validation": model_data['validation']}
+
+@app.get("/session/{session_id}")
+async def session_stats(session_id: str):
+    """A session's motion gate counters: frames, reused classifications and skip ratio."""
+    session = session_store.peek(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "motion_gate": session[1].stats()}
+
+@app.delete("/session/{session_id}")
+async def end_session(session_id: str):
+    """Forget a session's smoothing state (e.g. when the client stops practicing)."""
+    if not session_store.drop(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "ok"}
+
+@app.websocket("/ws/session")
+async def pose_session_stream(websocket: WebSocket,
+                              smoothing_window: int = Query(7, ge=1, le=300),
+                              min_confidence: float = Query(0.70, ge=0.0, le=1.0),
+                              min_hold_frames: int = Query(10, ge=1, le=3600)):
+    """
+    Streaming classification for one practitioner per connection.
+
+    The client sends one PoseData JSON message per frame ({"landmarks": [...]},
+    an empty list when no pose is visible), {"type": "reset"} or
+    {"type": "stats"} (answered with the motion gate counters). Frames may
+    also be sent as binary messages in the wire_format encoding (zero frames
+    meaning no pose, at most MAX_BATCH_FRAMES per message). The server keeps the smoothing and hold state and
+    replies to every frame with pose_name, confidence, corrections, state
+    and status. While the practitioner holds still, frames reuse the last
+    classification (see motion_gate.py); the correction rules still run on
+    every frame. Out-of-range query parameters close the connection with
+    code 1008 (policy violation).
+    """
+    await websocket.accept()
+    if model_data is None:
+        await websocket.close(code=1013, reason="Model not loaded")
+        return
+    
+    session = PoseSession(smoothing_window, min_confidence, min_hold_frames)
+    gate = MotionGate.from_env()
+    no_pose = {
+        "pose_name": "Waiting...", "confidence": 0.0, "corrections": [],
+        "state": "no_pose", "status": "No pose detected"
+    }
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            try:
+                if message.get("bytes") is not None:
+                    frames = decode_landmarks(message["bytes"], max_frames=MAX_BATCH_FRAMES)
+                else:
+                    payload = json.loads(message["text"])
+                    if not isinstance(payload, dict):
+                        raise ValueError("Expected a JSON object")
+                    
+                    if payload.get("type") == "reset":
+                        session.reset()
+                        gate.reset()
+                        await websocket.send_json({"state": "reset"})
+                        continue
+                    
+                    if payload.get("type") == "stats":
+                        await websocket.send_json({"state": "stats", "motion_gate": gate.stats()})
+                        continue
+                    
+                    if payload.get("landmarks") == []:
+                        frames = np.empty((0, NUM_LANDMARKS, 4))
+                    else:
+                        data = PoseData(**payload)
+                        frames = landmarks_to_array(data.landmarks)[np.newaxis]
                 
-        elif feature == 'right_knee_angle':
-            val = calculate_angle(
-                lm[mp_pose.PoseLandmark.RIGHT_HIP],
-                lm[mp_pose.PoseLandmark.RIGHT_KNEE],
-                lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-            )
-            tolerance = check.get('tolerance', 10)
-            if abs(val - ideal) > tolerance:
-                corrections.append(f"{message} (Current: {int(val)}°, Ideal: {ideal}°)")
-
-        # ELBOW ANGLES
-        elif feature == 'left_elbow_angle':
-            val = calculate_angle(
-                lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                lm[mp_pose.PoseLandmark.LEFT_ELBOW],
-                lm[mp_pose.PoseLandmark.LEFT_WRIST]
-            )
-            tolerance = check.get('tolerance', 15)
-            if abs(val - ideal) > tolerance:
-                corrections.append(f"{message} (Current: {int(val)}°, Ideal: {ideal}°)")
+                if len(frames) == 0:
+                    gate.reset()
+                    await websocket.send_json(no_pose)
+                    continue
                 
-        elif feature == 'right_elbow_angle':
-            val = calculate_angle(
-                lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-                lm[mp_pose.PoseLandmark.RIGHT_ELBOW],
-                lm[mp_pose.PoseLandmark.RIGHT_WRIST]
-            )
-            tolerance = check.get('tolerance', 15)
-            if abs(val - ideal) > tolerance:
-                corrections.append(f"{message} (Current: {int(val)}°, Ideal: {ideal}°)")
-
-        # SPINE ANGLE
-        elif feature == 'spine_angle':
-            val = calculate_angle(
-                lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                lm[mp_pose.PoseLandmark.LEFT_HIP],
-                lm[mp_pose.PoseLandmark.LEFT_KNEE]
-            )
-            tolerance = check.get('tolerance', 15)
-            if abs(val - ideal) > tolerance:
-                corrections.append(f"{message} (Current: {int(val)}°, Ideal: {ideal}°)")
-
-        # SHOULDER LEVEL
-        elif feature == 'shoulder_level_diff':
-            val = abs(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y - 
-                      lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y)
-            threshold = check.get('tolerance', 0.03)
-            if val > threshold:
-                corrections.append(message)
-
-        # HIP LEVEL
-        elif feature == 'hip_level_diff':
-            val = abs(lm[mp_pose.PoseLandmark.LEFT_HIP].y - 
-                      lm[mp_pose.PoseLandmark.RIGHT_HIP].y)
-            threshold = check.get('tolerance', 0.03)
-            if val > threshold:
-                corrections.append(message)
-
-        # FOOT DISTANCE
-        elif feature == 'foot_distance':
-            val = calculate_distance(
-                lm[mp_pose.PoseLandmark.LEFT_ANKLE],
-                lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-            )
-            min_dist = check.get('min', 0.3)
-            if val < min_dist:
-                corrections.append(message)
+                model = model_data
+                for points in frames:
+                    model_id = model['ref'][1]
+                    classified = gate.check(points, tag=model_id)
+                    if classified is not None:
+                        motion_gate_frames.inc('reused')
+                    else:
+                        key = prediction_cache.keys(points[np.newaxis], namespace=f"classify:{model_id}")[0]
+                        classified = prediction_cache.get(key)
+                        if classified is None:
+                            names, confidences = await inference_pool.run(
+                                *on_model(model, classify_frames, points[np.newaxis]))
+                            classified = (names[0], confidences[0])
+                            prediction_cache.put(key, classified)
+                        gate.store(points, classified, tag=model_id)
+                        motion_gate_frames.inc('classified')
+                    predictions_total.inc(classified[0])
+                    await websocket.send_json(
+                        process_session_frame(session, points, *classified)
+                    )
+                
+            except InferenceOverloaded as e:
+                errors_total.inc('/ws/session', 'busy')
+                await websocket.send_json({"state": "busy", "detail": str(e)})
+            except (ValidationError, ValueError) as e:
+                errors_total.inc('/ws/session', 'error')
+                await websocket.send_json({"state": "error", "detail": str(e)})
+    
+    except WebSocketDisconnect:
+        pass
+
+def predict_frames(model, points, timings=None, known=None, rules=None) -> List[Tuple[str, float, Optional[List[str]]]]:
+    """
+    Run the full classification pipeline over a batch of frames.
+    Feature extraction, scaling and prediction each run once for the whole batch.
+
+    Args:
+        model: model_data dict to classify with
+        points: (N, 33, 4) landmark array
+        timings: optional dict that receives per-stage durations in seconds
+        known: optional (pose_name, confidence) per frame that is already
+            classified (e.g. from the cache), None for frames to classify
+        rules: optional bool per frame, False for frames whose corrections
+            are computed elsewhere (session frames); default True for all
+
+    Returns:
+        list of (pose_name, confidence, corrections), one per frame;
+        corrections is None for frames rules marks False
+    """
+    if known is None:
+        names, confidences = classify_frames(model, points, timings)
+    else:
+        names = [classified[0] if classified else None for classified in known]
+        confidences = [classified[1] if classified else None for classified in known]
+        missing = [i for i, classified in enumerate(known) if classified is None]
+        if missing:
+            for i, name, confidence in zip(missing, *classify_frames(model, points[missing], timings)):
+                names[i], confidences[i] = name, confidence
+    
+    # 5. Check Corrections
+    checked = list(range(len(points))) if rules is None else [i for i, check in enumerate(rules) if check]
+    predictions = [(name, conf, None) for name, conf in zip(names, confidences)]
+    if checked:
+        started = time.perf_counter()
+        group = points if len(checked) == len(points) else points[checked]
+        all_violations = evaluate_rules(group, [names[i] for i in checked])
+        for i, violations in zip(checked, all_violations):
+            predictions[i] = (names[i], confidences[i], format_corrections(violations, confidences[i]))
+        if timings is not None:
+            timings['rules'] = time.perf_counter() - started
+    
+    return predictions
+
+def predict_frames_timed(model, points, known=None, rules=None) -> Tuple[List[Tuple[str, float, Optional[List[str]]]], Dict[str, float]]:
+    """
+    predict_frames plus its stage timings. The timings travel back with the
+    result, so this also works on a process pool.
+    """
+    timings = {}
+    return predict_frames(model, points, timings, known, rules), timings
+
+def classify_frames(model, points, timings=None) -> Tuple[List[str], List[float]]:
+    """
+    Classify a batch of frames without evaluating correction rules.
+
+    Args:
+        model: model_data dict to classify with
+        points: (N, 33, 4) landmark array
+        timings: optional dict that receives per-stage durations in seconds
+
+    Returns:
+        (pose_names, confidences), one entry per frame
+    """
+    predictor = model['predictor']
+    
+    # 1. Extract features
+    started = time.perf_counter()
+    features = extract_pose_features_batch(points)
+    features_done = time.perf_counter()
+    
+    # 2. Normalize
+    features_scaled = predictor.transform(features)
+    scaling_done = time.perf_counter()
+    
+    # 3-4. Predict pose and confidence in a single pass
+    names, confidences, _ = predictor.predict_scaled(features_scaled)
+    
+    if timings is not None:
+        timings['features'] = features_done - started
+        timings['scaling'] = scaling_done - features_done
+        timings['prediction'] = time.perf_counter() - scaling_done
+    
+    return names, [float(c) for c in confidences]
+
+def process_session_frame(session, points, pose_name: str, confidence: float) -> Dict[str, Any]:
+    """
+    Update the session's smoothing state with one classified frame.
+    Correction rules only run once the pose has been held long enough.
+
+    Args:
+        session: the connection's PoseSession
+        points: (33, 4) landmark array
+        pose_name: raw predicted pose for this frame
+        confidence: raw prediction confidence
+    """
+    state = session.update(pose_name, confidence)
+    
+    if state.state == 'uncertain':
+        corrections = ["Move into clearer pose"]
+    elif state.state == 'locked':
+        violations = evaluate_rules(points, state.pose_name)[0]
+        corrections = format_corrections(violations, state.confidence)
+    else:
+        corrections = []
+    
+    return {
+        "pose_name": state.pose_name,
+        "confidence": float(state.confidence),
+        "corrections": corrections,
+        "state": state.state,
+        "status": state.status,
+    }
+
+def check_corrections_logic(points, pose_name: str, confidence: float) -> List[str]:
+    """
+    Check a pose against the correction rules in pose_rules.py.
+    The rules are evaluated by the shared rule_engine, the same one
+    RealtimePoseCorrector.check_corrections uses.
+
+    Args:
+        points: (33, 4) landmark array
+        pose_name: predicted pose name
+        confidence: prediction confidence
+    """
+    return format_corrections(evaluate_rules(points, pose_name)[0], confidence)
+
+def format_corrections(violations, confidence: float) -> List[str]:
+    """
+    Turn rule engine violations into correction messages.
+
+    Args:
+        violations: list of Violation, or None if the pose has no rules
+        confidence: prediction confidence
+    """
+    if violations is None:
+        return ["Great form! Keep it up."]
+    
+    corrections = []
+    for v in violations:
+        if v.unit == 'deg':
+            corrections.append(f"{v.message} (Current: {int(v.value)}°, Ideal: {v.ideal}°)")
+        else:
+            corrections.append(v.message)
 
     # Only show "perfect" if no corrections AND confidence is high (>80%)
     if not corrections and confidence > 0.8:
@@ -242,4 +920,6 @@ def check_corrections_logic(landmarks, pose_name: str, confidence: float) -> Lis
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    setup_logging()
+    # log_config=None: uvicorn's own loggers go through our queue handler too
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -0,0 +1,170 @@
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4), no extra
+dependencies.
+
+Observing a value is a bisect plus two additions, so it is cheap enough
+for every request. Metrics are only updated from the event loop thread:
+work done on the inference pool reports its timings back with its result
+instead of touching metrics from a worker.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, List
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine-grained at the low end where per-frame stages sit
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labelvalues):
+        series = self.series.get(labelvalues)
+        if series is None:
+            series = self.series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (float('inf'),)
+        for labelvalues, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, [le])} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback when metrics are scraped. Also used with
+    type='counter' to expose counters that another object already keeps.
+    """
+
+    def __init__(self, name, help, fn: Callable[[], float], type='gauge'):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.type = type
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}",
+                f"{self.name} {_number(self.fn())}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, type='gauge') -> Gauge:
+        return self._add(Gauge(name, help, fn, type))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    """
+    ASGI middleware that times every HTTP request and counts responses by
+    route and status.
+
+    It stores the request start in scope["state"]["started_at"] (readable
+    as request.state.started_at), and if the endpoint sets
+    request.state.handler_done, the time from then until the response
+    starts is observed as the 'serialization' stage.
+    """
+
+    def __init__(self, app, duration: Histogram, requests: Counter,
+                 errors: Counter, stages: Histogram):
+        self.app = app
+        self.duration = duration
+        self.requests = requests
+        self.errors = errors
+        self.stages = stages
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault('state', {})
+        state['started_at'] = started_at = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                handler_done = state.get('handler_done')
+                if handler_done is not None:
+                    self.stages.observe(time.perf_counter() - handler_done, 'serialization')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Route template, so /session/{session_id} stays one series
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            self.duration.observe(time.perf_counter() - started_at, route)
+            self.requests.inc(route, str(status[0]))
+            if status[0] >= 400:
+                self.errors.inc(route, str(status[0]))
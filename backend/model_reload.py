@@ -0,0 +1,132 @@
+"""
+Checks a newly loaded model before the backend swaps it in, and watches
+the model file for changes.
+
+Validation fixtures are an .npz file with:
+
+    landmarks   (N, 33, 4) float array of x, y, z, visibility
+    labels      (N,) pose names (unicode strings)
+
+Environment:
+    MODEL_FIXTURES        fixture file (default: none; only the feature count
+                          and pose list are checked)
+    MODEL_MIN_ACCURACY    accuracy floor on the fixtures (default 0.8)
+    MODEL_WATCH_INTERVAL  seconds between checks of the model file
+                          (default 0 = no watcher)
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from pose_features import extract_pose_features_batch, NUM_FEATURES
+
+logger = logging.getLogger('yoga.backend.reload')
+
+
+class ModelValidationError(ValueError):
+    """A candidate model failed validation; the current model stays in place."""
+
+
+def load_fixtures(path):
+    """
+    Returns:
+        (landmarks, labels): (N, 33, 4) float64 array and list of pose names
+    """
+    with np.load(path, allow_pickle=False) as data:
+        landmarks = np.asarray(data['landmarks'], dtype=np.float64)
+        labels = [str(label) for label in data['labels']]
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (33, 4) or len(landmarks) != len(labels):
+        raise ValueError(f"{path}: expected landmarks (N, 33, 4) and N labels, "
+                         f"got {landmarks.shape} and {len(labels)}")
+    return landmarks, labels
+
+
+def validate_model(data, fixtures=None, expected_poses: Optional[List[str]] = None,
+                   min_accuracy=0.8) -> Dict[str, Any]:
+    """
+    Check a loaded model (a load_model_data dict) before serving it.
+
+    Args:
+        data: candidate model
+        fixtures: (landmarks, labels) from load_fixtures, or None
+        expected_poses: pose names the model must predict (e.g. the current
+            model's), or None to skip the check
+        min_accuracy: lowest accepted accuracy on the fixtures
+
+    Returns:
+        report dict (n_features, poses, fixtures, accuracy)
+
+    Raises:
+        ModelValidationError: describing the first failed check
+    """
+    predictor = data['predictor']
+    if predictor.n_features != NUM_FEATURES:
+        raise ModelValidationError(
+            f"Model expects {predictor.n_features} features, the backend extracts {NUM_FEATURES}")
+
+    poses = list(data['pose_names'])
+    if expected_poses is not None and set(poses) != set(expected_poses):
+        added = sorted(set(poses) - set(expected_poses))
+        removed = sorted(set(expected_poses) - set(poses))
+        raise ModelValidationError(f"Pose list changed (added {added}, removed {removed})")
+
+    report = {"n_features": predictor.n_features, "poses": len(poses), "fixtures": 0, "accuracy": None}
+    if fixtures is None:
+        # Still make sure the model runs end to end
+        predictor.predict(np.zeros((1, NUM_FEATURES)))
+        return report
+
+    landmarks, labels = fixtures
+    unknown = sorted(set(labels) - set(poses))
+    if unknown:
+        raise ModelValidationError(f"Model cannot predict fixture poses {unknown}")
+
+    names, _ = predictor.predict(extract_pose_features_batch(landmarks))
+    accuracy = float(np.mean([name == label for name, label in zip(names, labels)]))
+    report.update(fixtures=len(labels), accuracy=round(accuracy, 4))
+    if accuracy < min_accuracy:
+        raise ModelValidationError(
+            f"Accuracy {accuracy:.1%} on {len(labels)} fixture frames is below {min_accuracy:.1%}")
+    return report
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return path, st.st_mtime_ns, st.st_size
+
+
+async def watch_model_file(get_path: Callable[[], str],
+                           on_change: Callable[[str], Awaitable[Any]],
+                           interval: float):
+    """
+    Poll the model file every interval seconds and await on_change(path)
+    once it has changed and then stayed the same for one more interval
+    (so a file still being written is not picked up). Runs until cancelled.
+    """
+    last = _file_state(get_path())
+    while True:
+        await asyncio.sleep(interval)
+        path = get_path()
+        current = _file_state(path)
+        if current is None or current == last:
+            continue
+        if last is not None and last[0] != path:
+            # The served path was switched (admin reload); start watching it
+            last = current
+            continue
+
+        await asyncio.sleep(interval)
+        if _file_state(path) != current:
+            continue
+        last = current
+        try:
+            await on_change(path)
+        except Exception:
+            # on_change logs its own failures; keep watching
+            pass
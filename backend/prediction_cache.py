@@ -0,0 +1,141 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# MediaPipe Pose indices (see pose_features.PoseLandmark)
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of per-frame results, keyed on quantized landmarks.
+
+    While someone holds a pose, consecutive frames differ by a few pixels of
+    detector jitter. The key is each landmark's (x, y) relative to the hip
+    center, divided by torso length (hip center to shoulder center) and
+    rounded to `step`, so that jitter maps to the same key. Several model
+    features use absolute positions, so the hip center and torso length
+    themselves are also part of the key, rounded to `anchor_step`
+    (normalized image units). Pass landmark_indices to key only on the
+    landmarks the model actually reads; face and hand points are the
+    noisiest and would otherwise cause most of the misses. z is not part of
+    the key, so only cache results that don't depend on it (the backend
+    caches classifications, not corrections).
+
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self, max_entries=4096, ttl=5.0, step=0.02, anchor_step=0.02,
+                 landmark_indices=None):
+        """
+        Args:
+            max_entries: cache size (0 disables the cache)
+            ttl: seconds an entry stays valid
+            step: quantization step in torso lengths
+            anchor_step: quantization step for hip center and torso length
+            landmark_indices: landmarks that go into the key (default: all)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.step = step
+        self.anchor_step = anchor_step
+        self.landmark_indices = None if landmark_indices is None else np.asarray(landmark_indices)
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, landmark_indices=None):
+        """Build from PREDICTION_CACHE_SIZE / _TTL / _STEP / _ANCHOR_STEP."""
+        return cls(
+            landmark_indices=landmark_indices,
+            max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+            ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 5.0)),
+            step=float(os.environ.get('PREDICTION_CACHE_STEP', 0.02)),
+            anchor_step=float(os.environ.get('PREDICTION_CACHE_ANCHOR_STEP', 0.02)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def keys(self, points, namespace='') -> List[bytes]:
+        """
+        Cache keys for a batch of frames.
+
+        Args:
+            points: (N, 33, 4) landmark array
+            namespace: kept apart from other kinds of cached results
+
+        Returns:
+            one bytes key per frame
+        """
+        xy = np.asarray(points, dtype=np.float64)[:, :, :2]
+        hip = xy[:, [LEFT_HIP, RIGHT_HIP]].mean(axis=1)
+        shoulder = xy[:, [LEFT_SHOULDER, RIGHT_SHOULDER]].mean(axis=1)
+        torso = np.maximum(np.linalg.norm(shoulder - hip, axis=1), 1e-6)
+
+        if self.landmark_indices is not None:
+            xy = xy[:, self.landmark_indices]
+        normalized = (xy - hip[:, None, :]) / torso[:, None, None]
+        shape = np.clip(np.round(normalized / self.step), -32768, 32767).astype(np.int16)
+        anchor = np.round(np.column_stack([hip, torso]) / self.anchor_step).astype(np.int32)
+
+        prefix = namespace.encode()
+        return [prefix + a.tobytes() + s.tobytes() for a, s in zip(anchor, shape)]
+
+    def get(self, key) -> Optional[Any]:
+        """Cached value, or None on a miss (or expired entry)."""
+        if not self.enabled:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self.entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, counters and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "step": self.step,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,250 @@
+"""
+Production entry point: several uvicorn worker processes sharing one
+listening socket and one preloaded model.
+
+The parent sets the thread limits, imports main (which loads the model)
+and then forks the workers, so imported modules and the model are shared
+copy-on-write instead of loaded N times. With the .npz artifact (see
+model/model_artifact.py) the model arrays are a read-only file mapping,
+shared by every process regardless. The parent restarts workers that exit
+unexpectedly and stops them all on SIGINT/SIGTERM.
+
+Without os.fork (Windows) this falls back to uvicorn's own worker
+processes, which each import main and load the model themselves (still
+sharing the memory-mapped artifact pages).
+
+Avoiding oversubscription:
+    --blas-threads   BLAS/OpenMP threads per worker (default 1); set before
+                     numpy is imported
+    --cpu-affinity   none (default), auto (split the available CPUs evenly
+                     between workers) or explicit per-worker CPU lists such
+                     as "0-1;2-3" (Linux only)
+    INFERENCE_WORKERS defaults to the number of CPUs each worker gets
+
+Model reloads: POST /admin/reload_model only reaches the worker that
+handles the request, so with more than one worker MODEL_WATCH_INTERVAL
+defaults to 5 seconds and every worker picks up a changed model file.
+
+Per-worker state: HTTP sessions (session_id on /classify and
+/classify_batch), the prediction cache and the /metrics counters live in
+each worker's own memory.
+    Sessions     with more than one worker HTTP_SESSIONS defaults to 0 and
+                 requests with a session_id get 400. Use /ws/session (a
+                 connection stays on one worker), or set HTTP_SESSIONS=1
+                 behind a proxy that routes each session_id to the same
+                 worker.
+    Metrics      /metrics on --port answers from whichever worker takes the
+                 request. With --worker-ports BASE worker i also listens on
+                 BASE+i, so every worker is its own scrape target.
+    Cache        each worker caches only the frames it served; nothing is
+                 wrong, hits are just rarer.
+
+Scaling: how throughput changes with the number of workers has not been
+measured on a multi-core machine (only on one CPU, where extra workers
+cannot help). Pick --workers from benchmarks/serve_scaling.py run on the
+target machine.
+
+Usage:
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+                    [--cpu-affinity auto] [--blas-threads 1]
+                    [--worker-ports 9100]
+
+Every option can also be set as SERVE_<OPTION> (e.g. SERVE_WORKERS=4).
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+BLAS_THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+# A worker that dies sooner than this after starting is restarted only after
+# the same delay, so a crash on startup does not turn into a fork loop
+RESTART_DELAY = 1.0
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text):
+    """'0-2,5' -> {0, 1, 2, 5}"""
+    cpus = set()
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def cpu_sets(spec, workers):
+    """
+    Args:
+        spec: 'none', 'auto' or per-worker CPU lists separated by ';'
+        workers: number of workers
+
+    Returns:
+        one set of CPUs per worker, or None for no pinning
+    """
+    if spec == 'none':
+        return None
+    if spec == 'auto':
+        cpus = available_cpus()
+        per_worker = max(1, len(cpus) // workers)
+        return [set(cpus[(i * per_worker) % len(cpus):][:per_worker]) for i in range(workers)]
+    groups = [parse_cpu_list(group) for group in spec.split(';')]
+    return [groups[i % len(groups)] for i in range(workers)]
+
+
+def listen_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, cpus, own_sock=None):
+    """
+    Serve on the inherited socket, and on own_sock (this worker's
+    --worker-ports socket) if given, until uvicorn is told to exit.
+    """
+    import uvicorn
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    # log_config=None: uvicorn's loggers go through the backend's queue handler
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None))
+    server.run(sockets=[sock] if own_sock is None else [sock, own_sock])
+
+
+def serve_forked(args, affinity):
+    import main  # loads the model once, before forking
+
+    logger = logging.getLogger('yoga.serve')
+    sock = listen_socket(args.host, args.port)
+    # Bound up front so a port clash fails here, not in a worker restart loop
+    own_socks = ([listen_socket(args.host, args.worker_ports + i) for i in range(args.workers)]
+                 if args.worker_ports else None)
+    children = {}  # pid -> (worker index, started_at)
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for i, other in enumerate(own_socks or ()):
+                if i != index:
+                    other.close()
+            code = 0
+            try:
+                run_worker(main.app, sock, affinity[index] if affinity else None,
+                           own_socks[index] if own_socks else None)
+            except BaseException:
+                logger.exception("Worker crashed", extra={"worker": index})
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        # SIGTERM even for Ctrl-C: the workers already got SIGINT from the
+        # terminal, and a second SIGINT would make uvicorn exit without
+        # finishing open requests
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(args.workers):
+        spawn(index)
+    logger.info("Serving", extra={"workers": args.workers, "host": args.host, "port": args.port,
+                                  "cpu_affinity": [sorted(c) for c in affinity] if affinity else None,
+                                  "blas_threads": args.blas_threads,
+                                  "worker_ports": args.worker_ports or None,
+                                  "inference_threads": os.environ.get('INFERENCE_WORKERS')})
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index, started_at = children.pop(pid, (None, None))
+        if index is None or stopping:
+            continue
+        logger.error("Worker exited, restarting",
+                     extra={"worker": index, "pid": pid, "exit_code": os.waitstatus_to_exitcode(status)})
+        if time.monotonic() - started_at < RESTART_DELAY:
+            time.sleep(RESTART_DELAY)
+        if not stopping:
+            spawn(index)
+    sock.close()
+    for own_sock in own_socks or ():
+        own_sock.close()
+
+
+def serve_spawned(args):
+    import uvicorn
+    uvicorn.run('main:app', host=args.host, port=args.port, workers=args.workers, log_config=None)
+
+
+def main():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Run the backend with several worker processes")
+    parser.add_argument('--workers', type=int, default=int(env('SERVE_WORKERS', os.cpu_count() or 1)),
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--host', default=env('SERVE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(env('SERVE_PORT', 8000)))
+    parser.add_argument('--cpu-affinity', default=env('SERVE_CPU_AFFINITY', 'none'),
+                        help="none, auto or per-worker CPU lists like '0-1;2-3'")
+    parser.add_argument('--blas-threads', type=int, default=int(env('SERVE_BLAS_THREADS', 1)),
+                        help='BLAS/OpenMP threads per worker (default: 1)')
+    parser.add_argument('--worker-ports', type=int, default=int(env('SERVE_WORKER_PORTS', 0)),
+                        help='worker i also listens on this port + i, e.g. to scrape its /metrics '
+                             '(default: 0, off)')
+    args = parser.parse_args()
+
+    # Must be set before numpy (imported by main) loads its BLAS
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(args.blas_threads)
+
+    affinity = cpu_sets(args.cpu_affinity, args.workers)
+    cpus_per_worker = len(affinity[0]) if affinity else max(1, len(available_cpus()) // args.workers)
+    os.environ.setdefault('INFERENCE_WORKERS', str(cpus_per_worker))
+    if args.workers > 1:
+        os.environ.setdefault('MODEL_WATCH_INTERVAL', '5')
+        os.environ.setdefault('HTTP_SESSIONS', '0')
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from logging_config import setup_logging
+    setup_logging()
+
+    if hasattr(os, 'fork'):
+        serve_forked(args, affinity)
+    else:
+        if affinity:
+            print("Warning: --cpu-affinity is not supported on this platform", file=sys.stderr)
+        if args.worker_ports:
+            print("Warning: --worker-ports is not supported on this platform", file=sys.stderr)
+        serve_spawned(args)
+
+
+if __name__ == '__main__':
+    main()
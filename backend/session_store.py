@@ -0,0 +1,104 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+
+class SessionStore:
+    """
+    Server-side per-session state (e.g. PoseSession), keyed by session id.
+
+    Sessions are kept in least-recently-used order. Sessions idle for more
+    than ttl seconds are evicted, and once max_sessions is reached the least
+    recently used one makes room for a new one, so memory stays bounded at
+    max_sessions x the size of one session.
+
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_sessions=50000, ttl=300.0):
+        """
+        Args:
+            factory: creates the state for a new session
+            max_sessions: most sessions kept at once
+            ttl: seconds of inactivity before a session is dropped
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions = OrderedDict()  # session_id -> [last_seen, state]
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls, factory):
+        """Build from SESSION_STORE_MAX_SESSIONS / SESSION_STORE_TTL."""
+        return cls(
+            factory,
+            max_sessions=int(os.environ.get('SESSION_STORE_MAX_SESSIONS', 50000)),
+            ttl=float(os.environ.get('SESSION_STORE_TTL', 300.0)),
+        )
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+    def get(self, session_id):
+        """Return the session's state, creating it if it's new or expired."""
+        now = time.monotonic()
+        self.evict_expired(now)
+
+        entry = self.sessions.get(session_id)
+        if entry is not None:
+            entry[0] = now
+            self.sessions.move_to_end(session_id)
+            return entry[1]
+
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+        state = self.factory()
+        self.sessions[session_id] = [now, state]
+        self.created += 1
+        return state
+
+    def peek(self, session_id):
+        """The session's state, or None; doesn't create it or count as activity."""
+        entry = self.sessions.get(session_id)
+        return entry[1] if entry is not None else None
+
+    def drop(self, session_id) -> bool:
+        """Forget a session. Returns False if it didn't exist."""
+        return self.sessions.pop(session_id, None) is not None
+
+    def evict_expired(self, now=None) -> int:
+        """
+        Drop sessions idle for longer than ttl. The oldest entries are first,
+        so this stops at the first live one.
+        """
+        if now is None:
+            now = time.monotonic()
+        removed = 0
+        while self.sessions:
+            last_seen = next(iter(self.sessions.values()))[0]
+            if now - last_seen <= self.ttl:
+                break
+            self.sessions.popitem(last=False)
+            removed += 1
+        self.expired += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
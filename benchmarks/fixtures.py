@@ -0,0 +1,96 @@
+"""
+Landmark fixtures for the benchmarks.
+
+Synthetic fixtures are random perturbations of a standing skeleton, so
+they are reproducible from a seed and look like real MediaPipe output
+(normalized image coordinates, every joint in a plausible place).
+Recorded fixtures can be loaded from:
+
+    *.npy         array of shape (N, 33, 4)
+    *.f32         landmarks file of a training landmark cache
+                  (model/landmark_cache.py)
+    anything else a binary payload in the backend wire format
+                  (backend/wire_format.py)
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (x, y) of a person standing upright, facing the camera (MediaPipe order)
+STANDING_POSE = np.array([
+    [0.500, 0.200],                                                  # nose
+    [0.510, 0.185], [0.515, 0.185], [0.520, 0.185],                  # left eye
+    [0.490, 0.185], [0.485, 0.185], [0.480, 0.185],                  # right eye
+    [0.530, 0.190], [0.470, 0.190],                                  # ears
+    [0.510, 0.225], [0.490, 0.225],                                  # mouth
+    [0.560, 0.300], [0.440, 0.300],                                  # shoulders
+    [0.580, 0.420], [0.420, 0.420],                                  # elbows
+    [0.590, 0.530], [0.410, 0.530],                                  # wrists
+    [0.595, 0.560], [0.405, 0.560],                                  # pinkies
+    [0.590, 0.565], [0.410, 0.565],                                  # index fingers
+    [0.585, 0.550], [0.415, 0.550],                                  # thumbs
+    [0.540, 0.550], [0.460, 0.550],                                  # hips
+    [0.545, 0.720], [0.455, 0.720],                                  # knees
+    [0.550, 0.880], [0.450, 0.880],                                  # ankles
+    [0.550, 0.900], [0.450, 0.900],                                  # heels
+    [0.560, 0.920], [0.440, 0.920],                                  # foot index
+])
+
+
+def synthetic_landmarks(n, seed=0, spread=0.04):
+    """
+    Args:
+        n: number of frames
+        seed: random seed
+        spread: per-joint noise (normalized image units)
+
+    Returns:
+        (n, 33, 4) float64 array of x, y, z, visibility
+    """
+    rng = np.random.default_rng(seed)
+    xy = STANDING_POSE[None] + rng.normal(0, spread, (n, 33, 2))
+
+    # Whole-body placement: scale around the hips and shift
+    scale = rng.uniform(0.8, 1.2, (n, 1, 1))
+    shift = rng.normal(0, 0.05, (n, 1, 2))
+    center = STANDING_POSE[23:25].mean(axis=0)
+    xy = (xy - center) * scale + center + shift
+
+    points = np.empty((n, 33, 4))
+    points[..., :2] = xy
+    points[..., 2] = rng.normal(0, 0.1, (n, 33))
+    points[..., 3] = rng.uniform(0.6, 1.0, (n, 33))
+    return points
+
+
+def load_recorded(path):
+    """
+    Load recorded landmarks (see module docstring for formats).
+
+    Returns:
+        (N, 33, 4) float64 array
+    """
+    if path.endswith('.npy'):
+        points = np.load(path)
+    elif path.endswith('.f32'):
+        points = np.fromfile(path, dtype='<f4').reshape(-1, 33, 4)
+    else:
+        sys.path.insert(0, os.path.join(ROOT, 'backend'))
+        from wire_format import decode_landmarks
+        with open(path, 'rb') as f:
+            points = decode_landmarks(f.read())
+
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 3 or points.shape[1:] != (33, 4) or len(points) == 0:
+        raise ValueError(f"{path}: expected landmarks of shape (N, 33, 4), got {points.shape}")
+    return points
+
+
+def load_fixtures(paths=None, n=512, seed=0):
+    """Recorded landmarks from paths if given, otherwise n synthetic frames."""
+    if paths:
+        return np.concatenate([load_recorded(p) for p in paths])
+    return synthetic_landmarks(n, seed=seed)
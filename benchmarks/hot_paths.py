@@ -0,0 +1,350 @@
+"""
+Benchmarks for the classification and correction hot paths.
+
+Groups:
+    micro   per-function timings: geometry, feature extraction, scaler and
+            model, correction rules, session smoothing, wire format,
+            overlay drawing
+    e2e     /classify latency through an in-process ASGI client
+    batch   /classify_batch and /classify_binary throughput per batch size
+
+Every benchmark reports mean/p50/p95/p99 per call (microseconds) and
+throughput. Results can be written as JSON and compared against a stored
+baseline; the run exits with status 1 if any benchmark got slower than
+the baseline by more than the threshold.
+
+Baselines live in benchmarks/baselines/, one file per machine, each
+recording the machine it was measured on (CPU, CPU count, OS, Python and
+numpy versions). Timings only compare on the same machine, so generate a
+baseline there first (from a clean checkout of the commit to compare
+against) and keep it next to the others:
+
+    python benchmarks/hot_paths.py --output benchmarks/baselines/<machine>.json
+
+baselines/reference-1cpu.json was measured on a one-CPU Xeon VM (Linux,
+Python 3.11, numpy 2.4); comparing against it on other hardware prints a
+warning. That VM is shared and back-to-back runs differed by up to 2x on
+the sub-millisecond micro benchmarks, so the default 15% threshold is
+only meaningful on a quiet machine.
+
+The e2e and batch groups need httpx. The prediction cache is disabled
+(PREDICTION_CACHE_SIZE=0) unless set in the environment, so every request
+runs the full pipeline, and sampled per-request logging is off
+(LOG_SAMPLE_EVERY=0).
+
+Usage:
+    python benchmarks/hot_paths.py [--groups micro e2e batch] [--output results.json]
+    python benchmarks/hot_paths.py --baseline baseline.json [--threshold 0.15] [--metric p50_us]
+    python benchmarks/hot_paths.py --fixtures recorded.npy
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from fixtures import load_fixtures
+
+REPO = os.path.dirname(ROOT)
+BACKEND_DIR = os.path.join(REPO, 'backend')
+MODEL_DIR = os.path.join(REPO, 'model')
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, MODEL_DIR)
+
+GROUPS = ('micro', 'e2e', 'batch')
+BATCH_SIZES = (1, 8, 32, 128)
+
+_Point = namedtuple('_Point', ['x', 'y', 'z', 'visibility'])
+
+
+def as_mediapipe(points):
+    """Wrap a (33, 4) array like MediaPipe's pose_landmarks (.landmark[i].x ...)."""
+    return SimpleNamespace(landmark=[_Point(*map(float, row)) for row in points])
+
+
+# ==================== TIMING ====================
+
+def time_calls(fn, iterations, warmup):
+    """Per-call wall times (seconds) of fn() after warmup calls."""
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+async def time_calls_async(fn, iterations, warmup):
+    for _ in range(warmup):
+        await fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def summarize(group, name, samples, items_per_call=1):
+    us = samples * 1e6
+    p50, p95, p99 = np.percentile(us, [50, 95, 99])
+    return {
+        "group": group,
+        "name": name,
+        "calls": len(samples),
+        "mean_us": float(us.mean()),
+        "p50_us": float(p50),
+        "p95_us": float(p95),
+        "p99_us": float(p99),
+        "items_per_s": float(items_per_call / samples.mean()),
+    }
+
+
+# ==================== BENCHMARKS ====================
+
+def bench_micro(points, iterations, warmup, model_path, artifact_path=None):
+    from pose_features import (calculate_angle, extract_pose_features,
+                               extract_pose_features_batch, PoseLandmark as L)
+    from rule_engine import evaluate_rules
+    from pose_session import PoseSession
+    from predictor import PosePredictor
+    from model_artifact import load_model_data
+    from wire_format import encode_landmarks, decode_landmarks
+    from overlay import PoseOverlay
+
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    predictor = PosePredictor.from_model_data(model_data)
+    sklearn_predictor = PosePredictor.from_model_data(model_data, use_kernel=False)
+
+    frames = itertools.cycle(points)
+    wrapped = itertools.cycle([as_mediapipe(p) for p in points[:256]])
+    features = extract_pose_features_batch(points)
+    feature_rows = itertools.cycle(features[:, None, :])
+    names, _ = predictor.predict(features)
+    labelled = itertools.cycle(list(zip(points, names)))
+    batch = points[:128]
+    payload = encode_landmarks(points[0])
+    session = PoseSession()
+    pose_names = itertools.cycle(names)
+    overlay = PoseOverlay()
+    canvas = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    feedback = ["Bend your front knee more (now: 150°, target: 90°)", "Keep your arms level"]
+
+    def angle():
+        lm = next(wrapped).landmark
+        calculate_angle(lm[L.LEFT_SHOULDER], lm[L.LEFT_ELBOW], lm[L.LEFT_WRIST])
+
+    def load_model():
+        with open(model_path, 'rb') as f:
+            PosePredictor.from_model_data(pickle.load(f))
+
+    def rules():
+        frame, name = next(labelled)
+        evaluate_rules(frame, name)
+
+    cases = [
+        ("calculate_angle", angle, 1),
+        ("extract_pose_features", lambda: extract_pose_features(next(wrapped)), 1),
+        ("extract_pose_features_batch[1]", lambda: extract_pose_features_batch(next(frames)), 1),
+        ("extract_pose_features_batch[128]", lambda: extract_pose_features_batch(batch), len(batch)),
+        ("predictor.predict[1]", lambda: predictor.predict(next(feature_rows)), 1),
+        ("predictor.predict[1] (sklearn)", lambda: sklearn_predictor.predict(next(feature_rows)), 1),
+        ("predictor.predict[128]", lambda: predictor.predict(features[:128]), 128),
+        ("evaluate_rules[1]", rules, 1),
+        ("session.update", lambda: session.update(next(pose_names), 0.9), 1),
+        ("decode_landmarks[1]", lambda: decode_landmarks(payload), 1),
+        ("overlay.draw_info (1080p)",
+         lambda: overlay.draw_info(canvas, "Warrior II", feedback, 0.93, 30.0, "✓ Locked"), 1),
+        ("model_load", load_model, 1),
+    ]
+    if artifact_path and os.path.exists(artifact_path):
+        cases.append(("model_load (artifact)", lambda: load_model_data(artifact_path), 1))
+
+    results = []
+    for name, fn, items in cases:
+        n = iterations if not name.startswith('model_load') else max(5, iterations // 100)
+        results.append(summarize('micro', name, time_calls(fn, n, warmup), items))
+
+    # Needs the backend module for the message formatting
+    import main
+    results.append(summarize('micro', 'check_corrections_logic', time_calls(
+        lambda: main.check_corrections_logic(*next(labelled), 0.9), iterations, warmup)))
+    return results
+
+
+def _landmark_json(points):
+    return [dict(zip(('x', 'y', 'z', 'visibility'), map(float, row))) for row in points]
+
+
+async def _bench_http(points, iterations, warmup, groups):
+    import httpx
+    import main
+    from wire_format import encode_landmarks, CONTENT_TYPE
+
+    if main.model_data is None:
+        raise RuntimeError("Backend model failed to load")
+
+    transport = httpx.ASGITransport(app=main.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        if 'e2e' in groups:
+            bodies = itertools.cycle([{'landmarks': _landmark_json(p)} for p in points])
+
+            async def classify():
+                response = await client.post('/classify', json=next(bodies))
+                response.raise_for_status()
+
+            results.append(summarize('e2e', '/classify', await time_calls_async(classify, iterations, warmup)))
+
+        if 'batch' in groups:
+            for size in BATCH_SIZES:
+                chunks = [points[i:i + size] for i in range(0, len(points) - size + 1, size)] or [points[:size]]
+                json_bodies = itertools.cycle([
+                    {'frames': [{'landmarks': _landmark_json(p)} for p in chunk]} for chunk in chunks
+                ])
+                binary_bodies = itertools.cycle([encode_landmarks(chunk) for chunk in chunks])
+                calls = max(10, iterations // size)
+
+                async def batch_json():
+                    response = await client.post('/classify_batch', json=next(json_bodies))
+                    response.raise_for_status()
+
+                async def batch_binary():
+                    response = await client.post('/classify_binary', content=next(binary_bodies),
+                                                 headers={'content-type': CONTENT_TYPE})
+                    response.raise_for_status()
+
+                results.append(summarize('batch', f'/classify_batch[{size}]',
+                                         await time_calls_async(batch_json, calls, warmup), size))
+                results.append(summarize('batch', f'/classify_binary[{size}]',
+                                         await time_calls_async(batch_binary, calls, warmup), size))
+    return results
+
+
+def bench_http(points, iterations, warmup, groups):
+    return asyncio.run(_bench_http(points, iterations, warmup, groups))
+
+
+# ==================== BASELINE ====================
+
+def compare(results, baseline, metric, threshold):
+    """
+    Returns:
+        list of (name, baseline_value, value, ratio) for every benchmark
+        present in both runs, and the list of regressions among them
+    """
+    previous = {(r['group'], r['name']): r for r in baseline['results']}
+    rows, regressions = [], []
+    for r in results:
+        old = previous.get((r['group'], r['name']))
+        if old is None or not old.get(metric):
+            continue
+        ratio = r[metric] / old[metric]
+        row = (f"{r['group']}/{r['name']}", old[metric], r[metric], ratio)
+        rows.append(row)
+        if ratio > 1 + threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def machine_description():
+    """What the timings depend on: CPU model and count, OS and library versions."""
+    cpu = platform.processor()
+    if os.path.exists('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as f:
+            cpu = next((line.split(':', 1)[1].strip() for line in f
+                        if line.startswith('model name')), cpu)
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    return {
+        "machine": platform.machine(),
+        "cpu": cpu,
+        "cpus": cpus,
+        "system": f"{platform.system()} {platform.release()}",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def print_results(results):
+    print(f"{'benchmark':48s} {'p50 us':>10s} {'p95 us':>10s} {'p99 us':>10s} {'items/s':>12s}")
+    for r in results:
+        print(f"{r['group'] + '/' + r['name']:48s} {r['p50_us']:10.1f} {r['p95_us']:10.1f} "
+              f"{r['p99_us']:10.1f} {r['items_per_s']:12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--iterations', type=int, default=1000, help='timed calls per benchmark')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed calls before timing')
+    parser.add_argument('--fixtures', nargs='+', help='recorded landmark files (default: synthetic)')
+    parser.add_argument('--frames', type=int, default=512, help='synthetic frames to generate')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic fixture seed')
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'svm_classifier.pkl'),
+                        help='model pickle for the micro benchmarks')
+    parser.add_argument('--artifact', default=os.path.join(MODEL_DIR, 'svm_classifier.npz'),
+                        help='model artifact for the model_load (artifact) benchmark')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='compare against a previous --output file')
+    parser.add_argument('--metric', default='p50_us', choices=['mean_us', 'p50_us', 'p95_us', 'p99_us'])
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed slowdown vs baseline (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+    os.environ.setdefault('LOG_SAMPLE_EVERY', '0')
+    points = load_fixtures(args.fixtures, n=args.frames, seed=args.seed)
+
+    results = []
+    if 'micro' in args.groups:
+        results += bench_micro(points, args.iterations, args.warmup, args.model, args.artifact)
+    if 'e2e' in args.groups or 'batch' in args.groups:
+        results += bench_http(points, args.iterations, args.warmup, args.groups)
+
+    print_results(results)
+
+    report = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **machine_description(),
+        "fixtures": args.fixtures or f"synthetic(n={args.frames}, seed={args.seed})",
+        "iterations": args.iterations,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.metric, args.threshold)
+        print(f"\nCompared with {args.baseline} ({args.metric}, threshold {args.threshold:.0%}):")
+        differs = [key for key in ('cpu', 'cpus', 'machine', 'python', 'numpy')
+                   if baseline.get(key) != report[key]]
+        if differs:
+            print(f"  Warning: baseline was measured on a different setup ({', '.join(differs)}); "
+                  f"timings are not comparable")
+        for name, old, new, ratio in rows:
+            flag = '  REGRESSION' if ratio > 1 + args.threshold else ''
+            print(f"  {name:46s} {old:10.1f} -> {new:10.1f}  x{ratio:.2f}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Throughput of backend/serve.py as the number of worker processes grows.
+
+For each worker count the server is started on a local port, loaded by
+client processes for a fixed time, and stopped. Reports requests and
+frames per second, latency percentiles and the speedup over the first
+worker count.
+
+The clients run on the same machine and need CPU too; give the server most
+of the cores (e.g. --cpu-affinity with explicit lists) or run the clients
+elsewhere against --url for clean numbers. Needs httpx.
+
+Usage:
+    python benchmarks/serve_scaling.py --workers 1 2 4 8 [--duration 10]
+        [--clients 2] [--concurrency 16] [--batch 1] [--output scaling.json]
+    python benchmarks/serve_scaling.py --url http://host:8000   # existing server
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from fixtures import load_fixtures
+
+REPO = os.path.dirname(ROOT)
+BACKEND_DIR = os.path.join(REPO, 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+
+# ==================== LOAD ====================
+
+async def _client(url, points, batch, concurrency, duration):
+    import httpx
+    from wire_format import encode_landmarks, CONTENT_TYPE
+
+    bodies = [encode_landmarks(points[i:i + batch]) for i in range(0, len(points) - batch + 1, batch)]
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def connection(client, offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post('/classify_binary', content=bodies[i % len(bodies)],
+                                         headers={'content-type': CONTENT_TYPE})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*[connection(client, k) for k in range(concurrency)])
+    return latencies
+
+
+def run_client(job):
+    """One load-generating process; returns its request latencies (seconds)."""
+    url, seed, batch, concurrency, duration = job
+    points = load_fixtures(n=256, seed=seed)
+    return asyncio.run(_client(url, points, batch, concurrency, duration))
+
+
+def measure(url, args, duration=None):
+    duration = duration or args.duration
+    jobs = [(url, seed, args.batch, args.concurrency, duration) for seed in range(args.clients)]
+    with multiprocessing.get_context('spawn').Pool(args.clients) as pool:
+        latencies = np.concatenate([np.asarray(l) for l in pool.map(run_client, jobs)])
+    p50, p99 = np.percentile(latencies * 1000, [50, 99])
+    requests_per_s = len(latencies) / duration
+    return {
+        "requests": int(len(latencies)),
+        "requests_per_s": float(requests_per_s),
+        "frames_per_s": float(requests_per_s * args.batch),
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+    }
+
+
+# ==================== SERVER ====================
+
+def wait_ready(url, timeout=60.0):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + '/', timeout=1).json().get('model_loaded'):
+                return
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def start_server(workers, port, args):
+    env = dict(os.environ)
+    # Measure the full pipeline without per-request log lines
+    env.setdefault('PREDICTION_CACHE_SIZE', '0')
+    env.setdefault('LOG_SAMPLE_EVERY', '0')
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    command = [sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), '--workers', str(workers),
+               '--host', '127.0.0.1', '--port', str(port),
+               '--cpu-affinity', args.cpu_affinity, '--blas-threads', str(args.blas_threads)]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='worker counts to measure')
+    parser.add_argument('--url', help='load an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per run')
+    parser.add_argument('--clients', type=int, default=2, help='load-generating processes')
+    parser.add_argument('--concurrency', type=int, default=16, help='connections per client')
+    parser.add_argument('--batch', type=int, default=1, help='frames per request')
+    parser.add_argument('--cpu-affinity', default='auto', help='passed to serve.py')
+    parser.add_argument('--blas-threads', type=int, default=1, help='passed to serve.py')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    if args.url:
+        results.append({"workers": None, **measure(args.url.rstrip('/'), args)})
+    else:
+        for workers in args.workers:
+            url = f"http://127.0.0.1:{args.port}"
+            server = start_server(workers, args.port, args)
+            try:
+                wait_ready(url)
+                measure(url, args, duration=min(2.0, args.duration))  # warm up every worker
+                results.append({"workers": workers, **measure(url, args)})
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    base = results[0]['requests_per_s']
+    print(f"{'workers':>8s} {'req/s':>10s} {'frames/s':>10s} {'p50 ms':>8s} {'p99 ms':>8s} {'speedup':>8s}")
+    for r in results:
+        r['speedup'] = r['requests_per_s'] / base
+        print(f"{str(r['workers'] or '-'):>8s} {r['requests_per_s']:10.1f} {r['frames_per_s']:10.1f} "
+              f"{r['p50_ms']:8.2f} {r['p99_ms']:8.2f} {r['speedup']:8.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"cpus": os.cpu_count(), "batch": args.batch, "clients": args.clients,
+                       "concurrency": args.concurrency, "duration": args.duration,
+                       "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark for the backend.
+
+Each run starts a fresh Python interpreter (like a new uvicorn worker)
+and times the backend import steps plus the full `import main`, which
+includes model loading.
+
+Usage:
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+MODEL_DIR = os.path.join(ROOT, 'model')
+
+# Runs inside the child interpreter and prints one JSON line of timings (ms)
+_CHILD = r'''
+import json, sys, time
+sys.path.insert(0, {backend!r})
+sys.path.insert(0, {model!r})
+timings = {{}}
+start = time.perf_counter()
+def mark(name):
+    timings[name] = (time.perf_counter() - start) * 1000
+import numpy; mark('numpy')
+import pose_features; mark('pose_features')
+import rule_engine; mark('rule_engine')
+import predictor; mark('predictor')
+import fastapi, pydantic; mark('fastapi')
+import main; mark('main (incl. model load)')
+timings['model_loaded'] = main.model_data is not None
+print(json.dumps(timings))
+'''
+
+
+def run_once():
+    code = _CHILD.format(backend=BACKEND_DIR, model=MODEL_DIR)
+    out = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND_DIR,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    if args.json:
+        print(json.dumps(runs, indent=2))
+        return
+
+    print(f"Backend cold start over {args.runs} runs (cumulative ms since interpreter start):")
+    for step in runs[0]:
+        if step == 'model_loaded':
+            continue
+        values = [r[step] for r in runs]
+        print(f"  {step:28s} median {statistics.median(values):8.1f}   min {min(values):8.1f}")
+    print(f"  model loaded: {all(r['model_loaded'] for r in runs)}")
+
+
+if __name__ == '__main__':
+    main()
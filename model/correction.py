@@ -1,231 +1,185 @@
 import cv2
 import numpy as np
 import mediapipe as mp
-import pickle
-from collections import deque, Counter
+from collections import deque, namedtuple
 from typing import List, Tuple, Dict, Optional
 import time
 
-from yoga_pose_classifier import (
-    calculate_angle,
-    calculate_distance, 
-    extract_pose_features,
-    process_image
+from pose_features import (
+    extract_pose_features_batch,
+    landmarks_to_array
 )
-from pose_rules import POSE_CORRECTION_RULES
+from rule_engine import evaluate_rules
+from pose_session import PoseSession
+from motion_gate import MotionGate
+from model_artifact import load_model_data, default_model_path
+from pipeline import PosePipeline
+from overlay import PoseOverlay
+from detection_roi import DetectionRoi
 
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
+
+# Everything known about one analyzed frame, without any drawing:
+#   landmarks   (33, 4) array of normalized x, y, z, visibility, or None if
+#               no pose was detected
+#   timings     {'detect_ms', 'analyze_ms'} time spent in each step
+FrameResult = namedtuple('FrameResult', ['pose_name', 'confidence', 'corrections', 'status',
+                                         'landmarks', 'timings'])
 
 
 class RealtimePoseCorrector:
     def __init__(self, 
-                 model_path='svm_classifier.pkl',
+                 model_path='svm_classifier.npz',
                  smoothing_window=7,
                  min_confidence=0.70,
-                 min_hold_frames=10):
+                 min_hold_frames=10,
+                 model_complexity=1,
+                 min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5,
+                 roi_tracking=True,
+                 detection_max_side=640,
+                 motion_threshold=0.03,
+                 motion_refresh_every=15,
+                 headless=False,
+                 verbose=True):
         """
         Initialize the corrector.
         Args:
-            model_path: Path to trained SVM model pickle file
+            model_path: Model artifact (.npz, see model_artifact.py) or legacy pickle (.pkl)
             smoothing_window: Number of frames to average predictions (default: 7)
             min_confidence: Minimum confidence to accept prediction (default: 0.70)
             min_hold_frames: Frames needed before showing corrections (default: 10)
+            model_complexity: MediaPipe Pose model (0=lite, 1=full, 2=heavy; default: 1)
+            min_detection_confidence: MediaPipe person detection threshold (default: 0.5)
+            min_tracking_confidence: MediaPipe landmark tracking threshold (default: 0.5)
+            roi_tracking: give MediaPipe a crop around the previous frame's body
+                instead of the full frame (default: True; see detection_roi.py)
+            detection_max_side: scale the detector input down to at most this
+                many pixels on its longer side (default: 640; None = full resolution)
+            motion_threshold: reuse the last classification while the body moved
+                less than this many torso lengths since (default: 0.03; 0 = always
+                classify; see motion_gate.py)
+            motion_refresh_every: classify at least every this many frames (default: 15)
+            headless: never draw; process_frame() returns frames untouched and
+                analyze_frame() is the way to get results (default: False)
+            verbose: print model and settings info (default: True)
+        
+        The corrector owns a long-lived MediaPipe detector; call close() (or use
+        it as a context manager) when done.
         """
-        print("Loading model...")
-        with open(model_path, 'rb') as f:
-            data = pickle.load(f)
-            self.model = data['model']
-            self.scaler = data['scaler']
-            self.pose_names = data['pose_names']
-        
-        print(f"✓ Model loaded: {len(self.pose_names)} poses")
+        if verbose:
+            print("Loading model...")
+        data = load_model_data(model_path)
+        self.predictor = data['predictor']
+        self.pose_names = data['pose_names']
+        version = data['manifest']['version'] if data['manifest'] else 'pickle'
         
-        # Temporal smoothing
-        self.smoothing_window = smoothing_window
-        self.pose_history = deque(maxlen=smoothing_window)
-        self.confidence_history = deque(maxlen=smoothing_window)
+        if verbose:
+            print(f"✓ Model loaded: {len(self.pose_names)} poses (version {version})")
         
-        # Confidence filtering
-        self.min_confidence = min_confidence
+        # Temporal smoothing, confidence filtering and pose stability
+        self.session = PoseSession(smoothing_window, min_confidence, min_hold_frames)
         
-        # Pose stability
-        self.min_hold_frames = min_hold_frames
-        self.current_stable_pose = None
-        self.pose_hold_count = 0
+        # Skips the classifier while the pose is held still
+        self.gate = MotionGate(motion_threshold, motion_refresh_every)
         
         # Performance tracking
         self.fps_history = deque(maxlen=30)
         self.last_frame_time = time.time()
         
-        print(f"✓ Settings: {smoothing_window}-frame smoothing, {min_confidence:.0%} min confidence")
-        print()
+        # Video-mode MediaPipe detector, kept for the corrector's lifetime so the
+        # graph loads once and landmark tracking carries over between frames
+        self.model_complexity = model_complexity
+        self.pose_detector = mp_pose.Pose(
+            static_image_mode=False,      # Video mode (tracking)
+            model_complexity=model_complexity,
+            smooth_landmarks=True,         # Reduce jitter
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        
+        # Crop and downscale before detection
+        self.roi = DetectionRoi(max_side=detection_max_side, crop=roi_tracking)
+        
+        # Drawing layer; None when headless
+        self.overlay = None if headless else PoseOverlay()
+        
+        if verbose:
+            print(f"✓ Settings: {smoothing_window}-frame smoothing, {min_confidence:.0%} min confidence, "
+                  f"model complexity {model_complexity}")
+            print()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Release the MediaPipe detector. The corrector can't process frames afterwards."""
+        if self.pose_detector is not None:
+            self.pose_detector.close()
+            self.pose_detector = None
+    
+    def reset_tracking(self):
+        """
+        Drop MediaPipe's tracking state so the next frame runs full detection
+        (e.g. after a camera switch or when a different person steps in).
+        """
+        self.reset_detector()
+        self.gate.reset()
+    
+    def reset_detector(self):
+        """
+        The detection half of reset_tracking: MediaPipe's tracking and the
+        ROI. Touches only what detect_landmarks uses, so PosePipeline can
+        call it from its detect thread.
+        """
+        if self.pose_detector is not None:
+            self.pose_detector.reset()
+        self.roi.reset()
     
     def classify_pose(self, landmarks) -> Tuple[str, float]:
         """
         Classify pose from MediaPipe landmarks.
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: MediaPipe pose landmarks or (33, 4) array
             
         Returns:
             (pose_name, confidence)
         """
         # Extract features using your function
-        features = extract_pose_features(landmarks)
+        features = extract_pose_features_batch(landmarks_to_array(landmarks))
         
-        # Normalize
-        features_scaled = self.scaler.transform(features.reshape(1, -1))
+        # Normalize, predict and get confidence in a single pass
+        names, confidences = self.predictor.predict(features)
         
-        # Predict
-        pose_idx = self.model.predict(features_scaled)[0]
-        pose_name = self.pose_names[pose_idx]
-        
-        # Get confidence
-        probabilities = self.model.predict_proba(features_scaled)[0]
-        confidence = probabilities[pose_idx]
-        
-        return pose_name, confidence
-    
-    def get_smoothed_pose(self) -> Tuple[Optional[str], float]:
-        """
-        Get smoothed pose prediction from history buffer.
-        
-        Returns:
-            (smoothed_pose_name, average_confidence) or (None, 0.0)
-        """
-        if len(self.pose_history) < 3:
-            return None, 0.0
-        
-        # Count votes
-        pose_counts = Counter(self.pose_history)
-        most_common_pose, count = pose_counts.most_common(1)[0]
-        
-        # Must appear in >60% of frames
-        if count < len(self.pose_history) * 0.6:
-            return None, 0.0
-        
-        # Calculate average confidence for this pose
-        avg_confidence = np.mean([
-            conf for pose, conf in zip(self.pose_history, self.confidence_history)
-            if pose == most_common_pose
-        ])
-        
-        return most_common_pose, avg_confidence
+        return names[0], float(confidences[0])
     
     def check_corrections(self, landmarks, pose_name: str) -> List[str]:
         """
         Check pose against correction rules.
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: MediaPipe pose landmarks or (33, 4) array
             pose_name: Detected pose name
             
         Returns:
             List of correction messages
         """
-        corrections = []
+        violations = evaluate_rules(landmarks_to_array(landmarks), pose_name)[0]
         
         # Check if we have rules for this pose
-        if pose_name not in POSE_CORRECTION_RULES:
+        if violations is None:
             return ["Great form!"]
         
-        rules = POSE_CORRECTION_RULES[pose_name]
-        lm = landmarks.landmark
-        
-        # Check each rule
-        for check in rules['checks']:
-            feature = check['feature']
-            priority = check.get('priority', 'medium')
-            message = check['message']
-            
-            # KNEE ANGLES
-            if feature in ['left_knee_angle', 'right_knee_angle']:
-                if feature == 'left_knee_angle':
-                    angle = calculate_angle(
-                        lm[mp_pose.PoseLandmark.LEFT_HIP],
-                        lm[mp_pose.PoseLandmark.LEFT_KNEE],
-                        lm[mp_pose.PoseLandmark.LEFT_ANKLE]
-                    )
-                else:
-                    angle = calculate_angle(
-                        lm[mp_pose.PoseLandmark.RIGHT_HIP],
-                        lm[mp_pose.PoseLandmark.RIGHT_KNEE],
-                        lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-                    )
-                
-                ideal = check.get('ideal', 180)
-                tolerance = check.get('tolerance', 10)
-                
-                if abs(angle - ideal) > tolerance:
-                    corrections.append(f"{message} (now: {angle:.0f}°, target: {ideal}°)")
-            
-            # ELBOW ANGLES
-            elif feature in ['left_elbow_angle', 'right_elbow_angle']:
-                if feature == 'left_elbow_angle':
-                    angle = calculate_angle(
-                        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                        lm[mp_pose.PoseLandmark.LEFT_ELBOW],
-                        lm[mp_pose.PoseLandmark.LEFT_WRIST]
-                    )
-                else:
-                    angle = calculate_angle(
-                        lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-                        lm[mp_pose.PoseLandmark.RIGHT_ELBOW],
-                        lm[mp_pose.PoseLandmark.RIGHT_WRIST]
-                    )
-                
-                ideal = check.get('ideal', 180)
-                tolerance = check.get('tolerance', 15)
-                
-                if abs(angle - ideal) > tolerance:
-                    corrections.append(f"{message} (now: {angle:.0f}°, target: {ideal}°)")
-            
-            # SPINE ANGLE
-            elif feature == 'spine_angle':
-                spine = calculate_angle(
-                    lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                    lm[mp_pose.PoseLandmark.LEFT_HIP],
-                    lm[mp_pose.PoseLandmark.LEFT_KNEE]
-                )
-                
-                ideal = check.get('ideal', 170)
-                tolerance = check.get('tolerance', 15)
-                
-                if abs(spine - ideal) > tolerance:
-                    corrections.append(f"{message} (now: {spine:.0f}°, target: {ideal}°)")
-            
-            # SHOULDER LEVEL
-            elif feature == 'shoulder_level_diff':
-                diff = abs(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y - 
-                          lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y)
-                
-                threshold = check.get('tolerance', 0.03)
-                
-                if diff > threshold:
-                    corrections.append(message)
-            
-            # HIP LEVEL
-            elif feature == 'hip_level_diff':
-                diff = abs(lm[mp_pose.PoseLandmark.LEFT_HIP].y - 
-                          lm[mp_pose.PoseLandmark.RIGHT_HIP].y)
-                
-                threshold = check.get('tolerance', 0.03)
-                
-                if diff > threshold:
-                    corrections.append(message)
-            
-            # FOOT DISTANCE
-            elif feature == 'foot_distance':
-                dist = calculate_distance(
-                    lm[mp_pose.PoseLandmark.LEFT_ANKLE],
-                    lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-                )
-                
-                min_dist = check.get('min', 0.3)
-                
-                if dist < min_dist:
-                    corrections.append(message)
+        corrections = []
+        for v in violations:
+            if v.unit == 'deg':
+                corrections.append(f"{v.message} (now: {v.value:.0f}°, target: {v.ideal}°)")
+            else:
+                corrections.append(v.message)
         
         # If no corrections, pose is good!
         if not corrections:
@@ -241,6 +195,98 @@ class RealtimePoseCorrector:
         self.fps_history.append(fps)
         return np.mean(self.fps_history)
     
+    def detect_landmarks(self, frame):
+        """
+        Run MediaPipe on a BGR frame (cropped and scaled down by self.roi).
+        
+        Returns:
+            (33, 4) array of x, y, z, visibility normalized to the full frame,
+            or None if no pose was detected
+        """
+        if self.pose_detector is None:
+            raise RuntimeError("RealtimePoseCorrector is closed")
+        
+        image, window = self.roi.prepare(frame)
+        results = self.pose_detector.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        
+        points = None
+        if results.pose_landmarks is not None:
+            points = self.roi.to_frame(landmarks_to_array(results.pose_landmarks), window)
+        
+        # The detector tracks in its input's coordinates; a new window invalidates that
+        if self.roi.update(points):
+            self.pose_detector.reset()
+        return points
+    
+    def analyze_landmarks(self, landmarks):
+        """
+        Classify, smooth and check corrections for one frame's landmarks.
+        
+        Args:
+            landmarks: MediaPipe pose landmarks or (33, 4) array, None if no pose
+        
+        Returns:
+            (pose_name, corrections, confidence, status)
+        """
+        # No pose detected
+        if landmarks is None:
+            self.gate.reset()
+            return None, [], 0.0, None
+        
+        # Classification and rules both work on the array; convert once
+        landmarks = landmarks_to_array(landmarks)
+        
+        # Classify pose, unless the body has barely moved since the last time
+        classification = self.gate.check(landmarks)
+        if classification is None:
+            classification = self.classify_pose(landmarks)
+            self.gate.store(landmarks, classification)
+        raw_pose, raw_confidence = classification
+        
+        # Smooth over recent frames
+        state = self.session.update(raw_pose, raw_confidence)
+        
+        # Warming up
+        if state.state == 'detecting':
+            return state.pose_name, [], 0.0, state.status
+        
+        # Low confidence
+        if state.state == 'uncertain':
+            return state.pose_name, ["Move into clearer pose"], state.confidence, state.status
+        
+        # Not held long enough
+        if state.state == 'stabilizing':
+            return state.pose_name, [], state.confidence, state.status
+        
+        # Pose is stable - check corrections!
+        corrections = self.check_corrections(landmarks, state.pose_name)
+        return state.pose_name, corrections, state.confidence, state.status
+    
+    def analyze_frame(self, frame) -> FrameResult:
+        """
+        Detect, classify, smooth and check corrections for one BGR frame,
+        without drawing anything (frame is not modified).
+        
+        Returns:
+            FrameResult
+        """
+        started = time.perf_counter()
+        points = self.detect_landmarks(frame)
+        detected = time.perf_counter()
+        
+        pose_name, corrections, confidence, status = self.analyze_landmarks(points)
+        analyzed = time.perf_counter()
+        
+        timings = {'detect_ms': (detected - started) * 1000, 'analyze_ms': (analyzed - detected) * 1000}
+        return FrameResult(pose_name, confidence, corrections, status, points, timings)
+    
+    def render_frame(self, frame, landmarks, pose_name, corrections, confidence, fps, status):
+        """Draw the skeleton and information overlay onto frame (in place; no-op when headless)."""
+        if self.overlay is not None:
+            points = landmarks_to_array(landmarks) if landmarks is not None else None
+            self.overlay.draw(frame, FrameResult(pose_name, confidence, corrections, status, points, None), fps)
+        return frame
+    
     def process_frame(self, frame):
         """
         Process a single video frame.
@@ -249,142 +295,117 @@ class RealtimePoseCorrector:
             frame: OpenCV BGR image
             
         Returns:
-            annotated_frame: Frame with overlays
+            annotated_frame: Frame with overlays (untouched when headless)
             pose_name: Detected pose (or status message)
             corrections: List of corrections
             confidence: Confidence score
             fps: Current FPS
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        result = self.analyze_frame(frame)
+        fps = self.calculate_fps()
         
-        # Use video-optimized MediaPipe settings
-        with mp_pose.Pose(
-            static_image_mode=False,      # Video mode (tracking)
-            model_complexity=1,            # Balanced speed/accuracy
-            smooth_landmarks=True,         # Reduce jitter
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        ) as pose_detector:
-            
-            results = pose_detector.process(frame_rgb)
-            fps = self.calculate_fps()
-            
-            # No pose detected
-            if not results.pose_landmarks:
-                cv2.putText(frame, "No pose detected", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                cv2.putText(frame, f"FPS: {fps:.1f}", (10, 60),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                return frame, None, [], 0.0, fps
-            
-            # Draw skeleton
-            mp_drawing.draw_landmarks(
-                frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-            )
-            
-            # Classify pose
-            raw_pose, raw_confidence = self.classify_pose(results.pose_landmarks)
-            
-            # Add to history
-            self.pose_history.append(raw_pose)
-            self.confidence_history.append(raw_confidence)
-            
-            # Get smoothed prediction
-            smoothed_pose, avg_confidence = self.get_smoothed_pose()
-            
-            # Warming up
-            if smoothed_pose is None:
-                self._draw_info(frame, "Detecting...", [], 0.0, fps, 
-                              f"Buffer: {len(self.pose_history)}/{self.smoothing_window}")
-                return frame, "Detecting...", [], 0.0, fps
+        if self.overlay is not None:
+            self.overlay.draw(frame, result, fps)
+        
+        return frame, result.pose_name, result.corrections, result.confidence, fps
+
+
+def run_serial(corrector, cap):
+    """Capture, detect, classify and draw one frame at a time in a single loop."""
+    frame_count = 0
+    
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                print("Failed to grab frame")
+                break
             
-            # Low confidence
-            if avg_confidence < self.min_confidence:
-                self._draw_info(frame, "Uncertain", ["Move into clearer pose"], 
-                              avg_confidence, fps, "Low confidence")
-                return frame, "Uncertain", ["Move into clearer pose"], avg_confidence, fps
+            # Process frame
+            frame, pose, corrections, conf, fps = corrector.process_frame(frame)
+            frame_count += 1
             
-            # Check stability
-            if smoothed_pose == self.current_stable_pose:
-                self.pose_hold_count += 1
-            else:
-                self.current_stable_pose = smoothed_pose
-                self.pose_hold_count = 1
+            # Display
+            cv2.imshow('Yoga Pose Correction - Press Q to quit', frame)
             
-            # Not held long enough
-            if self.pose_hold_count < self.min_hold_frames:
-                status = f"Stabilizing ({self.pose_hold_count}/{self.min_hold_frames})"
-                self._draw_info(frame, smoothed_pose, [], avg_confidence, fps, status)
-                return frame, smoothed_pose, [], avg_confidence, fps
+            if not handle_key(corrector.reset_tracking, corrector.session.reset, frame, frame_count):
+                break
+    finally:
+        print_session_summary()
+        print(f"Total frames processed: {frame_count}")
+        if corrector.fps_history:
+            print(f"Average FPS: {np.mean(corrector.fps_history):.1f}")
+        print(f"Classifications skipped (no motion): {corrector.gate.stats()['skip_ratio']:.0%}")
+        print()
+
+
+def run_pipelined(corrector, cap, queue_size=1, report_every=5.0):
+    """Run each stage on its own thread (see pipeline.PosePipeline) and display here."""
+    frame_count = 0
+    last_report = time.time()
+    
+    pipeline = PosePipeline(corrector, cap, queue_size=queue_size).start()
+    try:
+        while pipeline.running:
+            packet = pipeline.get_frame(timeout=0.1)
+            if packet is None:
+                # Keep the window responsive while waiting for a frame
+                cv2.waitKey(1)
+                continue
+            frame_count += 1
             
-            # Pose is stable - check corrections!
-            corrections = self.check_corrections(results.pose_landmarks, smoothed_pose)
+            cv2.imshow('Yoga Pose Correction - Press Q to quit', packet.frame)
             
-            self._draw_info(frame, smoothed_pose, corrections, avg_confidence, fps, "✓ Locked")
+            if not handle_key(pipeline.reset_tracking, None, packet.frame, frame_count):
+                break
             
-            return frame, smoothed_pose, corrections, avg_confidence, fps
+            if time.time() - last_report >= report_every:
+                pipeline.print_report()
+                last_report = time.time()
+    finally:
+        pipeline.stop()
+        print_session_summary()
+        print(f"Total frames displayed: {frame_count}")
+        pipeline.print_report()
+        print(f"Classifications skipped (no motion): {corrector.gate.stats()['skip_ratio']:.0%}")
+        print()
+
+
+def print_session_summary():
+    print(f"\n{'='*60}")
+    print("SESSION COMPLETE")
+    print(f"{'='*60}")
+
+
+def handle_key(reset_tracking, reset_session, frame, frame_count) -> bool:
+    """Handle keyboard controls. Returns False when the user quits."""
+    key = cv2.waitKey(1) & 0xFF
     
-    def _draw_info(self, frame, pose_name, corrections, confidence, fps, status):
-        """Draw information overlay on frame."""
-        h, w = frame.shape[:2]
-        
-        # Semi-transparent background
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 220), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
-        
-        y = 30
-        
-        # Pose name
-        color = (0, 255, 0) if "✓" in status else (0, 255, 255)
-        cv2.putText(frame, f"Pose: {pose_name}", (10, y),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        y += 30
-        
-        # Confidence
-        if confidence > 0:
-            conf_color = (0, 255, 0) if confidence > 0.85 else (0, 255, 255)
-            cv2.putText(frame, f"Confidence: {confidence:.0%}", (10, y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, conf_color, 2)
-            y += 25
-        
-        # Status
-        status_color = (0, 255, 0) if "✓" in status else (255, 255, 0)
-        cv2.putText(frame, f"Status: {status}", (10, y),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, status_color, 1)
-        y += 30
-        
-        # Corrections
-        if corrections and "✓" in status:
-            cv2.putText(frame, "Feedback:", (10, y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            y += 25
-            
-            for i, correction in enumerate(corrections[:3]):  # Max 3
-                if '✅' in correction:
-                    text_color = (0, 255, 0)
-                    text = correction
-                else:
-                    text_color = (0, 200, 255)
-                    text = f"{i+1}. {correction}"
-                
-                cv2.putText(frame, text, (15, y),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.45, text_color, 1)
-                y += 22
-        
-        # FPS (top right)
-        fps_text = f"FPS: {fps:.1f}"
-        text_size = cv2.getTextSize(fps_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)[0]
-        cv2.putText(frame, fps_text, (w - text_size[0] - 10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    if key == ord('q'):
+        print("\nQuitting...")
+        return False
+    elif key == ord('s'):
+        filename = f'yoga_correction_{frame_count}.jpg'
+        cv2.imwrite(filename, frame)
+        print(f"📸 Screenshot saved: {filename}")
+    elif key == ord('r'):
+        reset_tracking()
+        if reset_session is not None:
+            reset_session()
+        print("🔄 Tracking reset")
+    return True
 
 
 def main():
     """Main function to run real-time pose correction."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Real-time yoga pose correction")
+    parser.add_argument('--pipelined', action='store_true',
+                        help='run capture/detect/classify/render on separate threads')
+    parser.add_argument('--queue-size', type=int, default=1,
+                        help='frames buffered between pipeline stages (default: 1)')
+    args = parser.parse_args()
+    
     print("\n" + "="*60)
     print("  REAL-TIME YOGA POSE CORRECTION")
     print("="*60)
@@ -392,9 +413,9 @@ def main():
     
     # Initialize corrector
     try:
-        corrector = RealtimePoseCorrector('svm_classifier.pkl')
+        corrector = RealtimePoseCorrector(default_model_path('.'))
     except FileNotFoundError:
-        print("Error: svm_classifier.pkl not found!")
+        print("Error: svm_classifier.npz / svm_classifier.pkl not found!")
         print("   Make sure the model file is in the same directory.")
         return
     
@@ -404,6 +425,7 @@ def main():
     
     if not cap.isOpened():
         print("Error: Could not open webcam")
+        corrector.close()
         return
     
     print("✓ Webcam opened")
@@ -411,51 +433,24 @@ def main():
     print("Controls:")
     print("  'q' - Quit")
     print("  's' - Save screenshot")
+    print("  'r' - Reset tracking")
     print()
-    print("Starting...\n")
-    
-    frame_count = 0
+    print("Starting" + (" (pipelined)" if args.pipelined else "") + "...\n")
     
     try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                print("Failed to grab frame")
-                break
-            
-            # Process frame
-            frame, pose, corrections, conf, fps = corrector.process_frame(frame)
-            frame_count += 1
-            
-            # Display
-            cv2.imshow('Yoga Pose Correction - Press Q to quit', frame)
-            
-            # Handle keys
-            key = cv2.waitKey(1) & 0xFF
-            
-            if key == ord('q'):
-                print("\nQuitting...")
-                break
-            elif key == ord('s'):
-                filename = f'yoga_correction_{frame_count}.jpg'
-                cv2.imwrite(filename, frame)
-                print(f"📸 Screenshot saved: {filename}")
+        if args.pipelined:
+            run_pipelined(corrector, cap, queue_size=args.queue_size)
+        else:
+            run_serial(corrector, cap)
     
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
     
     finally:
         cap.release()
+        corrector.close()
         cv2.destroyAllWindows()
-        
-        print(f"\n{'='*60}")
-        print("SESSION COMPLETE")
-        print(f"{'='*60}")
-        print(f"Total frames processed: {frame_count}")
-        if corrector.fps_history:
-            print(f"Average FPS: {np.mean(corrector.fps_history):.1f}")
-        print()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
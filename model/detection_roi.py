@@ -0,0 +1,142 @@
+"""
+Adaptive detector input: instead of the full camera frame, MediaPipe gets
+a crop around the body found in the previous frame, scaled down so its
+longer side is at most max_side pixels. Landmarks come back in the crop's
+coordinates and are mapped to full-frame coordinates here, so everything
+downstream (features, rules, drawing) is unchanged.
+
+MediaPipe only runs its models on small (~256 px) crops, but it first
+copies and transforms the whole input image, which on a high-resolution
+camera costs a good part of every frame.
+
+The crop window moves only when the body gets near its edge or takes up
+much less of it than it could (hysteresis): MediaPipe tracks the person
+between frames in the coordinates of its input image, so every window
+change resets the detector's tracking and the next frame runs full person
+detection. When no pose is found the whole (downscaled) frame is used.
+"""
+import cv2
+import numpy as np
+
+
+class DetectionRoi:
+    def __init__(self, max_side=640, margin=0.25, max_slack=3.0, crop=True):
+        """
+        Args:
+            max_side: longest side (pixels) of the image handed to the
+                detector; larger crops/frames are scaled down (None = never)
+            margin: padding around the body's bounding box, as a fraction
+                of the box's longer side
+            max_slack: a window is kept while its area is at most this many
+                times the padded body box
+            crop: crop to the tracked body (False = always the full frame,
+                only scaled down)
+        """
+        self.max_side = max_side
+        self.margin = margin
+        self.max_slack = max_slack
+        self.crop = crop
+
+        self.window = None          # (x0, y0, x1, y1) pixels, None = full frame
+        self.frame_size = None      # (w, h) the window belongs to
+        self.window_changes = 0
+
+    def reset(self):
+        """Back to the full frame (e.g. after a tracking reset)."""
+        self.window = None
+
+    def prepare(self, frame):
+        """
+        Crop and scale a BGR frame for the detector.
+
+        Returns:
+            (image, window): the detector input and the (x0, y0, x1, y1)
+            frame region it shows
+        """
+        h, w = frame.shape[:2]
+        if self.frame_size != (w, h):
+            # New camera or resolution: the old window means nothing
+            self.frame_size = (w, h)
+            self.window = None
+
+        window = self.window or (0, 0, w, h)
+        x0, y0, x1, y1 = window
+        image = frame[y0:y1, x0:x1]
+
+        longest = max(x1 - x0, y1 - y0)
+        if self.max_side and longest > self.max_side:
+            scale = self.max_side / longest
+            size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+            # Linear is enough for the detector and several times cheaper than INTER_AREA
+            image = cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+        return image, window
+
+    def to_frame(self, points, window):
+        """
+        Map landmarks from the detector image to full-frame coordinates.
+
+        Args:
+            points: (33, 4) array of x, y, z, visibility normalized to the
+                detector image (modified in place), or None
+            window: the window prepare() returned for that image
+
+        Returns:
+            points normalized to the full frame (z scaled like x), or None
+        """
+        if points is None:
+            return None
+        w, h = self.frame_size
+        x0, y0, x1, y1 = window
+        if (x0, y0, x1, y1) != (0, 0, w, h):
+            points[:, 0] = (x0 + points[:, 0] * (x1 - x0)) / w
+            points[:, 1] = (y0 + points[:, 1] * (y1 - y0)) / h
+            points[:, 2] *= (x1 - x0) / w
+        return points
+
+    def update(self, points) -> bool:
+        """
+        Pick the window for the next frame from this frame's full-frame landmarks.
+
+        Args:
+            points: (33, 4) full-frame landmarks, or None if no pose was found
+
+        Returns:
+            True if the window changed (the detector's tracking must be reset)
+        """
+        w, h = self.frame_size
+        if points is None or not self.crop:
+            window = None
+        else:
+            # Every landmark, visible or not: MediaPipe predicts hidden limbs
+            # too, and the whole body must stay inside the crop
+            xy = np.clip(points[:, :2] * (w, h), 0, (w, h))
+            (bx0, by0), (bx1, by1) = xy.min(axis=0), xy.max(axis=0)
+            pad = self.margin * max(bx1 - bx0, by1 - by0, 1.0)
+
+            current = self.window or (0, 0, w, h)
+            needed = self._clip((bx0 - pad, by0 - pad, bx1 + pad, by1 + pad))
+            inner = self._clip((bx0 - pad / 2, by0 - pad / 2, bx1 + pad / 2, by1 + pad / 2))
+            if _contains(current, inner) and _area(current) <= self.max_slack * _area(needed):
+                return False
+            window = needed if needed != (0, 0, w, h) else None
+
+        if window == self.window:
+            return False
+        self.window = window
+        self.window_changes += 1
+        return True
+
+    def _clip(self, box):
+        w, h = self.frame_size
+        x0, y0, x1, y1 = box
+        return (max(0, int(np.floor(x0))), max(0, int(np.floor(y0))),
+                min(w, int(np.ceil(x1))), min(h, int(np.ceil(y1))))
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[2] >= inner[2] and outer[3] >= inner[3])
+
+
+def _area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
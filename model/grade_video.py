@@ -0,0 +1,308 @@
+"""
+Offline grading of recorded videos: per-frame pose, confidence, status and
+corrections written to JSONL (or Parquet with pyarrow installed), as fast
+as the CPUs allow.
+
+Every video is split into chunks that are graded in parallel processes,
+each worker with its own MediaPipe detector and smoothing session. A chunk
+does not start cold: its worker seeks to a keyframe at least --warmup
+frames before the chunk and runs detector tracking and pose smoothing over
+those frames without emitting them, so results at chunk boundaries
+(nearly) match a single pass; MediaPipe's landmark filters do not end up
+bit-for-bit identical after a restart, which can flip a borderline
+frame. Seeking to a keyframe means the decoder does not have to decode
+and throw away the rest of a group of pictures. Only that seek point is
+keyframe-aligned: chunks themselves start every chunk_seconds * fps
+frames, wherever the keyframes fall.
+
+Output: one file per video in --output-dir, named after the video
+(videos that would share a name, e.g. a/class.mp4 and b/class.mp4, are
+refused; grade them into different directories), one record per frame:
+
+    frame, time (seconds), detected, pose, confidence, status, corrections
+
+Usage:
+    python grade_video.py class1.mp4 class2.mp4 [--output-dir graded]
+        [--format jsonl|parquet] [--workers N] [--chunk-seconds 60] [--warmup 30]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+import cv2
+
+from correction import RealtimePoseCorrector
+from model_artifact import default_model_path
+
+# One unit of work: grade frames [start, end) of video (end None = to the end),
+# decoding from frame seek (a keyframe before start, for warm-up)
+Chunk = namedtuple('Chunk', ['video', 'index', 'seek', 'start', 'end'])
+
+# Per-process corrector, built by _init_grading_worker
+_corrector = None
+
+
+# ==================== PLANNING ====================
+
+def list_keyframes(path):
+    """
+    Frame indices of the video's keyframes, read from the container without
+    decoding (empty if the backend can't report them).
+    """
+    cap = cv2.VideoCapture(path)
+    keyframes = []
+    try:
+        if not cap.set(cv2.CAP_PROP_FORMAT, -1):  # raw packets, no decoding
+            return keyframes
+        index = 0
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(index)
+            index += 1
+    finally:
+        cap.release()
+    return keyframes
+
+
+def plan_chunks(path, chunk_seconds, warmup):
+    """
+    Split a video into chunks of about chunk_seconds each.
+
+    Returns:
+        (chunks, fps, frame_count)
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    chunk_frames = int(round(chunk_seconds * fps))
+
+    # Unknown length (some streams): one chunk read to the end
+    if frame_count <= 0 or chunk_frames <= 0:
+        return [Chunk(path, 0, 0, 0, None)], fps, frame_count
+
+    starts = list(range(0, frame_count, chunk_frames))
+    keyframes = list_keyframes(path) if len(starts) > 1 else []
+    chunks = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else None
+        seek = max(0, start - warmup)
+        if keyframes and seek > 0:
+            # Latest keyframe at or before the warm-up start
+            k = bisect_right(keyframes, seek)
+            seek = keyframes[k - 1] if k else 0
+        chunks.append(Chunk(path, i, seek, start, end))
+    return chunks, fps, frame_count
+
+
+def output_paths(videos, output_dir, fmt):
+    """
+    output_dir/<video name>.<fmt> per video.
+
+    Raises:
+        ValueError: if two videos would write the same file
+    """
+    outputs, sources = {}, {}
+    for video in videos:
+        name = os.path.splitext(os.path.basename(video))[0]
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        if path in sources:
+            raise ValueError(f"{sources[path]} and {video} would both be written to {path}; "
+                             f"grade them into different output directories")
+        sources[path] = video
+        outputs[video] = path
+    return outputs
+
+
+# ==================== GRADING ====================
+
+def _init_grading_worker(corrector_kwargs):
+    """Pool initializer: one headless corrector (model + detector) per
+    process; OpenCV single-threaded so workers don't oversubscribe the cores."""
+    global _corrector
+    cv2.setNumThreads(1)
+    _corrector = RealtimePoseCorrector(headless=True, verbose=False, **corrector_kwargs)
+
+
+def grade_chunk(chunk):
+    """
+    Grade one chunk (runs in a worker).
+
+    Returns:
+        (chunk, records, frames_decoded)
+    """
+    corrector = _corrector
+    # Fresh tracking and smoothing: the warm-up frames rebuild both
+    corrector.reset_tracking()
+    corrector.session.reset()
+
+    cap = cv2.VideoCapture(chunk.video)
+    if chunk.seek > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, chunk.seek)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    records = []
+    index = chunk.seek
+    try:
+        while chunk.end is None or index < chunk.end:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            result = corrector.analyze_frame(frame)
+            if index >= chunk.start:
+                records.append({
+                    "frame": index,
+                    "time": round(index / fps, 3),
+                    "detected": result.landmarks is not None,
+                    "pose": result.pose_name,
+                    "confidence": round(float(result.confidence), 4),
+                    "status": result.status,
+                    "corrections": result.corrections,
+                })
+            index += 1
+    finally:
+        cap.release()
+    return chunk, records, index - chunk.seek
+
+
+# ==================== OUTPUT ====================
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        self.file.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One row group per chunk. Needs pyarrow."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.schema = pa.schema([
+            ('frame', pa.int64()), ('time', pa.float64()), ('detected', pa.bool_()),
+            ('pose', pa.string()), ('confidence', pa.float64()), ('status', pa.string()),
+            ('corrections', pa.list_(pa.string())),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records):
+        if records:
+            self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def grade_videos(videos, output_dir, fmt='jsonl', workers=None, chunk_seconds=60.0,
+                 warmup=30, corrector_kwargs=None, progress_every=10.0):
+    """
+    Grade videos into output_dir/<video name>.<fmt>.
+
+    Chunks from all videos share one pool; results are written in frame
+    order as they complete, so memory holds only chunks waiting for an
+    earlier one.
+
+    Returns:
+        list of output paths
+
+    Raises:
+        ValueError: if two videos share a name (see output_paths) or a
+            video can't be opened
+    """
+    corrector_kwargs = corrector_kwargs or {}
+    outputs = output_paths(videos, output_dir, fmt)
+    os.makedirs(output_dir, exist_ok=True)
+
+    chunks, total_frames = [], 0
+    for video in videos:
+        video_chunks, fps, frame_count = plan_chunks(video, chunk_seconds, warmup)
+        chunks.extend(video_chunks)
+        total_frames += max(frame_count, 0)
+        print(f"{video}: {frame_count} frames at {fps:.1f} fps, {len(video_chunks)} chunk(s)")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    pool = None
+    if workers == 1:
+        _init_grading_worker(corrector_kwargs)
+        results_iter = map(grade_chunk, chunks)
+    else:
+        # spawn rather than fork: a forked child would inherit MediaPipe's
+        # graph threads from the parent
+        pool = multiprocessing.get_context('spawn').Pool(
+            workers, initializer=_init_grading_worker, initargs=(corrector_kwargs,))
+        results_iter = pool.imap(grade_chunk, chunks)
+
+    writers = {}
+    graded = decoded = 0
+    start = last_report = time.time()
+    try:
+        for chunk, records, frames_decoded in results_iter:
+            writer = writers.get(chunk.video)
+            if writer is None:
+                writer = writers[chunk.video] = WRITERS[fmt](outputs[chunk.video])
+            writer.write(records)
+            if chunk.end is None:
+                writers.pop(chunk.video).close()
+
+            graded += len(records)
+            decoded += frames_decoded
+            now = time.time()
+            if now - last_report >= progress_every:
+                print(f"   [{graded}/{total_frames}] {graded / (now - start):.1f} frames/s")
+                last_report = now
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start
+    print(f"Graded {graded} frames in {elapsed:.1f}s ({graded / max(elapsed, 1e-9):.1f} frames/s, "
+          f"{workers} worker(s), {decoded - graded} warm-up frames)")
+    return [outputs[video] for video in videos]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade recorded yoga videos frame by frame")
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--output-dir', default='graded')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='jsonl')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all CPUs)')
+    parser.add_argument('--chunk-seconds', type=float, default=60.0,
+                        help='video length per chunk (0 = one chunk per video)')
+    parser.add_argument('--warmup', type=int, default=30,
+                        help='frames decoded before each chunk to warm up tracking and smoothing')
+    parser.add_argument('--model', default=default_model_path(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    args = parser.parse_args()
+
+    grade_videos(args.videos, args.output_dir, fmt=args.format, workers=args.workers,
+                 chunk_seconds=args.chunk_seconds, warmup=args.warmup,
+                 corrector_kwargs=dict(model_path=args.model, model_complexity=args.model_complexity))
+
+
+if __name__ == '__main__':
+    main()
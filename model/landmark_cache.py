@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from pose_features import NUM_LANDMARKS
+
+CACHE_VERSION = 1
+_ROW_SHAPE = (NUM_LANDMARKS, 4)
+# MediaPipe produces float32 landmarks, so float32 storage is lossless
+_DTYPE = np.dtype('<f4')
+_ROW_BYTES = int(np.prod(_ROW_SHAPE)) * _DTYPE.itemsize
+# Index value for images where MediaPipe found no pose (cached too, so they
+# are not re-run either)
+NO_POSE = -1
+
+
+def hash_file(path, block_size=1 << 20) -> str:
+    """SHA-256 of a file's content (hex)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_key(settings: Dict) -> str:
+    """Short, stable key for a detector settings dict."""
+    blob = json.dumps(settings, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class LandmarkCache:
+    """
+    On-disk cache of raw MediaPipe landmarks, keyed by image content hash.
+
+    Each set of detector settings gets its own directory:
+
+        <cache_dir>/<settings_key>/landmarks.f32   rows of (33, 4) float32
+        <cache_dir>/<settings_key>/index.json      {sha256: row or -1}
+
+    Rows are only ever appended and read back through np.memmap, so a
+    cache of any size opens instantly and only the rows you touch are
+    paged in. New entries are buffered by put() and written by flush(),
+    which put() also calls every flush_every entries so a long extraction
+    that is interrupted keeps most of its work without rewriting the index
+    per image; landmarks are appended before the index is replaced, so an
+    interrupted flush never leaves the index pointing at missing data.
+    """
+
+    def __init__(self, cache_dir, settings: Dict, flush_every=256):
+        """
+        Args:
+            cache_dir: root cache directory (created if missing)
+            settings: detector settings that affect landmarks (model
+                complexity, thresholds, library version, ...)
+            flush_every: buffered entries that trigger a flush in put()
+        """
+        self.settings = dict(settings)
+        self.flush_every = flush_every
+        self.path = os.path.join(cache_dir, settings_key(self.settings))
+        self.data_path = os.path.join(self.path, 'landmarks.f32')
+        self.index_path = os.path.join(self.path, 'index.json')
+        os.makedirs(self.path, exist_ok=True)
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                stored = json.load(f)
+            if stored.get('version') == CACHE_VERSION:
+                self.index = stored['entries']
+
+        self._pending = {}
+        self._data = None
+
+    def __len__(self):
+        return len(self.index) + len(self._pending)
+
+    def __contains__(self, digest):
+        return digest in self.index or digest in self._pending
+
+    def _rows(self) -> np.ndarray:
+        if self._data is None:
+            n_rows = os.path.getsize(self.data_path) // _ROW_BYTES if os.path.exists(self.data_path) else 0
+            if n_rows == 0:
+                self._data = np.empty((0,) + _ROW_SHAPE, dtype=_DTYPE)
+            else:
+                self._data = np.memmap(self.data_path, dtype=_DTYPE, mode='r',
+                                       shape=(n_rows,) + _ROW_SHAPE)
+        return self._data
+
+    def get(self, digest) -> Optional[np.ndarray]:
+        """
+        Returns:
+            (33, 4) float64 landmarks, or None if the image had no pose
+
+        Raises:
+            KeyError: if the image is not cached
+        """
+        if digest in self._pending:
+            return self._pending[digest]
+        row = self.index[digest]
+        if row == NO_POSE:
+            return None
+        return self._rows()[row].astype(np.float64)
+
+    def put(self, digest, points: Optional[np.ndarray]):
+        """
+        Buffer an extraction result (None = no pose); written on flush(),
+        or right away once flush_every results are buffered.
+        """
+        if points is not None:
+            points = np.asarray(points, dtype=_DTYPE).reshape(_ROW_SHAPE).astype(np.float64)
+        self._pending[digest] = points
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append buffered landmarks and rewrite the index atomically."""
+        if not self._pending:
+            return
+
+        rows = [(d, p) for d, p in self._pending.items() if p is not None]
+        with open(self.data_path, 'ab') as f:
+            size = f.tell()
+            if size % _ROW_BYTES:
+                # Drop a partial row left by an interrupted flush
+                size -= size % _ROW_BYTES
+                f.truncate(size)
+            first_row = size // _ROW_BYTES
+            if rows:
+                f.write(np.stack([p for _, p in rows]).astype(_DTYPE).tobytes())
+
+        for digest, points in self._pending.items():
+            self.index[digest] = NO_POSE
+        for offset, (digest, _) in enumerate(rows):
+            self.index[digest] = first_row + offset
+
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'settings': self.settings,
+                       'entries': self.index}, f)
+        os.replace(tmp_path, self.index_path)
+
+        self._pending = {}
+        self._data = None
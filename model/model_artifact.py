@@ -0,0 +1,344 @@
+"""
+Versioned model artifact: a fast-loading, pickle-free alternative to
+svm_classifier.pkl.
+
+An artifact is an uncompressed zip file (np.load reads it like an .npz)
+holding:
+
+    manifest.json   format version, model version, feature count and order,
+                    pose names, kernel parameters, array dtypes/shapes, a
+                    SHA-256 checksum over all arrays and the SHA-256 of the
+                    pickle it was exported from
+    <name>.npy      the classifier kernel arrays (see predictor.py) and the
+                    scaler mean/scale
+
+Every array is stored uncompressed at a 64-byte aligned offset, so
+load_artifact memory-maps the file once and takes each array as a view
+into it instead of reading or unpickling anything. Loading does not need
+sklearn, and worker processes that load the same file share its read-only
+pages. An artifact holds no pickled objects, so loading one cannot run
+code; load_model_data still unpickles legacy .pkl files, which should only
+come from a trusted source.
+
+The checksum is verified by the inspect and export commands;
+load_model_data skips it unless asked (verify=True), so loading stays a
+memory map without a pass over every array.
+
+Usage:
+    python model_artifact.py export svm_classifier.pkl svm_classifier.npz [--version 1.0]
+    python model_artifact.py inspect svm_classifier.npz
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap as _mmap
+import os
+import pickle
+import struct
+import time
+import warnings
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+
+from pose_features import FEATURE_NAMES, NUM_FEATURES
+from predictor import PosePredictor, KERNELS, export_kernel
+
+FORMAT = 'yoga-pose-model'
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# Array data offsets are padded to this (matches the .npy header alignment)
+ALIGNMENT = 64
+# Zip extra field id used for the padding (same as Android's zipalign)
+_PADDING_FIELD = 0xD935
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+ModelArtifact = namedtuple('ModelArtifact', ['manifest', 'arrays'])
+
+
+class ArtifactError(ValueError):
+    """The file is not a usable model artifact (format, checksum or features)."""
+
+
+def _checksum(arrays):
+    """SHA-256 over every array's name, dtype, shape and data, in name order."""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape};".encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+# ==================== EXPORT ====================
+
+def _write_aligned(zf, name, data):
+    """Add a stored (uncompressed) member whose data starts on an ALIGNMENT boundary."""
+    offset = zf.fp.tell()
+    header_len = _LOCAL_HEADER.size + len(name.encode()) + 4
+    pad = -(offset + header_len) % ALIGNMENT
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    info.extra = struct.pack('<HH', _PADDING_FIELD, pad) + b'\0' * pad
+    zf.writestr(info, data)
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def export_artifact(model_data, path, version=None, source_sha256=None):
+    """
+    Write a trained model as a versioned artifact.
+
+    Args:
+        model_data: {'model', 'scaler', 'pose_names'} dict (as stored in the pickle)
+        path: output file (written to a temp file, then renamed into place)
+        version: model version string (default: date plus checksum prefix)
+        source_sha256: SHA-256 of the pickle model_data came from, recorded
+            so default_model_path can tell when the artifact is out of date
+
+    Returns:
+        manifest dict
+    """
+    model, scaler = model_data['model'], model_data['scaler']
+    kernel = export_kernel(model)
+    if kernel is None:
+        raise ArtifactError(f"Cannot export {type(model).__name__}: only SVC (probability=True) "
+                            "and RandomForestClassifier are supported")
+    if not hasattr(scaler, 'scale_'):
+        raise ArtifactError(f"Cannot export {type(scaler).__name__}: only StandardScaler is supported")
+    n_features = len(scaler.scale_)
+    if n_features != NUM_FEATURES:
+        raise ArtifactError(f"Model was trained on {n_features} features, expected {NUM_FEATURES}")
+
+    kernel_arrays, params = kernel.to_arrays()
+    arrays = {f"kernel.{name}": value for name, value in kernel_arrays.items()}
+    arrays['scaler.mean'] = scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(n_features)
+    arrays['scaler.scale'] = scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(n_features)
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+
+    checksum = _checksum(arrays)
+    manifest = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "version": version or f"{time.strftime('%Y%m%d')}-{checksum[:8]}",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "model_type": type(model).__name__,
+        "kernel": type(kernel).__name__,
+        "kernel_params": params,
+        "n_features": n_features,
+        "feature_names": list(FEATURE_NAMES),
+        "pose_names": list(model_data['pose_names']),
+        "arrays": {name: {"dtype": value.dtype.str, "shape": list(value.shape)}
+                   for name, value in arrays.items()},
+        "checksum": checksum,
+    }
+    if source_sha256:
+        manifest["source_sha256"] = source_sha256
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+            for name, value in arrays.items():
+                _write_aligned(zf, f"{name}.npy", _npy_bytes(value))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest
+
+
+# ==================== LOAD ====================
+
+def _data_offset(buffer, path, info):
+    """Offset of a stored .npy member's array data within the file."""
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ArtifactError(f"{path}: {info.filename} is compressed")
+    header = _LOCAL_HEADER.unpack_from(buffer, info.header_offset)
+    if header[0] != b'PK\x03\x04':
+        raise ArtifactError(f"{path}: bad zip header for {info.filename}")
+    start = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+
+    # .npy preamble: magic, version, then the header length (2 bytes in v1, 4 after)
+    if buffer[start:start + 6] != b'\x93NUMPY':
+        raise ArtifactError(f"{path}: {info.filename} is not an .npy array")
+    if buffer[start + 6] == 1:
+        return start + 10 + struct.unpack_from('<H', buffer, start + 8)[0]
+    return start + 12 + struct.unpack_from('<I', buffer, start + 8)[0]
+
+
+def load_artifact(path, mmap=True, verify=True):
+    """
+    Args:
+        path: artifact file
+        mmap: memory-map the file (arrays are read-only views into it)
+            instead of reading it into memory
+        verify: check the manifest checksum against the array data
+
+    Returns:
+        ModelArtifact(manifest, arrays)
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+            if manifest.get('format') != FORMAT:
+                raise ArtifactError(f"{path}: not a {FORMAT} artifact")
+            if manifest.get('format_version') != FORMAT_VERSION:
+                raise ArtifactError(f"{path}: unsupported format version {manifest.get('format_version')}")
+            members = {name: zf.getinfo(f"{name}.npy") for name in manifest['arrays']}
+
+            with open(path, 'rb') as f:
+                if mmap:
+                    buffer = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+                else:
+                    buffer = f.read()
+
+            # dtype and shape come from the manifest; the .npy headers are
+            # only there for np.load
+            arrays = {}
+            for name, spec in manifest['arrays'].items():
+                dtype = np.dtype(spec['dtype'])
+                if dtype.hasobject:
+                    raise ArtifactError(f"{path}: {name} holds Python objects")
+                count = int(np.prod(spec['shape']))
+                offset = _data_offset(buffer, path, members[name])
+                if offset + count * dtype.itemsize > len(buffer):
+                    raise ArtifactError(f"{path}: {name} is truncated")
+                arrays[name] = np.frombuffer(buffer, dtype, count, offset).reshape(spec['shape'])
+    except (zipfile.BadZipFile, KeyError, TypeError, json.JSONDecodeError, struct.error) as e:
+        raise ArtifactError(f"{path}: invalid artifact ({e})") from e
+
+    if verify and _checksum(arrays) != manifest['checksum']:
+        raise ArtifactError(f"{path}: checksum mismatch")
+    return ModelArtifact(manifest, arrays)
+
+
+def predictor_from_artifact(artifact):
+    """Build a PosePredictor, checking the artifact's features match pose_features."""
+    manifest, arrays = artifact
+    if manifest['n_features'] != NUM_FEATURES or tuple(manifest['feature_names']) != FEATURE_NAMES:
+        raise ArtifactError(f"Model {manifest['version']} expects features {manifest['feature_names']}, "
+                            f"this code extracts {list(FEATURE_NAMES)}")
+    kernel_cls = KERNELS.get(manifest['kernel'])
+    if kernel_cls is None:
+        raise ArtifactError(f"Unknown kernel '{manifest['kernel']}'")
+
+    kernel_arrays = {name[len('kernel.'):]: value for name, value in arrays.items()
+                     if name.startswith('kernel.')}
+    kernel = kernel_cls.from_arrays(kernel_arrays, manifest['kernel_params'])
+    return PosePredictor.from_kernel(kernel, arrays['scaler.mean'], arrays['scaler.scale'],
+                                     manifest['pose_names'])
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_manifest(path):
+    """The manifest of an artifact, without touching its arrays."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return json.loads(zf.read(MANIFEST_NAME))
+    except (zipfile.BadZipFile, KeyError, json.JSONDecodeError) as e:
+        raise ArtifactError(f"{path}: invalid artifact ({e})") from e
+
+
+def default_model_path(model_dir):
+    """
+    The artifact (svm_classifier.npz) if present, else the legacy pickle.
+
+    Warns when the artifact was exported from a different pickle than the
+    svm_classifier.pkl next to it (a retrained model that was not exported
+    yet). File times can't tell: a fresh checkout writes both at once.
+    """
+    artifact_path = os.path.join(model_dir, 'svm_classifier.npz')
+    pickle_path = os.path.join(model_dir, 'svm_classifier.pkl')
+    if os.path.exists(artifact_path):
+        source = read_manifest(artifact_path).get('source_sha256')
+        if source and os.path.exists(pickle_path) and _file_sha256(pickle_path) != source:
+            warnings.warn(f"{artifact_path} was not exported from the current {pickle_path}; "
+                          f"serving the artifact. Re-export it with: python model_artifact.py "
+                          f"export svm_classifier.pkl svm_classifier.npz", stacklevel=2)
+        return artifact_path
+    return pickle_path
+
+
+def load_model_data(path, verify=False):
+    """
+    Load a model from an artifact (.npz) or a legacy pickle.
+
+    Args:
+        path: .npz artifact or .pkl pickle (only load pickles you trust)
+        verify: check the artifact's checksum (hashes every array)
+
+    Returns:
+        dict with 'predictor', 'pose_names' and 'manifest' (None for pickles;
+        pickles also keep 'model' and 'scaler')
+    """
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        data['predictor'] = PosePredictor.from_model_data(data)
+        data['manifest'] = None
+        return data
+
+    artifact = load_artifact(path, verify=verify)
+    predictor = predictor_from_artifact(artifact)
+    return {"predictor": predictor, "pose_names": predictor.pose_names, "manifest": artifact.manifest}
+
+
+# ==================== CLI ====================
+
+def _check_export(model_data, path, n=500):
+    """Compare the exported artifact against the pickled model on random inputs."""
+    reference = PosePredictor.from_model_data(model_data)
+    exported = predictor_from_artifact(load_artifact(path))
+    rng = np.random.default_rng(0)
+    features = reference._mean + rng.normal(0, 1, (n, NUM_FEATURES)) * reference._scale
+    names_a, conf_a = reference.predict(features)
+    names_b, conf_b = exported.predict(features)
+    return names_a == names_b and np.array_equal(conf_a, conf_b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and inspect versioned model artifacts")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='convert a model pickle into an artifact')
+    export.add_argument('pickle_path')
+    export.add_argument('artifact_path')
+    export.add_argument('--version', help='model version (default: date plus checksum)')
+    inspect = commands.add_parser('inspect', help='verify an artifact and print its manifest')
+    inspect.add_argument('artifact_path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        with open(args.pickle_path, 'rb') as f:
+            model_data = pickle.load(f)
+        manifest = export_artifact(model_data, args.artifact_path, version=args.version,
+                                   source_sha256=_file_sha256(args.pickle_path))
+        print(f"✓ Exported {manifest['model_type']} ({len(manifest['pose_names'])} poses, "
+              f"{manifest['n_features']} features) as version {manifest['version']}")
+        if not _check_export(model_data, args.artifact_path):
+            raise SystemExit("Exported artifact does not reproduce the pickled model's predictions")
+        print("✓ Predictions match the pickled model")
+    else:
+        start = time.perf_counter()
+        artifact = load_artifact(args.artifact_path)
+        predictor_from_artifact(artifact)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        manifest = dict(artifact.manifest)
+        manifest.pop('arrays')
+        print(json.dumps(manifest, indent=2))
+        print(f"✓ Checksum verified, loaded in {elapsed_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from pose_features import FEATURE_LANDMARKS, PoseLandmark as _L
+
+_SHOULDERS = [_L.LEFT_SHOULDER, _L.RIGHT_SHOULDER]
+_HIPS = [_L.LEFT_HIP, _L.RIGHT_HIP]
+
+
+class MotionGate:
+    """
+    Skips reclassifying a practitioner who holds still.
+
+    Each frame's motion is the mean (x, y) displacement of the landmarks
+    the classifier reads, measured against the last frame that was
+    actually classified and divided by that frame's torso length (hip
+    center to shoulder center), so it doesn't depend on how far the person
+    stands from the camera. Measuring against the last classified frame,
+    not the previous one, means slow drift still adds up to a
+    reclassification. Below threshold the previous classification is
+    reused; every refresh_every-th frame is classified regardless.
+
+    Only the classification is reused. Callers still run the correction
+    rules on the new landmarks. Shared by RealtimePoseCorrector and the
+    backend (one gate per session); __slots__ keeps it small enough to hold
+    one per session.
+    """
+
+    __slots__ = ('threshold', 'refresh_every', 'reference', 'classification', 'tag',
+                 'since_refresh', 'frames', 'reused')
+
+    def __init__(self, threshold=0.03, refresh_every=15):
+        """
+        Args:
+            threshold: motion (torso lengths) below which the last classification
+                is reused (0 disables the gate)
+            refresh_every: classify at least once every this many frames
+                (1 disables the gate)
+        """
+        self.threshold = threshold
+        self.refresh_every = refresh_every
+        self.frames = 0
+        self.reused = 0
+        self.reset()
+
+    @classmethod
+    def from_env(cls):
+        """Build from MOTION_GATE_THRESHOLD / MOTION_GATE_REFRESH."""
+        return cls(
+            threshold=float(os.environ.get('MOTION_GATE_THRESHOLD', 0.03)),
+            refresh_every=int(os.environ.get('MOTION_GATE_REFRESH', 15)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.refresh_every > 1
+
+    def reset(self):
+        """Forget the reference frame (the counters are kept)."""
+        self.reference = None
+        self.classification = None
+        self.tag = None
+        self.since_refresh = 0
+
+    def motion(self, points) -> float:
+        """
+        Motion of a (33, 4) frame since the last classified one, in torso
+        lengths (inf without a reference frame).
+        """
+        if self.reference is None:
+            return float('inf')
+        reference, torso = self.reference
+        displacement = points[FEATURE_LANDMARKS, :2] - reference
+        return float(np.sqrt((displacement ** 2).sum(axis=1)).mean() / torso)
+
+    def check(self, points, tag=None) -> Optional[Tuple[str, float]]:
+        """
+        Count one frame and decide whether it needs classifying.
+
+        Args:
+            points: (33, 4) landmark array
+            tag: identifies what produced the stored classification (e.g. the
+                model id); a stored classification with another tag is not reused
+
+        Returns:
+            the last (pose_name, confidence) to reuse, or None if the frame must
+            be classified (then pass the result to store())
+        """
+        self.frames += 1
+        if (not self.enabled or self.classification is None or tag != self.tag
+                or self.since_refresh + 1 >= self.refresh_every
+                or self.motion(points) >= self.threshold):
+            return None
+        self.since_refresh += 1
+        self.reused += 1
+        return self.classification
+
+    def store(self, points, classification, tag=None):
+        """Make a freshly classified frame the new reference."""
+        xy = points[:, :2]
+        torso = np.linalg.norm(xy[_HIPS].mean(axis=0) - xy[_SHOULDERS].mean(axis=0))
+        self.reference = (xy[FEATURE_LANDMARKS].copy(), max(float(torso), 1e-6))
+        self.classification = classification
+        self.tag = tag
+        self.since_refresh = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "reused": self.reused,
+            "skip_ratio": round(self.reused / self.frames, 4) if self.frames else 0.0,
+            "threshold": self.threshold,
+            "refresh_every": self.refresh_every,
+        }
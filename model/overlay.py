@@ -0,0 +1,129 @@
+"""
+Drawing layer for RealtimePoseCorrector: skeleton and information overlay
+on top of a video frame.
+
+Kept apart from the corrector so headless deployments (offline grading,
+servers) never create it and pay nothing for drawing; the corrector's
+analyze_frame() result carries everything needed to draw a frame here.
+
+The banner is darkened in place instead of blending a full-frame copy,
+which is what made drawing expensive on large (e.g. 1080p) frames.
+"""
+import cv2
+import mediapipe as mp
+import numpy as np
+
+# (start, end) landmark index pairs of the MediaPipe Pose skeleton
+POSE_CONNECTIONS = np.array(sorted(mp.solutions.pose.POSE_CONNECTIONS), dtype=np.intp)
+
+# Landmarks below this visibility are not drawn (as in mediapipe's drawing_utils)
+VISIBILITY_THRESHOLD = 0.5
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Banner behind the text: rows [0, BANNER_HEIGHT) keep this share of their
+# brightness (221 rows: the old full-frame rectangle to y=220 was inclusive)
+BANNER_HEIGHT = 221
+BANNER_ALPHA = 0.7
+
+
+class PoseOverlay:
+    """Draws a FrameResult (see correction.py) onto a BGR frame, in place."""
+
+    def __init__(self,
+                 landmark_color=(0, 255, 0),
+                 connection_color=(0, 0, 255),
+                 thickness=2,
+                 circle_radius=2):
+        self.landmark_color = landmark_color
+        self.connection_color = connection_color
+        self.thickness = thickness
+        self.circle_radius = circle_radius
+
+    def draw(self, frame, result, fps):
+        """
+        Args:
+            frame: BGR image, drawn on in place
+            result: FrameResult of this frame
+            fps: frame rate shown in the corner
+
+        Returns:
+            frame
+        """
+        if result.landmarks is None:
+            cv2.putText(frame, "No pose detected", (10, 30), FONT, 0.8, (0, 0, 255), 2)
+            cv2.putText(frame, f"FPS: {fps:.1f}", (10, 60), FONT, 0.6, (255, 255, 255), 2)
+            return frame
+
+        self.draw_skeleton(frame, result.landmarks)
+        self.draw_info(frame, result.pose_name, result.corrections, result.confidence,
+                       fps, result.status)
+        return frame
+
+    def draw_skeleton(self, frame, points):
+        """
+        Draw connections and landmarks of a (33, 4) array of normalized
+        x, y, z, visibility. Landmarks that are not visible or lie outside the
+        frame are skipped, together with their connections.
+        """
+        h, w = frame.shape[:2]
+        xy = points[:, :2]
+        shown = (points[:, 3] >= VISIBILITY_THRESHOLD) & np.all((xy >= 0) & (xy <= 1), axis=1)
+        px = np.minimum(np.floor(xy * (w, h)), (w - 1, h - 1)).astype(int)
+
+        for start, end in POSE_CONNECTIONS:
+            if shown[start] and shown[end]:
+                cv2.line(frame, tuple(px[start]), tuple(px[end]),
+                         self.connection_color, self.thickness)
+
+        border_radius = max(self.circle_radius + 1, int(self.circle_radius * 1.2))
+        for x, y in px[shown]:
+            cv2.circle(frame, (x, y), border_radius, (224, 224, 224), self.thickness)
+            cv2.circle(frame, (x, y), self.circle_radius, self.landmark_color, self.thickness)
+
+    def draw_info(self, frame, pose_name, corrections, confidence, fps, status):
+        """Draw information overlay on frame."""
+        w = frame.shape[1]
+
+        # Semi-transparent background: darken the banner rows in place
+        banner = frame[:BANNER_HEIGHT]
+        cv2.addWeighted(banner, BANNER_ALPHA, banner, 0, 0, dst=banner)
+
+        y = 30
+
+        # Pose name
+        color = (0, 255, 0) if "✓" in status else (0, 255, 255)
+        cv2.putText(frame, f"Pose: {pose_name}", (10, y), FONT, 0.7, color, 2)
+        y += 30
+
+        # Confidence
+        if confidence > 0:
+            conf_color = (0, 255, 0) if confidence > 0.85 else (0, 255, 255)
+            cv2.putText(frame, f"Confidence: {confidence:.0%}", (10, y), FONT, 0.6, conf_color, 2)
+            y += 25
+
+        # Status
+        status_color = (0, 255, 0) if "✓" in status else (255, 255, 0)
+        cv2.putText(frame, f"Status: {status}", (10, y), FONT, 0.5, status_color, 1)
+        y += 30
+
+        # Corrections
+        if corrections and "✓" in status:
+            cv2.putText(frame, "Feedback:", (10, y), FONT, 0.6, (255, 255, 255), 2)
+            y += 25
+
+            for i, correction in enumerate(corrections[:3]):  # Max 3
+                if '✅' in correction:
+                    text_color = (0, 255, 0)
+                    text = correction
+                else:
+                    text_color = (0, 200, 255)
+                    text = f"{i+1}. {correction}"
+
+                cv2.putText(frame, text, (15, y), FONT, 0.45, text_color, 1)
+                y += 22
+
+        # FPS (top right)
+        fps_text = f"FPS: {fps:.1f}"
+        text_size = cv2.getTextSize(fps_text, FONT, 0.6, 1)[0]
+        cv2.putText(frame, fps_text, (w - text_size[0] - 10, 30), FONT, 0.6, (255, 255, 255), 1)
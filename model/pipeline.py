@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+# One captured frame as it moves through the stages; later stages fill in
+# landmarks and analysis ((pose_name, corrections, confidence, status)).
+# resets counts the tracking resets the detect thread had done before this
+# frame: a count rather than a flag, so a reset still reaches the classify
+# thread when the frame that first carried it is dropped.
+FramePacket = namedtuple('FramePacket', ['index', 'captured_at', 'frame', 'landmarks', 'analysis', 'resets'])
+
+STAGES = ('capture', 'detect', 'classify', 'render', 'display')
+
+
+class LatestQueue:
+    """
+    Bounded hand-off between two pipeline stages.
+
+    put() never blocks: when the queue is full the oldest item is dropped,
+    so a slow consumer always gets the most recent frames instead of a
+    growing backlog.
+    """
+
+    def __init__(self, maxsize=1):
+        self.items = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Returns:
+            the oldest queued item, or None on timeout or once closed and empty
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        """Wake up consumers; get() returns None once the queue is drained."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """Throughput and busy time of one stage (written only by that stage's thread)."""
+
+    def __init__(self, window=60):
+        self.count = 0
+        self.busy_time = 0.0
+        self.done_at = deque(maxlen=window)
+        self.busy = deque(maxlen=window)
+
+    def record(self, started_at):
+        now = time.perf_counter()
+        self.count += 1
+        self.busy_time += now - started_at
+        self.done_at.append(now)
+        self.busy.append(now - started_at)
+
+    def rate(self) -> float:
+        """Items per second over the recent window."""
+        done_at = list(self.done_at)
+        if len(done_at) < 2 or done_at[-1] == done_at[0]:
+            return 0.0
+        return (len(done_at) - 1) / (done_at[-1] - done_at[0])
+
+    def busy_ms(self) -> float:
+        """Mean processing time per item (ms) over the recent window."""
+        busy = list(self.busy)
+        return float(np.mean(busy)) * 1000 if busy else 0.0
+
+
+class PosePipeline:
+    """
+    Runs RealtimePoseCorrector as a pipeline instead of one serial loop:
+
+        capture -> detect -> classify -> render -> (caller displays)
+
+    Each stage has its own thread and LatestQueue(queue_size) hand-offs
+    between them, so the frame rate is bounded by the slowest stage rather
+    than the sum of all of them, and stale frames are dropped instead of
+    adding latency. cv2.imshow must stay on the main thread, so the caller
+    pulls rendered frames with get_frame() and shows them itself.
+
+    Stages run in order on a single thread each, so the detector keeps
+    tracking and the session sees frames in capture order.
+    """
+
+    def __init__(self, corrector, capture, queue_size=1):
+        """
+        Args:
+            corrector: RealtimePoseCorrector (its detector and ROI are used
+                only from the detect thread, its motion gate and session only
+                from the classify thread)
+            capture: opened cv2.VideoCapture
+            queue_size: frames allowed to wait between two stages
+        """
+        self.corrector = corrector
+        self.capture = capture
+        self.queues = {
+            'detect': LatestQueue(queue_size),
+            'classify': LatestQueue(queue_size),
+            'render': LatestQueue(queue_size),
+            'display': LatestQueue(queue_size),
+        }
+        self.stats = {stage: StageStats() for stage in STAGES}
+        self.latency = deque(maxlen=60)
+        self.last_result = None
+
+        self._stop = threading.Event()
+        self._reset = threading.Event()
+        self._resets = 0  # detect thread's count
+        self._classify_resets = 0  # resets the classify thread has applied
+        self._threads = []
+
+    # ==================== CONTROL ====================
+
+    def start(self):
+        targets = [
+            ('capture', self._capture_loop),
+            ('detect', self._detect_loop),
+            ('classify', self._classify_loop),
+            ('render', self._render_loop),
+        ]
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=f'pipeline-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop all stages and wait for their threads to exit."""
+        self._stop.set()
+        for q in self.queues.values():
+            q.close()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def reset_tracking(self):
+        """
+        Reset tracking before the next detected frame. The detect thread
+        resets the detector and ROI; the classify thread resets the motion
+        gate and session when that frame (or a later one) reaches it, so
+        each thread only touches its own state.
+        """
+        self._reset.set()
+
+    def get_frame(self, timeout=0.1) -> Optional[FramePacket]:
+        """
+        Next rendered frame for display (call from the main thread).
+
+        Returns:
+            FramePacket, or None if no frame arrived within timeout
+        """
+        packet = self.queues['display'].get(timeout)
+        if packet is None:
+            return None
+        now = time.perf_counter()
+        self.latency.append(now - packet.captured_at)
+        self.last_result = packet
+        self.stats['display'].record(now)
+        return packet
+
+    # ==================== STAGES ====================
+
+    def _capture_loop(self):
+        index = 0
+        while not self._stop.is_set() and self.capture.isOpened():
+            started = time.perf_counter()
+            ret, frame = self.capture.read()
+            if not ret:
+                print("Failed to grab frame")
+                break
+            self.queues['detect'].put(FramePacket(index, started, frame, None, None, None))
+            self.stats['capture'].record(started)
+            index += 1
+        self._stop.set()
+        self.queues['detect'].close()
+
+    def _detect_loop(self):
+        self._run_stage('detect', 'classify', self._detect)
+
+    def _classify_loop(self):
+        self._run_stage('classify', 'render', self._classify)
+
+    def _render_loop(self):
+        self._run_stage('render', 'display', self._render)
+
+    def _run_stage(self, stage, next_stage, fn):
+        source, sink = self.queues[stage], self.queues[next_stage]
+        try:
+            while True:
+                packet = source.get(timeout=0.1)
+                if packet is None:
+                    if source.closed:
+                        break
+                    continue
+                started = time.perf_counter()
+                sink.put(fn(packet))
+                self.stats[stage].record(started)
+        except Exception as e:
+            print(f"Pipeline stage '{stage}' failed: {e}")
+            self._stop.set()
+        finally:
+            sink.close()
+
+    def _detect(self, packet):
+        if self._reset.is_set():
+            self._reset.clear()
+            self.corrector.reset_detector()
+            self._resets += 1
+        return packet._replace(landmarks=self.corrector.detect_landmarks(packet.frame),
+                               resets=self._resets)
+
+    def _classify(self, packet):
+        if packet.resets != self._classify_resets:
+            self._classify_resets = packet.resets
+            self.corrector.gate.reset()
+            self.corrector.session.reset()
+        return packet._replace(analysis=self.corrector.analyze_landmarks(packet.landmarks))
+
+    def _render(self, packet):
+        pose_name, corrections, confidence, status = packet.analysis
+        self.corrector.render_frame(packet.frame, packet.landmarks, pose_name, corrections,
+                                    confidence, self.stats['display'].rate(), status)
+        return packet
+
+    # ==================== REPORTING ====================
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage throughput (fps), mean busy time (ms) and dropped frames."""
+        report = {}
+        for stage in STAGES:
+            stats = self.stats[stage]
+            q = self.queues.get(stage)
+            report[stage] = {
+                'fps': stats.rate(),
+                'busy_ms': stats.busy_ms(),
+                'frames': stats.count,
+                'dropped': q.dropped if q is not None else 0,
+            }
+        return report
+
+    def latency_ms(self) -> float:
+        """Mean capture-to-display latency (ms) over recent frames."""
+        return float(np.mean(self.latency)) * 1000 if self.latency else 0.0
+
+    def print_report(self):
+        print("Stage        fps   busy ms    frames  dropped")
+        for stage, row in self.report().items():
+            print(f"  {stage:9s} {row['fps']:6.1f} {row['busy_ms']:9.1f} {row['frames']:9d} {row['dropped']:8d}")
+        print(f"  capture->display latency: {self.latency_ms():.1f} ms")
@@ -0,0 +1,392 @@
+import numpy as np
+from enum import IntEnum
+
+# Inference-only pose geometry and feature extraction.
+# Depends on numpy alone so the backend can import it without pulling in
+# mediapipe, OpenCV or the training stack.
+
+class PoseLandmark(IntEnum):
+    """MediaPipe Pose landmark indices (same values as mp.solutions.pose.PoseLandmark)."""
+    NOSE = 0
+    LEFT_EYE_INNER = 1
+    LEFT_EYE = 2
+    LEFT_EYE_OUTER = 3
+    RIGHT_EYE_INNER = 4
+    RIGHT_EYE = 5
+    RIGHT_EYE_OUTER = 6
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    MOUTH_LEFT = 9
+    MOUTH_RIGHT = 10
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_PINKY = 17
+    RIGHT_PINKY = 18
+    LEFT_INDEX = 19
+    RIGHT_INDEX = 20
+    LEFT_THUMB = 21
+    RIGHT_THUMB = 22
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+    LEFT_HEEL = 29
+    RIGHT_HEEL = 30
+    LEFT_FOOT_INDEX = 31
+    RIGHT_FOOT_INDEX = 32
+
+NUM_LANDMARKS = 33
+
+def calculate_angle(p1, p2, p3):
+    """
+    Calculate angle between three points (p1-p2-p3)
+    p2 is the vertex (middle point)
+
+    Args:
+        p1, p2, p3: landmarks with .x, .y attributes
+
+    Returns:
+        angle in degrees
+    """
+    # Convert to numpy arrays
+    a = np.array([p1.x, p1.y])
+    b = np.array([p2.x, p2.y])
+    c = np.array([p3.x, p3.y])
+
+    # Calculate vectors
+    ba = a - b
+    bc = c - b
+
+    # Calculate angle using dot product
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
+    angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
+
+    return np.degrees(angle)
+
+def calculate_distance(p1, p2):
+    """Calculate Euclidean distance between two points"""
+    return np.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+
+def extract_pose_features(landmarks):
+    """
+    Extract comprehensive features from pose landmarks
+
+    Returns:
+        numpy array of ~50 features
+    """
+    features = []
+
+    # Get landmark shortcuts
+    lm = landmarks.landmark
+
+    # ==================== ANGLE FEATURES ====================
+
+    # Left arm angles
+    left_shoulder_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_ELBOW],
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_HIP]
+    )
+    features.append(left_shoulder_angle)
+
+    left_elbow_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_ELBOW],
+        lm[PoseLandmark.LEFT_WRIST]
+    )
+    features.append(left_elbow_angle)
+
+    # Right arm angles
+    right_shoulder_angle = calculate_angle(
+        lm[PoseLandmark.RIGHT_ELBOW],
+        lm[PoseLandmark.RIGHT_SHOULDER],
+        lm[PoseLandmark.RIGHT_HIP]
+    )
+    features.append(right_shoulder_angle)
+
+    right_elbow_angle = calculate_angle(
+        lm[PoseLandmark.RIGHT_SHOULDER],
+        lm[PoseLandmark.RIGHT_ELBOW],
+        lm[PoseLandmark.RIGHT_WRIST]
+    )
+    features.append(right_elbow_angle)
+
+    # Left leg angles
+    left_hip_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_HIP],
+        lm[PoseLandmark.LEFT_KNEE]
+    )
+    features.append(left_hip_angle)
+
+    left_knee_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_HIP],
+        lm[PoseLandmark.LEFT_KNEE],
+        lm[PoseLandmark.LEFT_ANKLE]
+    )
+    features.append(left_knee_angle)
+
+    # Right leg angles
+    right_hip_angle = calculate_angle(
+        lm[PoseLandmark.RIGHT_SHOULDER],
+        lm[PoseLandmark.RIGHT_HIP],
+        lm[PoseLandmark.RIGHT_KNEE]
+    )
+    features.append(right_hip_angle)
+
+    right_knee_angle = calculate_angle(
+        lm[PoseLandmark.RIGHT_HIP],
+        lm[PoseLandmark.RIGHT_KNEE],
+        lm[PoseLandmark.RIGHT_ANKLE]
+    )
+    features.append(right_knee_angle)
+
+    # Spine/torso angles
+    spine_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_HIP],
+        lm[PoseLandmark.LEFT_KNEE]
+    )
+    features.append(spine_angle)
+
+    # Neck angle
+    neck_angle = calculate_angle(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.NOSE],
+        lm[PoseLandmark.LEFT_EAR]
+    )
+    features.append(neck_angle)
+
+    # ==================== DISTANCE FEATURES ====================
+
+    # Hand distance (for poses with hands together)
+    hand_distance = calculate_distance(
+        lm[PoseLandmark.LEFT_WRIST],
+        lm[PoseLandmark.RIGHT_WRIST]
+    )
+    features.append(hand_distance)
+
+    # Foot distance (for poses with wide stance)
+    foot_distance = calculate_distance(
+        lm[PoseLandmark.LEFT_ANKLE],
+        lm[PoseLandmark.RIGHT_ANKLE]
+    )
+    features.append(foot_distance)
+
+    # ==================== RATIO FEATURES (body size normalized) ====================
+
+    # Calculate body height (shoulder to ankle)
+    body_height = calculate_distance(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_ANKLE]
+    )
+
+    # Arm length ratios
+    left_arm_length = calculate_distance(
+        lm[PoseLandmark.LEFT_SHOULDER],
+        lm[PoseLandmark.LEFT_WRIST]
+    )
+    features.append(left_arm_length / (body_height + 1e-6))
+
+    right_arm_length = calculate_distance(
+        lm[PoseLandmark.RIGHT_SHOULDER],
+        lm[PoseLandmark.RIGHT_WRIST]
+    )
+    features.append(right_arm_length / (body_height + 1e-6))
+
+    # ==================== POSITION FEATURES ====================
+
+    # Y-coordinates (height) of key points (normalized)
+    features.append(lm[PoseLandmark.LEFT_WRIST].y)
+    features.append(lm[PoseLandmark.RIGHT_WRIST].y)
+    features.append(lm[PoseLandmark.LEFT_ANKLE].y)
+    features.append(lm[PoseLandmark.RIGHT_ANKLE].y)
+    features.append(lm[PoseLandmark.NOSE].y)
+
+    # X-coordinates (width) - for left/right alignment
+    features.append(lm[PoseLandmark.LEFT_SHOULDER].x)
+    features.append(lm[PoseLandmark.RIGHT_SHOULDER].x)
+
+    # ==================== SYMMETRY FEATURES ====================
+
+    # Arm symmetry (difference between left and right)
+    arm_symmetry = abs(left_elbow_angle - right_elbow_angle)
+    features.append(arm_symmetry)
+
+    # Leg symmetry
+    leg_symmetry = abs(left_knee_angle - right_knee_angle)
+    features.append(leg_symmetry)
+
+    # Shoulder level difference
+    shoulder_level = abs(lm[PoseLandmark.LEFT_SHOULDER].y -
+                         lm[PoseLandmark.RIGHT_SHOULDER].y)
+    features.append(shoulder_level)
+
+    # Hip level difference
+    hip_level = abs(lm[PoseLandmark.LEFT_HIP].y -
+                    lm[PoseLandmark.RIGHT_HIP].y)
+    features.append(hip_level)
+
+    return np.array(features)
+
+# ==================== BATCH (VECTORIZED) FEATURES ====================
+
+NUM_FEATURES = 25
+
+# Feature vector layout (recorded in exported model artifacts, see model_artifact.py)
+FEATURE_NAMES = (
+    'left_shoulder_angle', 'left_elbow_angle', 'right_shoulder_angle', 'right_elbow_angle',
+    'left_hip_angle', 'left_knee_angle', 'right_hip_angle', 'right_knee_angle',
+    'spine_angle', 'neck_angle',
+    'hand_distance', 'foot_distance',
+    'left_arm_ratio', 'right_arm_ratio',
+    'left_wrist_y', 'right_wrist_y', 'left_ankle_y', 'right_ankle_y', 'nose_y',
+    'left_shoulder_x', 'right_shoulder_x',
+    'arm_symmetry', 'leg_symmetry', 'shoulder_level', 'hip_level',
+)
+
+_L = PoseLandmark
+
+# (p1, vertex, p3) landmark indices for the angle features, in feature order
+ANGLE_FEATURE_TRIPLETS = np.array([
+    [_L.LEFT_ELBOW, _L.LEFT_SHOULDER, _L.LEFT_HIP],       # left_shoulder_angle
+    [_L.LEFT_SHOULDER, _L.LEFT_ELBOW, _L.LEFT_WRIST],     # left_elbow_angle
+    [_L.RIGHT_ELBOW, _L.RIGHT_SHOULDER, _L.RIGHT_HIP],    # right_shoulder_angle
+    [_L.RIGHT_SHOULDER, _L.RIGHT_ELBOW, _L.RIGHT_WRIST],  # right_elbow_angle
+    [_L.LEFT_SHOULDER, _L.LEFT_HIP, _L.LEFT_KNEE],        # left_hip_angle
+    [_L.LEFT_HIP, _L.LEFT_KNEE, _L.LEFT_ANKLE],           # left_knee_angle
+    [_L.RIGHT_SHOULDER, _L.RIGHT_HIP, _L.RIGHT_KNEE],     # right_hip_angle
+    [_L.RIGHT_HIP, _L.RIGHT_KNEE, _L.RIGHT_ANKLE],        # right_knee_angle
+    [_L.LEFT_SHOULDER, _L.LEFT_HIP, _L.LEFT_KNEE],        # spine_angle
+    [_L.LEFT_SHOULDER, _L.NOSE, _L.LEFT_EAR],             # neck_angle
+], dtype=np.intp)
+
+# (p1, p2) landmark indices for hand_distance, foot_distance, body_height,
+# left_arm_length, right_arm_length
+DISTANCE_FEATURE_PAIRS = np.array([
+    [_L.LEFT_WRIST, _L.RIGHT_WRIST],
+    [_L.LEFT_ANKLE, _L.RIGHT_ANKLE],
+    [_L.LEFT_SHOULDER, _L.LEFT_ANKLE],
+    [_L.LEFT_SHOULDER, _L.LEFT_WRIST],
+    [_L.RIGHT_SHOULDER, _L.RIGHT_WRIST],
+], dtype=np.intp)
+
+# Raw y and x coordinates copied into the feature vector
+Y_FEATURE_LANDMARKS = np.array([
+    _L.LEFT_WRIST, _L.RIGHT_WRIST, _L.LEFT_ANKLE, _L.RIGHT_ANKLE, _L.NOSE
+], dtype=np.intp)
+X_FEATURE_LANDMARKS = np.array([
+    _L.LEFT_SHOULDER, _L.RIGHT_SHOULDER
+], dtype=np.intp)
+
+# Every landmark the features above read (symmetry features add the hips)
+FEATURE_LANDMARKS = np.unique(np.concatenate([
+    ANGLE_FEATURE_TRIPLETS.ravel(), DISTANCE_FEATURE_PAIRS.ravel(),
+    Y_FEATURE_LANDMARKS, X_FEATURE_LANDMARKS, [_L.LEFT_HIP, _L.RIGHT_HIP]
+]))
+
+def landmarks_to_array(landmarks):
+    """
+    Convert landmarks into a (33, 4) array of x, y, z, visibility.
+
+    Args:
+        landmarks: MediaPipe pose landmarks (object with .landmark) or a
+            sequence of points with .x, .y, .z, .visibility attributes; a
+            (33, 4) array is returned as is
+
+    Raises:
+        ValueError: if there are not exactly 33 landmarks
+    """
+    if isinstance(landmarks, np.ndarray):
+        points = landmarks
+    else:
+        points = np.array([[p.x, p.y, p.z, p.visibility]
+                           for p in getattr(landmarks, 'landmark', landmarks)], dtype=np.float64)
+    if points.shape != (NUM_LANDMARKS, 4):
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks (shape (33, 4)), got shape {points.shape}")
+    return points
+
+def calculate_angles_batch(points, triplets):
+    """
+    Vectorized calculate_angle.
+
+    Args:
+        points: array of shape (N, 33, >=2) with x, y in the first two columns
+        triplets: int array of shape (K, 3), (p1, vertex, p3) landmark indices
+
+    Returns:
+        angles in degrees, shape (N, K)
+    """
+    # One gather for all three points of every triplet: (N, K, 3, 2)
+    p = points[:, triplets, :2]
+    ba = p[:, :, 0] - p[:, :, 1]
+    bc = p[:, :, 2] - p[:, :, 1]
+
+    dot = ba[..., 0] * bc[..., 0] + ba[..., 1] * bc[..., 1]
+    norms = np.sqrt(ba[..., 0]**2 + ba[..., 1]**2) * np.sqrt(bc[..., 0]**2 + bc[..., 1]**2)
+    cosine_angle = dot / (norms + 1e-6)
+
+    # minimum/maximum instead of np.clip: same values, less per-call overhead
+    return np.degrees(np.arccos(np.minimum(np.maximum(cosine_angle, -1.0), 1.0)))
+
+def calculate_distances_batch(points, pairs):
+    """
+    Vectorized calculate_distance.
+
+    Args:
+        points: array of shape (N, 33, >=2)
+        pairs: int array of shape (K, 2) of landmark indices
+
+    Returns:
+        distances, shape (N, K)
+    """
+    delta = points[:, pairs[:, 0], :2] - points[:, pairs[:, 1], :2]
+    return np.sqrt(delta[..., 0]**2 + delta[..., 1]**2)
+
+def extract_pose_features_batch(landmark_array):
+    """
+    Vectorized extract_pose_features for many frames at once.
+
+    Args:
+        landmark_array: array of shape (N, 33, 4) or (33, 4)
+            (x, y, z, visibility per landmark)
+
+    Returns:
+        numpy array of shape (N, 25), same feature order as extract_pose_features
+    """
+    points = np.asarray(landmark_array, dtype=np.float64)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    if points.ndim != 3 or points.shape[1] != NUM_LANDMARKS or points.shape[2] < 2:
+        raise ValueError(f"Expected landmarks of shape (N, 33, 4), got {points.shape}")
+
+    n = points.shape[0]
+    features = np.empty((n, NUM_FEATURES), dtype=np.float64)
+
+    # Angle features (0-9)
+    angles = calculate_angles_batch(points, ANGLE_FEATURE_TRIPLETS)
+    features[:, 0:10] = angles
+
+    # Distance features (10-11) and arm length ratios (12-13)
+    distances = calculate_distances_batch(points, DISTANCE_FEATURE_PAIRS)
+    features[:, 10:12] = distances[:, 0:2]
+    body_height = distances[:, 2:3]
+    features[:, 12:14] = distances[:, 3:5] / (body_height + 1e-6)
+
+    # Position features (14-20)
+    features[:, 14:19] = points[:, Y_FEATURE_LANDMARKS, 1]
+    features[:, 19:21] = points[:, X_FEATURE_LANDMARKS, 0]
+
+    # Symmetry features (21-24)
+    features[:, 21] = np.abs(angles[:, 1] - angles[:, 3])
+    features[:, 22] = np.abs(angles[:, 5] - angles[:, 7])
+    features[:, 23] = np.abs(points[:, _L.LEFT_SHOULDER, 1] - points[:, _L.RIGHT_SHOULDER, 1])
+    features[:, 24] = np.abs(points[:, _L.LEFT_HIP, 1] - points[:, _L.RIGHT_HIP, 1])
+
+    return features
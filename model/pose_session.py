@@ -0,0 +1,128 @@
+from collections import namedtuple
+from typing import Optional, Tuple
+
+# state: 'detecting' | 'uncertain' | 'stabilizing' | 'locked'
+SessionState = namedtuple('SessionState', ['state', 'pose_name', 'confidence', 'status'])
+
+
+class PoseSession:
+    """
+    Temporal smoothing and pose-hold tracking for one practitioner.
+    Shared by RealtimePoseCorrector and the backend (streaming endpoint and
+    session store).
+
+    Vote counts and confidence sums per pose are kept up to date as frames
+    enter and leave the window, so an update costs the same whatever the
+    window size. __slots__ keeps each session small enough to hold tens of
+    thousands of them in one process.
+    """
+
+    __slots__ = ('smoothing_window', 'min_confidence', 'min_hold_frames',
+                 'pose_history', 'confidence_history', 'history_start', 'history_len',
+                 'vote_counts', 'confidence_sums', 'current_stable_pose', 'pose_hold_count')
+
+    def __init__(self,
+                 smoothing_window=7,
+                 min_confidence=0.70,
+                 min_hold_frames=10):
+        """
+        Args:
+            smoothing_window: Number of frames to average predictions (default: 7)
+            min_confidence: Minimum confidence to accept prediction (default: 0.70)
+            min_hold_frames: Frames needed before showing corrections (default: 10)
+        """
+        self.smoothing_window = smoothing_window
+        self.min_confidence = min_confidence
+        self.min_hold_frames = min_hold_frames
+        self.reset()
+
+    def reset(self):
+        """Forget all history (e.g. when the practitioner leaves the frame)."""
+        # Fixed-size ring buffers: slot (history_start + i) % smoothing_window
+        # holds the i-th oldest prediction
+        self.pose_history = [None] * self.smoothing_window
+        self.confidence_history = [0.0] * self.smoothing_window
+        self.history_start = 0
+        self.history_len = 0
+        self.vote_counts = {}
+        self.confidence_sums = {}
+        self.current_stable_pose = None
+        self.pose_hold_count = 0
+
+    def _push(self, pose, confidence):
+        """Append one prediction, retiring the oldest one if the window is full."""
+        if self.history_len == self.smoothing_window:
+            slot = self.history_start
+            self.history_start = (slot + 1) % self.smoothing_window
+            old_pose = self.pose_history[slot]
+            old_confidence = self.confidence_history[slot]
+            count = self.vote_counts[old_pose] - 1
+            if count:
+                self.vote_counts[old_pose] = count
+                self.confidence_sums[old_pose] -= old_confidence
+            else:
+                # Drop the entry (and any accumulated rounding error with it)
+                del self.vote_counts[old_pose]
+                del self.confidence_sums[old_pose]
+        else:
+            slot = (self.history_start + self.history_len) % self.smoothing_window
+            self.history_len += 1
+
+        self.pose_history[slot] = pose
+        self.confidence_history[slot] = confidence
+        self.vote_counts[pose] = self.vote_counts.get(pose, 0) + 1
+        self.confidence_sums[pose] = self.confidence_sums.get(pose, 0.0) + confidence
+
+    def get_smoothed_pose(self) -> Tuple[Optional[str], float]:
+        """
+        Get smoothed pose prediction from history buffer.
+
+        Returns:
+            (smoothed_pose_name, average_confidence) or (None, 0.0)
+        """
+        if self.history_len < 3:
+            return None, 0.0
+
+        # Most voted pose (at most smoothing_window distinct poses)
+        most_common_pose = max(self.vote_counts, key=self.vote_counts.get)
+        count = self.vote_counts[most_common_pose]
+
+        # Must appear in >60% of frames
+        if count < self.history_len * 0.6:
+            return None, 0.0
+
+        # Average confidence for this pose
+        return most_common_pose, self.confidence_sums[most_common_pose] / count
+
+    def update(self, raw_pose: str, raw_confidence: float) -> SessionState:
+        """
+        Add one raw prediction and return the smoothed session state.
+
+        Corrections should only be computed when state == 'locked'.
+        """
+        self._push(raw_pose, float(raw_confidence))
+
+        smoothed_pose, avg_confidence = self.get_smoothed_pose()
+
+        # Warming up
+        if smoothed_pose is None:
+            return SessionState('detecting', "Detecting...", 0.0,
+                                f"Buffer: {self.history_len}/{self.smoothing_window}")
+
+        # Low confidence
+        if avg_confidence < self.min_confidence:
+            return SessionState('uncertain', "Uncertain", avg_confidence, "Low confidence")
+
+        # Check stability
+        if smoothed_pose == self.current_stable_pose:
+            self.pose_hold_count += 1
+        else:
+            self.current_stable_pose = smoothed_pose
+            self.pose_hold_count = 1
+
+        # Not held long enough
+        if self.pose_hold_count < self.min_hold_frames:
+            status = f"Stabilizing ({self.pose_hold_count}/{self.min_hold_frames})"
+            return SessionState('stabilizing', smoothed_pose, avg_confidence, status)
+
+        return SessionState('locked', smoothed_pose, avg_confidence, "✓ Locked")
@@ -0,0 +1,310 @@
+import numpy as np
+from typing import List, Tuple
+
+
+# ==================== PURE-NUMPY KERNELS ====================
+
+class SVCKernel:
+    """
+    Pure-NumPy inference for a fitted sklearn SVC (rbf or linear kernel,
+    probability=True), exported from its support vectors, dual coefficients
+    and Platt scaling parameters.
+
+    One kernel evaluation gives both the one-vs-one vote (same label as
+    SVC.predict) and the coupled class probabilities (SVC.predict_proba,
+    see _couple_pairwise), with no sklearn input validation per call.
+    """
+
+    ARRAYS = ('classes', 'support_vectors', 'sv_sq_norms', 'pair_coef',
+              'intercept', 'prob_a', 'prob_b', 'pair_i', 'pair_j')
+
+    def __init__(self, svc):
+        if svc.kernel not in ('rbf', 'linear'):
+            raise ValueError(f"Unsupported SVC kernel '{svc.kernel}'")
+        if not getattr(svc, 'probability', False) or len(getattr(svc, 'probA_', ())) == 0:
+            raise ValueError("SVC was not trained with probability=True")
+
+        self.kernel = svc.kernel
+        self.gamma = float(svc._gamma)
+        self.classes = np.asarray(svc.classes_)
+        self.support_vectors = np.ascontiguousarray(svc.support_vectors_, dtype=np.float64)
+        self.sv_sq_norms = (self.support_vectors ** 2).sum(axis=1)
+        self.prob_a = np.asarray(svc.probA_, dtype=np.float64)
+        self.prob_b = np.asarray(svc.probB_, dtype=np.float64)
+
+        # Flatten the libsvm one-vs-one layout into one (n_SV, n_pairs) coefficient
+        # matrix so every pairwise decision value comes out of a single matmul
+        k = len(self.classes)
+        starts = np.r_[0, np.cumsum(svc.n_support_)]
+        dual_coef = np.asarray(svc.dual_coef_, dtype=np.float64)
+        pairs = [(i, j) for i in range(k) for j in range(i + 1, k)]
+        coef = np.zeros((len(self.support_vectors), len(pairs)))
+        for p, (i, j) in enumerate(pairs):
+            coef[starts[i]:starts[i + 1], p] = dual_coef[j - 1, starts[i]:starts[i + 1]]
+            coef[starts[j]:starts[j + 1], p] = dual_coef[i, starts[j]:starts[j + 1]]
+        self.pair_coef = coef
+        self.intercept = np.asarray(svc.intercept_, dtype=np.float64)
+        self.pair_i = np.array([i for i, _ in pairs], dtype=np.intp)
+        self.pair_j = np.array([j for _, j in pairs], dtype=np.intp)
+
+    def to_arrays(self):
+        """Returns (arrays, params) for saving in a model artifact."""
+        return {name: getattr(self, name) for name in self.ARRAYS}, \
+            {'kernel': self.kernel, 'gamma': self.gamma}
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Rebuild from to_arrays() output, without the sklearn model."""
+        kernel = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(kernel, name, arrays[name])
+        kernel.kernel = params['kernel']
+        kernel.gamma = float(params['gamma'])
+        return kernel
+
+    def decision_values(self, X) -> np.ndarray:
+        """One-vs-one decision values, shape (N, n_pairs)."""
+        # einsum instead of matmul: BLAS picks different kernels for 1 and N rows,
+        # which would make a frame's result depend on the size of its batch
+        dot = np.einsum('nf,sf->ns', X, self.support_vectors)
+        if self.kernel == 'linear':
+            K = dot
+        else:
+            sq_dist = (X ** 2).sum(axis=1)[:, None] + self.sv_sq_norms[None, :] - 2 * dot
+            K = np.exp(-self.gamma * np.maximum(sq_dist, 0))
+        return np.einsum('ns,sp->np', K, self.pair_coef) + self.intercept
+
+    def predict_with_proba(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (class_column, probabilities): column index into classes (argmax of
+            one-vs-one votes) and (N, n_classes) probabilities
+        """
+        dec = self.decision_values(X)
+        n, k = len(X), len(self.classes)
+
+        # One-vs-one voting, ties go to the lower class index (as libsvm)
+        votes = np.zeros((n, k), dtype=np.intp)
+        positive = dec > 0
+        np.add.at(votes, (slice(None), self.pair_i), positive)
+        np.add.at(votes, (slice(None), self.pair_j), ~positive)
+        columns = votes.argmax(axis=1)
+
+        # Platt scaling of each pairwise decision value
+        fApB = dec * self.prob_a + self.prob_b
+        pos = np.exp(-np.abs(fApB))
+        pairwise = np.where(fApB >= 0, pos / (1.0 + pos), 1.0 / (1.0 + pos))
+        pairwise = np.clip(pairwise, 1e-7, 1 - 1e-7)
+
+        r = np.zeros((n, k, k))
+        r[:, self.pair_i, self.pair_j] = pairwise
+        r[:, self.pair_j, self.pair_i] = 1 - pairwise
+        return columns, _couple_pairwise(r)
+
+
+def _couple_pairwise(r) -> np.ndarray:
+    """
+    Pairwise coupling (Wu, Lin and Weng 2004, method 2), the same problem
+    libsvm's multiclass_probability solves:
+
+        min p^T Q p  subject to  sum(p) = 1
+
+    libsvm iterates towards the optimum and stops within 0.005/k; here the
+    optimality (KKT) system is solved directly for all rows at once, so
+    results agree with SVC.predict_proba to about 1e-3.
+
+    Args:
+        r: (N, k, k) pairwise probabilities, r[:, i, j] = P(i | i or j),
+            zero on the diagonal
+
+    Returns:
+        (N, k) class probabilities
+    """
+    n, k, _ = r.shape
+    rt = r.transpose(0, 2, 1)
+    idx = np.arange(k)
+
+    A = np.zeros((n, k + 1, k + 1))
+    A[:, :k, :k] = -rt * r
+    A[:, idx, idx] = (rt ** 2).sum(axis=2)
+    A[:, k, :k] = 1
+    A[:, :k, k] = 1
+    b = np.zeros((n, k + 1, 1))
+    b[:, k] = 1
+
+    p = np.clip(np.linalg.solve(A, b)[:, :k, 0], 0, None)
+    return p / p.sum(axis=1, keepdims=True)
+
+
+class ForestKernel:
+    """
+    Pure-NumPy inference for a fitted sklearn RandomForestClassifier.
+    All trees are padded into (n_trees, max_nodes) arrays and walked
+    together, one array step per tree level.
+    """
+
+    ARRAYS = ('classes', 'left', 'right', 'feature', 'threshold', 'value')
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        n_trees = len(trees)
+        max_nodes = max(t.node_count for t in trees)
+        n_classes = len(forest.classes_)
+
+        self.classes = np.asarray(forest.classes_)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.left = np.full((n_trees, max_nodes), -1, dtype=np.intp)
+        self.right = np.full((n_trees, max_nodes), -1, dtype=np.intp)
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self.threshold = np.zeros((n_trees, max_nodes))
+        self.value = np.zeros((n_trees, max_nodes, n_classes))
+
+        for t, tree in enumerate(trees):
+            m = tree.node_count
+            self.left[t, :m] = tree.children_left
+            self.right[t, :m] = tree.children_right
+            self.feature[t, :m] = np.maximum(tree.feature, 0)
+            self.threshold[t, :m] = tree.threshold
+            value = tree.value[:, 0, :]
+            self.value[t, :m] = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+        self._tree_idx = np.arange(n_trees)[None, :]
+
+    def to_arrays(self):
+        """Returns (arrays, params) for saving in a model artifact."""
+        return {name: getattr(self, name) for name in self.ARRAYS}, {'max_depth': self.max_depth}
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Rebuild from to_arrays() output, without the sklearn model."""
+        kernel = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(kernel, name, arrays[name])
+        kernel.max_depth = int(params['max_depth'])
+        kernel._tree_idx = np.arange(kernel.left.shape[0])[None, :]
+        return kernel
+
+    def predict_with_proba(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        # sklearn trees compare float32 inputs against their thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        node = np.zeros((n, self.left.shape[0]), dtype=np.intp)
+        rows = np.arange(n)[:, None]
+        for _ in range(self.max_depth):
+            left = self.left[self._tree_idx, node]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[rows, self.feature[self._tree_idx, node]] <= self.threshold[self._tree_idx, node]
+            child = np.where(go_left, left, self.right[self._tree_idx, node])
+            node = np.where(is_leaf, node, child)
+        proba = self.value[self._tree_idx, node].mean(axis=1)
+        return proba.argmax(axis=1), proba
+
+
+def export_kernel(model):
+    """
+    Export a fitted classifier into a pure-NumPy kernel.
+
+    Returns:
+        SVCKernel / ForestKernel, or None if the model type is not supported
+    """
+    name = type(model).__name__
+    try:
+        if name == 'SVC':
+            return SVCKernel(model)
+        if name == 'RandomForestClassifier':
+            return ForestKernel(model)
+    except (ValueError, AttributeError):
+        return None
+    return None
+
+
+# Kernel classes by name, as recorded in model artifacts
+KERNELS = {cls.__name__: cls for cls in (SVCKernel, ForestKernel)}
+
+
+# ==================== PREDICTOR ====================
+
+class PosePredictor:
+    """
+    Scaler + classifier wrapper that computes class probabilities once per
+    batch and derives the predicted pose from the same pass.
+
+    With use_kernel=True (default) supported models (SVC, RandomForest) run
+    through a pure-NumPy kernel; otherwise predict_proba is called once and
+    the label is its argmax.
+    """
+
+    def __init__(self, model, scaler, pose_names, use_kernel=True):
+        self.model = model
+        self.scaler = scaler
+        self.pose_names = list(pose_names)
+        self.classes = np.asarray(model.classes_)
+        self.kernel = export_kernel(model) if use_kernel else None
+
+        # StandardScaler as plain arrays (skips sklearn validation per call)
+        self._mean = getattr(scaler, 'mean_', None)
+        self._scale = getattr(scaler, 'scale_', None)
+
+    @classmethod
+    def from_model_data(cls, data, use_kernel=True):
+        """Build from the {'model', 'scaler', 'pose_names'} dict stored in the pickle."""
+        return cls(data['model'], data['scaler'], data['pose_names'], use_kernel=use_kernel)
+
+    @classmethod
+    def from_kernel(cls, kernel, mean, scale, pose_names):
+        """
+        Build from an exported kernel and StandardScaler arrays, with no
+        sklearn objects (see model_artifact.py).
+        """
+        predictor = cls.__new__(cls)
+        predictor.model = None
+        predictor.scaler = None
+        predictor.pose_names = list(pose_names)
+        predictor.classes = np.asarray(kernel.classes)
+        predictor.kernel = kernel
+        predictor._mean = mean
+        predictor._scale = scale
+        return predictor
+
+    @property
+    def n_features(self) -> int:
+        """Number of input features the scaler was fitted on."""
+        if self._scale is not None:
+            return len(self._scale)
+        return int(self.scaler.n_features_in_)
+
+    def transform(self, features) -> np.ndarray:
+        """Apply the scaler to an (N, n_features) matrix."""
+        features = np.asarray(features, dtype=np.float64)
+        if self.kernel is not None and self._mean is not None and self._scale is not None:
+            return (features - self._mean) / self._scale
+        return self.scaler.transform(features)
+
+    def predict_scaled(self, features_scaled) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Predict from already-scaled features.
+
+        Returns:
+            (pose_names, confidences, probabilities)
+        """
+        if self.kernel is not None:
+            columns, probabilities = self.kernel.predict_with_proba(features_scaled)
+        else:
+            probabilities = self.model.predict_proba(features_scaled)
+            columns = probabilities.argmax(axis=1)
+
+        rows = np.arange(len(columns))
+        names = [self.pose_names[label] for label in self.classes[columns]]
+        return names, probabilities[rows, columns], probabilities
+
+    def predict(self, features) -> Tuple[List[str], np.ndarray]:
+        """
+        Predict poses for an (N, n_features) matrix of raw features.
+
+        Returns:
+            (pose_names, confidences), one entry per row
+        """
+        names, confidences, _ = self.predict_scaled(self.transform(features))
+        return names, confidences
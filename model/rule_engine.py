@@ -0,0 +1,429 @@
+import numpy as np
+from collections import namedtuple
+from functools import cached_property
+
+from pose_features import PoseLandmark, calculate_angles_batch
+from pose_rules import POSE_CORRECTION_RULES
+
+_L = PoseLandmark
+
+# ==================== RULE FEATURES ====================
+
+# Angle features that map directly onto a (p1, vertex, p3) landmark triplet
+ANGLE_RULE_TRIPLETS = {
+    'left_knee_angle': (_L.LEFT_HIP, _L.LEFT_KNEE, _L.LEFT_ANKLE),
+    'right_knee_angle': (_L.RIGHT_HIP, _L.RIGHT_KNEE, _L.RIGHT_ANKLE),
+    'left_elbow_angle': (_L.LEFT_SHOULDER, _L.LEFT_ELBOW, _L.LEFT_WRIST),
+    'right_elbow_angle': (_L.RIGHT_SHOULDER, _L.RIGHT_ELBOW, _L.RIGHT_WRIST),
+    'left_hip_angle': (_L.LEFT_SHOULDER, _L.LEFT_HIP, _L.LEFT_KNEE),
+    'right_hip_angle': (_L.RIGHT_SHOULDER, _L.RIGHT_HIP, _L.RIGHT_KNEE),
+    'spine_angle': (_L.LEFT_SHOULDER, _L.LEFT_HIP, _L.LEFT_KNEE),
+    'spine_alignment': (_L.LEFT_WRIST, _L.LEFT_SHOULDER, _L.LEFT_HIP),
+}
+
+# Every feature a rule can reference.
+#   unit: 'deg' features get "(Current/Ideal)" details in correction messages
+#   mode: how ideal/tolerance/min turn into an accepted [lo, hi] range
+#       'abs'   -> ideal +- tolerance
+#       'max'   -> value <= tolerance (ideal is ignored)
+#       'min'   -> value >= min
+#       'lower' -> value >= ideal - tolerance (more is fine)
+#       'upper' -> value <= ideal + tolerance (less is fine)
+#   ideal/tolerance/min: defaults used when a check leaves them out
+#   alias: the same measurement as that feature under another name (with
+#       its own defaults); computed once when a pose checks both
+RULE_FEATURES = {
+    'left_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 10},
+    'right_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 10},
+    'left_elbow_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 15},
+    'right_elbow_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 15},
+    'left_hip_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 90, 'tolerance': 20},
+    'right_hip_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 90, 'tolerance': 20},
+    'spine_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 170, 'tolerance': 15},
+    'spine_alignment': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 20},
+    'standing_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 10},
+    'raised_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 90, 'tolerance': 20},
+    'front_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 90, 'tolerance': 15},
+    'back_knee_angle': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 10},
+    'back_leg_extension': {'unit': 'deg', 'mode': 'lower', 'ideal': 180, 'tolerance': 30},
+    'arm_alignment': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 15},
+    'arm_extension': {'unit': 'deg', 'mode': 'lower', 'ideal': 180, 'tolerance': 25},
+    'spine_curve': {'unit': 'deg', 'mode': 'abs', 'ideal': 45, 'tolerance': 20},
+    'spine_vertical': {'unit': 'deg', 'mode': 'abs', 'ideal': 90, 'tolerance': 15, 'alias': 'spine_curve'},
+    'backbend_depth': {'unit': 'deg', 'mode': 'abs', 'ideal': 60, 'tolerance': 20},
+    'hip_sag': {'unit': 'deg', 'mode': 'abs', 'ideal': 180, 'tolerance': 15},
+    'shoulder_level_diff': {'unit': 'ratio', 'mode': 'max', 'ideal': 0, 'tolerance': 0.03},
+    'hip_level_diff': {'unit': 'ratio', 'mode': 'max', 'ideal': 0, 'tolerance': 0.03},
+    'foot_distance': {'unit': 'ratio', 'mode': 'min', 'ideal': 0.35, 'min': 0.3},
+    'balance_shift': {'unit': 'ratio', 'mode': 'abs', 'ideal': 0, 'tolerance': 0.05},
+    'balance': {'unit': 'ratio', 'mode': 'abs', 'ideal': 0, 'tolerance': 0.05, 'alias': 'balance_shift'},
+    'body_alignment': {'unit': 'ratio', 'mode': 'abs', 'ideal': 0, 'tolerance': 0.05},
+    'hip_square': {'unit': 'ratio', 'mode': 'abs', 'ideal': 0, 'tolerance': 0.05},
+    'torso_alignment': {'unit': 'ratio', 'mode': 'max', 'ideal': 0, 'tolerance': 0.15},
+    'forward_fold_depth': {'unit': 'ratio', 'mode': 'upper', 'ideal': 0.3, 'tolerance': 0.15},
+    'head_position': {'unit': 'ratio', 'mode': 'lower', 'ideal': 0, 'tolerance': 0},
+    'chest_lift': {'unit': 'ratio', 'mode': 'lower', 'ideal': 0.3, 'tolerance': 0.1},
+    'hip_lift': {'unit': 'ratio', 'mode': 'lower', 'ideal': 0.4, 'tolerance': 0.1},
+    'raised_leg_height': {'unit': 'ratio', 'mode': 'lower', 'ideal': 0.4, 'tolerance': 0.1},
+    'hand_support': {'unit': 'ratio', 'mode': 'max', 'ideal': 0, 'tolerance': 0.5},
+    'chin_tuck': {'unit': 'ratio', 'mode': 'max', 'ideal': 0, 'tolerance': 0.35},
+}
+
+RULE_FEATURE_NAMES = list(RULE_FEATURES)
+RULE_FEATURE_INDEX = {name: i for i, name in enumerate(RULE_FEATURE_NAMES)}
+
+def _torso_incline(shoulder_center, hip_center):
+    """Angle of the hip->shoulder line above the horizontal, in degrees (0-90)."""
+    d = shoulder_center - hip_center
+    return np.degrees(np.arctan2(np.abs(d[:, 1]), np.abs(d[:, 0]) + 1e-6))
+
+def _angle_at(p1, vertex, p3):
+    """calculate_angle over (N, 2) point arrays."""
+    ba = p1 - vertex
+    bc = p3 - vertex
+    dot = ba[:, 0] * bc[:, 0] + ba[:, 1] * bc[:, 1]
+    norms = np.sqrt(ba[:, 0]**2 + ba[:, 1]**2) * np.sqrt(bc[:, 0]**2 + bc[:, 1]**2)
+    return np.degrees(np.arccos(np.minimum(np.maximum(dot / (norms + 1e-6), -1.0), 1.0)))
+
+class _Frames:
+    """
+    A batch of frames plus the body points several rule features share
+    (joint centers, torso length, standing leg), each computed on first use
+    so a pose's checks pay only for what they read.
+    """
+
+    def __init__(self, points, angle_names, angle_triplets):
+        self.points = points
+        self.xy = points[..., :2]
+        angles = calculate_angles_batch(points, angle_triplets) if len(angle_names) else None
+        self.angles = {name: angles[:, i] for i, name in enumerate(angle_names)}
+
+    def _center(self, a, b):
+        return (self.xy[:, a] + self.xy[:, b]) / 2
+
+    @cached_property
+    def shoulder_c(self):
+        return self._center(_L.LEFT_SHOULDER, _L.RIGHT_SHOULDER)
+
+    @cached_property
+    def hip_c(self):
+        return self._center(_L.LEFT_HIP, _L.RIGHT_HIP)
+
+    @cached_property
+    def knee_c(self):
+        return self._center(_L.LEFT_KNEE, _L.RIGHT_KNEE)
+
+    @cached_property
+    def ankle_c(self):
+        return self._center(_L.LEFT_ANKLE, _L.RIGHT_ANKLE)
+
+    @cached_property
+    def torso_len(self):
+        return np.linalg.norm(self.shoulder_c - self.hip_c, axis=1) + 1e-6
+
+    @cached_property
+    def left_standing(self):
+        # Standing leg is the one whose ankle is lower in the image (larger y)
+        return self.xy[:, _L.LEFT_ANKLE, 1] >= self.xy[:, _L.RIGHT_ANKLE, 1]
+
+    @cached_property
+    def standing_ankle(self):
+        return np.where(self.left_standing[:, None], self.xy[:, _L.LEFT_ANKLE], self.xy[:, _L.RIGHT_ANKLE])
+
+    @cached_property
+    def raised_ankle(self):
+        return np.where(self.left_standing[:, None], self.xy[:, _L.RIGHT_ANKLE], self.xy[:, _L.LEFT_ANKLE])
+
+# name -> function of _Frames returning an (N,) array, and the
+# ANGLE_RULE_TRIPLETS angles it reads
+_FEATURE_FUNCS = {}
+_FEATURE_ANGLES = {}
+
+def _rule_feature(name, angles=()):
+    def register(fn):
+        _FEATURE_FUNCS[name] = fn
+        _FEATURE_ANGLES[name] = tuple(angles)
+        return fn
+    return register
+
+for _name in ANGLE_RULE_TRIPLETS:
+    _rule_feature(_name, angles=[_name])(lambda f, _name=_name: f.angles[_name])
+
+# Legs: the standing leg is the lower ankle, the front leg the more bent knee
+@_rule_feature('standing_knee_angle', angles=['left_knee_angle', 'right_knee_angle'])
+def _standing_knee_angle(f):
+    return np.where(f.left_standing, f.angles['left_knee_angle'], f.angles['right_knee_angle'])
+
+@_rule_feature('raised_knee_angle', angles=['left_knee_angle', 'right_knee_angle'])
+def _raised_knee_angle(f):
+    return np.where(f.left_standing, f.angles['right_knee_angle'], f.angles['left_knee_angle'])
+
+@_rule_feature('front_knee_angle', angles=['left_knee_angle', 'right_knee_angle'])
+def _front_knee_angle(f):
+    return np.minimum(f.angles['left_knee_angle'], f.angles['right_knee_angle'])
+
+@_rule_feature('back_knee_angle', angles=['left_knee_angle', 'right_knee_angle'])
+def _back_knee_angle(f):
+    return np.maximum(f.angles['left_knee_angle'], f.angles['right_knee_angle'])
+
+@_rule_feature('back_leg_extension',
+               angles=['left_knee_angle', 'right_knee_angle', 'left_hip_angle', 'right_hip_angle'])
+def _back_leg_extension(f):
+    left_front = f.angles['left_knee_angle'] <= f.angles['right_knee_angle']
+    return np.where(left_front, f.angles['right_hip_angle'], f.angles['left_hip_angle'])
+
+# Arms
+@_rule_feature('arm_alignment')
+def _arm_alignment(f):
+    return _angle_at(f.xy[:, _L.LEFT_WRIST], f.shoulder_c, f.xy[:, _L.RIGHT_WRIST])
+
+@_rule_feature('arm_extension', angles=['left_elbow_angle', 'right_elbow_angle'])
+def _arm_extension(f):
+    return np.minimum(f.angles['left_elbow_angle'], f.angles['right_elbow_angle'])
+
+# Torso shape
+@_rule_feature('spine_curve')
+def _spine_curve(f):
+    return _torso_incline(f.shoulder_c, f.hip_c)
+
+@_rule_feature('backbend_depth')
+def _backbend_depth(f):
+    return 180 - _angle_at(f.shoulder_c, f.hip_c, f.knee_c)
+
+@_rule_feature('hip_sag')
+def _hip_sag(f):
+    return _angle_at(f.shoulder_c, f.hip_c, f.ankle_c)
+
+@_rule_feature('body_alignment')
+def _body_alignment(f):
+    # Perpendicular distance of the hip center from the shoulder->ankle line
+    line = f.ankle_c - f.shoulder_c
+    rel = f.hip_c - f.shoulder_c
+    cross = line[:, 0] * rel[:, 1] - line[:, 1] * rel[:, 0]
+    return np.abs(cross) / (np.linalg.norm(line, axis=1) + 1e-6)
+
+# Level / symmetry
+@_rule_feature('shoulder_level_diff')
+def _shoulder_level_diff(f):
+    return np.abs(f.xy[:, _L.LEFT_SHOULDER, 1] - f.xy[:, _L.RIGHT_SHOULDER, 1])
+
+@_rule_feature('hip_level_diff')
+def _hip_level_diff(f):
+    return np.abs(f.xy[:, _L.LEFT_HIP, 1] - f.xy[:, _L.RIGHT_HIP, 1])
+
+@_rule_feature('hip_square')
+def _hip_square(f):
+    return np.abs(f.points[:, _L.LEFT_HIP, 2] - f.points[:, _L.RIGHT_HIP, 2])
+
+@_rule_feature('torso_alignment')
+def _torso_alignment(f):
+    return np.abs(f.points[:, _L.LEFT_SHOULDER, 2] - f.points[:, _L.RIGHT_SHOULDER, 2])
+
+# Distances
+@_rule_feature('foot_distance')
+def _foot_distance(f):
+    foot = f.xy[:, _L.LEFT_ANKLE] - f.xy[:, _L.RIGHT_ANKLE]
+    return np.sqrt(foot[:, 0]**2 + foot[:, 1]**2)
+
+@_rule_feature('balance_shift')
+def _balance_shift(f):
+    return f.hip_c[:, 0] - f.standing_ankle[:, 0]
+
+# Heights and reaches, normalized by torso length
+@_rule_feature('forward_fold_depth')
+def _forward_fold_depth(f):
+    return np.linalg.norm(f.xy[:, _L.NOSE] - f.knee_c, axis=1) / f.torso_len
+
+@_rule_feature('head_position')
+def _head_position(f):
+    return (f.xy[:, _L.NOSE, 1] - f.shoulder_c[:, 1]) / f.torso_len
+
+@_rule_feature('chest_lift')
+def _chest_lift(f):
+    return (f.hip_c[:, 1] - f.shoulder_c[:, 1]) / f.torso_len
+
+@_rule_feature('hip_lift')
+def _hip_lift(f):
+    return (f.shoulder_c[:, 1] - f.hip_c[:, 1]) / f.torso_len
+
+@_rule_feature('raised_leg_height')
+def _raised_leg_height(f):
+    return (f.standing_ankle[:, 1] - f.raised_ankle[:, 1]) / f.torso_len
+
+@_rule_feature('hand_support')
+def _hand_support(f):
+    wrist_c = f._center(_L.LEFT_WRIST, _L.RIGHT_WRIST)
+    return np.linalg.norm(wrist_c - f.hip_c, axis=1) / f.torso_len
+
+@_rule_feature('chin_tuck')
+def _chin_tuck(f):
+    return np.linalg.norm(f.xy[:, _L.NOSE] - f.shoulder_c, axis=1) / f.torso_len
+
+# An alias computes through the function of the feature it names
+for _name, _spec in RULE_FEATURES.items():
+    if 'alias' in _spec:
+        _rule_feature(_name, angles=_FEATURE_ANGLES[_spec['alias']])(_FEATURE_FUNCS[_spec['alias']])
+
+class _FeaturePlan:
+    """What computing a fixed list of rule features needs: the features' functions and their joint angles."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.funcs = [_FEATURE_FUNCS[name] for name in self.names]
+        self.angle_names = list(dict.fromkeys(a for name in self.names for a in _FEATURE_ANGLES[name]))
+        self.angle_triplets = np.array([ANGLE_RULE_TRIPLETS[a] for a in self.angle_names],
+                                       dtype=np.intp).reshape(-1, 3)
+
+    def compute(self, points):
+        """(N, 33, 4) float array -> (N, len(names)) feature values."""
+        frames = _Frames(points, self.angle_names, self.angle_triplets)
+        values = np.empty((points.shape[0], len(self.funcs)), dtype=np.float64)
+        for j, fn in enumerate(self.funcs):
+            values[:, j] = fn(frames)
+        return values
+
+def _as_frames(landmark_array):
+    points = np.asarray(landmark_array, dtype=np.float64)
+    return points[np.newaxis] if points.ndim == 2 else points
+
+_ALL_FEATURES = _FeaturePlan(RULE_FEATURE_NAMES)
+
+def compute_rule_features(landmark_array, names=None):
+    """
+    Compute rule features for a batch of frames.
+
+    Args:
+        landmark_array: array of shape (N, 33, 4) or (33, 4)
+        names: features to compute, in column order (default: RULE_FEATURE_NAMES)
+
+    Returns:
+        numpy array of shape (N, len(names))
+    """
+    plan = _ALL_FEATURES if names is None else _FeaturePlan(names)
+    return plan.compute(_as_frames(landmark_array))
+
+# ==================== COMPILED RULES ====================
+
+Violation = namedtuple('Violation', ['feature', 'message', 'value', 'ideal', 'unit'])
+
+class CompiledPoseRules:
+    """Checks for one pose compiled into parallel arrays."""
+
+    def __init__(self, pose_name, checks):
+        """
+        Checks are compiled against this pose's own feature columns: only the
+        features the checks read are computed (see feature_values).
+        """
+        self.pose_name = pose_name
+        self.features = []
+        self.messages = []
+        self.ideals = []
+        self.units = []
+        feature_idx, lo, hi = [], [], []
+
+        for check in checks:
+            feature = check['feature']
+            if feature not in RULE_FEATURES:
+                raise ValueError(f"Unknown rule feature '{feature}' in pose '{pose_name}'")
+
+            spec = RULE_FEATURES[feature]
+            ideal = check.get('ideal', spec['ideal'])
+            tolerance = check.get('tolerance', spec.get('tolerance', 0))
+            mode = spec['mode']
+
+            if mode == 'abs':
+                bounds = (ideal - tolerance, ideal + tolerance)
+            elif mode == 'max':
+                bounds = (-np.inf, tolerance)
+            elif mode == 'min':
+                bounds = (check.get('min', spec['min']), np.inf)
+            elif mode == 'lower':
+                bounds = (ideal - tolerance, np.inf)
+            elif mode == 'upper':
+                bounds = (-np.inf, ideal + tolerance)
+            else:
+                raise ValueError(f"Unknown rule mode '{mode}' for feature '{feature}'")
+
+            feature_idx.append(spec.get('alias', feature))
+            lo.append(bounds[0])
+            hi.append(bounds[1])
+            self.features.append(feature)
+            self.messages.append(check['message'])
+            self.ideals.append(ideal)
+            self.units.append(spec['unit'])
+
+        # A feature checked twice, directly or through an alias, is computed once
+        self.plan = _FeaturePlan(dict.fromkeys(feature_idx))
+        self.feature_idx = np.array([self.plan.names.index(f) for f in feature_idx], dtype=np.intp)
+        self._checks = list(zip(self.features, self.messages, self.ideals, self.units, lo, hi))
+
+    def feature_values(self, points):
+        """
+        Args:
+            points: (N, 33, 4) landmark array
+
+        Returns:
+            (N, len(plan.names)) values of the features this pose's checks read
+        """
+        return self.plan.compute(points)
+
+    def violations(self, feature_values):
+        """
+        Evaluate all checks against one frame.
+
+        Args:
+            feature_values: 1-D row of feature_values()
+
+        Returns:
+            list of Violation, in rule order
+        """
+        return self.violations_batch(feature_values[np.newaxis])[0]
+
+    def violations_batch(self, feature_values):
+        """violations() for every row of feature_values()."""
+        # A handful of checks per pose: plain float comparisons beat numpy
+        # masks at this size
+        checks = self._checks
+        return [
+            [Violation(feature, message, value, ideal, unit)
+             for (feature, message, ideal, unit, lo, hi), value in zip(checks, row)
+             if value < lo or value > hi]
+            for row in feature_values[:, self.feature_idx].tolist()
+        ]
+
+def compile_rules(rules=POSE_CORRECTION_RULES):
+    """Compile a rules dict (see pose_rules.py) into {pose_name: CompiledPoseRules}."""
+    return {name: CompiledPoseRules(name, rule['checks']) for name, rule in rules.items()}
+
+COMPILED_RULES = compile_rules()
+
+def evaluate_rules(landmark_array, pose_names, compiled=COMPILED_RULES):
+    """
+    Evaluate correction rules for a batch of frames.
+
+    Args:
+        landmark_array: array of shape (N, 33, 4) or (33, 4)
+        pose_names: pose name per frame (a single str is used for every frame)
+        compiled: compiled rules from compile_rules()
+
+    Returns:
+        list (one per frame) of Violation lists, or None for frames whose pose
+        has no rules
+    """
+    points = _as_frames(landmark_array)
+    if isinstance(pose_names, str):
+        pose_names = [pose_names] * len(points)
+
+    # Frames grouped by pose: each group computes only its pose's features
+    groups = {}
+    for i, pose_name in enumerate(pose_names):
+        if pose_name in compiled:
+            groups.setdefault(pose_name, []).append(i)
+
+    results = [None] * len(points)
+    for pose_name, rows in groups.items():
+        rules = compiled[pose_name]
+        group = points if len(rows) == len(points) else points[rows]
+        for i, found in zip(rows, rules.violations_batch(rules.feature_values(group))):
+            results[i] = found
+    return results
@@ -1,223 +1,74 @@
 import os
+import time
+import multiprocessing
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 import mediapipe as mp
-import pickle
-import os
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-import pandas as pd
+
+# Geometry and feature extraction live in the dependency-light pose_features
+# module; re-exported here for training code and notebooks.
+from pose_features import (
+    PoseLandmark,
+    NUM_LANDMARKS,
+    NUM_FEATURES,
+    ANGLE_FEATURE_TRIPLETS,
+    DISTANCE_FEATURE_PAIRS,
+    calculate_angle,
+    calculate_distance,
+    extract_pose_features,
+    landmarks_to_array,
+    calculate_angles_batch,
+    calculate_distances_batch,
+    extract_pose_features_batch,
+)
+
+from landmark_cache import LandmarkCache, hash_file
 
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-pose = mp_pose.Pose(
+# Static-image detector settings for training data (also part of the
+# landmark cache key, so changing them invalidates cached landmarks)
+DETECTOR_SETTINGS = dict(
     static_image_mode=True,
     model_complexity=2,
     enable_segmentation=False,
     min_detection_confidence=0.5
 )
 
-def calculate_angle(p1, p2, p3):
-    """
-    Calculate angle between three points (p1-p2-p3)
-    p2 is the vertex (middle point)
+# Static-image detector for training data, created on first use
+pose = None
 
-    Args:
-        p1, p2, p3: landmarks with .x, .y attributes
+def get_pose_detector():
+    """Return the shared static-image MediaPipe detector, creating it on first use."""
+    global pose
+    if pose is None:
+        pose = mp_pose.Pose(**DETECTOR_SETTINGS)
+    return pose
 
-    Returns:
-        angle in degrees
-    """
-    # Convert to numpy arrays
-    a = np.array([p1.x, p1.y])
-    b = np.array([p2.x, p2.y])
-    c = np.array([p3.x, p3.y])
-
-    # Calculate vectors
-    ba = a - b
-    bc = c - b
-
-    # Calculate angle using dot product
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
-    angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
+def open_landmark_cache(cache_dir):
+    """LandmarkCache for the training detector settings and MediaPipe version."""
+    return LandmarkCache(cache_dir, dict(DETECTOR_SETTINGS, mediapipe=mp.__version__))
 
-    return np.degrees(angle)
-
-def calculate_distance(p1, p2):
-    """Calculate Euclidean distance between two points"""
-    return np.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-
-def extract_pose_features(landmarks):
+def process_image_landmarks(image_path, cache=None):
     """
-    Extract comprehensive features from pose landmarks
-
+    Run MediaPipe on a single image.
+    Args:
+        image_path: path to the image
+        cache: optional LandmarkCache; a cached result skips MediaPipe.
+            New results are buffered in the cache (flushed in batches, see
+            LandmarkCache.put); call cache.flush() when done
     Returns:
-        numpy array of ~50 features
+        (33, 4) landmark array or None if pose not detected
     """
-    features = []
-
-    # Get landmark shortcuts
-    lm = landmarks.landmark
-
-    # ==================== ANGLE FEATURES ====================
-
-    # Left arm angles
-    left_shoulder_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_ELBOW],
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_HIP]
-    )
-    features.append(left_shoulder_angle)
-
-    left_elbow_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_ELBOW],
-        lm[mp_pose.PoseLandmark.LEFT_WRIST]
-    )
-    features.append(left_elbow_angle)
-
-    # Right arm angles
-    right_shoulder_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.RIGHT_ELBOW],
-        lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-        lm[mp_pose.PoseLandmark.RIGHT_HIP]
-    )
-    features.append(right_shoulder_angle)
-
-    right_elbow_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-        lm[mp_pose.PoseLandmark.RIGHT_ELBOW],
-        lm[mp_pose.PoseLandmark.RIGHT_WRIST]
-    )
-    features.append(right_elbow_angle)
-
-    # Left leg angles
-    left_hip_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_HIP],
-        lm[mp_pose.PoseLandmark.LEFT_KNEE]
-    )
-    features.append(left_hip_angle)
-
-    left_knee_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_HIP],
-        lm[mp_pose.PoseLandmark.LEFT_KNEE],
-        lm[mp_pose.PoseLandmark.LEFT_ANKLE]
-    )
-    features.append(left_knee_angle)
-
-    # Right leg angles
-    right_hip_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-        lm[mp_pose.PoseLandmark.RIGHT_HIP],
-        lm[mp_pose.PoseLandmark.RIGHT_KNEE]
-    )
-    features.append(right_hip_angle)
-
-    right_knee_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.RIGHT_HIP],
-        lm[mp_pose.PoseLandmark.RIGHT_KNEE],
-        lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-    )
-    features.append(right_knee_angle)
-
-    # Spine/torso angles
-    spine_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_HIP],
-        lm[mp_pose.PoseLandmark.LEFT_KNEE]
-    )
-    features.append(spine_angle)
-
-    # Neck angle
-    neck_angle = calculate_angle(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.NOSE],
-        lm[mp_pose.PoseLandmark.LEFT_EAR]
-    )
-    features.append(neck_angle)
-
-    # ==================== DISTANCE FEATURES ====================
-
-    # Hand distance (for poses with hands together)
-    hand_distance = calculate_distance(
-        lm[mp_pose.PoseLandmark.LEFT_WRIST],
-        lm[mp_pose.PoseLandmark.RIGHT_WRIST]
-    )
-    features.append(hand_distance)
-
-    # Foot distance (for poses with wide stance)
-    foot_distance = calculate_distance(
-        lm[mp_pose.PoseLandmark.LEFT_ANKLE],
-        lm[mp_pose.PoseLandmark.RIGHT_ANKLE]
-    )
-    features.append(foot_distance)
-
-    # ==================== RATIO FEATURES (body size normalized) ====================
-
-    # Calculate body height (shoulder to ankle)
-    body_height = calculate_distance(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_ANKLE]
-    )
-
-    # Arm length ratios
-    left_arm_length = calculate_distance(
-        lm[mp_pose.PoseLandmark.LEFT_SHOULDER],
-        lm[mp_pose.PoseLandmark.LEFT_WRIST]
-    )
-    features.append(left_arm_length / (body_height + 1e-6))
-
-    right_arm_length = calculate_distance(
-        lm[mp_pose.PoseLandmark.RIGHT_SHOULDER],
-        lm[mp_pose.PoseLandmark.RIGHT_WRIST]
-    )
-    features.append(right_arm_length / (body_height + 1e-6))
-
-    # ==================== POSITION FEATURES ====================
-
-    # Y-coordinates (height) of key points (normalized)
-    features.append(lm[mp_pose.PoseLandmark.LEFT_WRIST].y)
-    features.append(lm[mp_pose.PoseLandmark.RIGHT_WRIST].y)
-    features.append(lm[mp_pose.PoseLandmark.LEFT_ANKLE].y)
-    features.append(lm[mp_pose.PoseLandmark.RIGHT_ANKLE].y)
-    features.append(lm[mp_pose.PoseLandmark.NOSE].y)
+    if cache is not None:
+        digest = hash_file(image_path)
+        if digest in cache:
+            return cache.get(digest)
+        points = process_image_landmarks(image_path)
+        cache.put(digest, points)
+        return points
 
-    # X-coordinates (width) - for left/right alignment
-    features.append(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x)
-    features.append(lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x)
-
-    # ==================== SYMMETRY FEATURES ====================
-
-    # Arm symmetry (difference between left and right)
-    arm_symmetry = abs(left_elbow_angle - right_elbow_angle)
-    features.append(arm_symmetry)
-
-    # Leg symmetry
-    leg_symmetry = abs(left_knee_angle - right_knee_angle)
-    features.append(leg_symmetry)
-
-    # Shoulder level difference
-    shoulder_level = abs(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y -
-                         lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y)
-    features.append(shoulder_level)
-
-    # Hip level difference
-    hip_level = abs(lm[mp_pose.PoseLandmark.LEFT_HIP].y -
-                    lm[mp_pose.PoseLandmark.RIGHT_HIP].y)
-    features.append(hip_level)
-
-    return np.array(features)
-
-def process_image(image_path):
-    """
-    Process a single image and extract pose features.
-    Returns:
-        features (numpy array) or None if pose not detected
-    """
     image = cv2.imread(image_path)
     if image is None:
         return None
@@ -225,61 +76,187 @@ def process_image(image_path):
     img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
     # Run MediaPipe
-    results = pose.process(img_rgb)
+    results = get_pose_detector().process(img_rgb)
 
     # If no pose → skip image
     if not results.pose_landmarks:
         return None
 
-    # Extract features from landmarks
-    features = extract_pose_features(results.pose_landmarks)
+    return landmarks_to_array(results.pose_landmarks)
 
-    return features
+def process_image(image_path, cache=None):
+    """
+    Process a single image and extract pose features.
+    Args:
+        image_path: path to the image
+        cache: optional LandmarkCache (see open_landmark_cache)
+    Returns:
+        features (numpy array) or None if pose not detected
+    """
+    points = process_image_landmarks(image_path, cache=cache)
+    if points is None:
+        return None
 
-def load_dataset(dataset_path):
-    X = []
-    y = []
-    pose_names = []
+    # Extract features from landmarks
+    return extract_pose_features_batch(points)[0]
 
-    # Get all pose folders
+def _init_extraction_worker():
+    """Pool initializer: each worker builds its own detector on first use
+    (get_pose_detector); OpenCV is kept single-threaded so workers don't
+    oversubscribe the cores."""
+    cv2.setNumThreads(1)
+
+def list_dataset_images(dataset_path):
+    """
+    Returns:
+        (pose_folders, jobs) where jobs is a list of (pose_idx, image_path)
+        in a stable order (classes and files sorted by name)
+    """
     pose_folders = sorted([f for f in os.listdir(dataset_path)
                           if os.path.isdir(os.path.join(dataset_path, f))])
 
-    print(f"\nFound {len(pose_folders)} pose classes:")
-    for i, pose in enumerate(pose_folders):
-        print(f"   {i}: {pose}")
-
-    # Process each pose class
+    jobs = []
     for pose_idx, pose_name in enumerate(pose_folders):
         pose_path = os.path.join(dataset_path, pose_name)
-        image_files = [f for f in os.listdir(pose_path)
-                      if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        image_files = sorted(f for f in os.listdir(pose_path)
+                             if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        jobs.extend((pose_idx, os.path.join(pose_path, f)) for f in image_files)
+    return pose_folders, jobs
+
+def extract_landmarks(image_paths, workers=1, chunksize=8, progress_every=5.0, cache=None,
+                      on_result=None):
+    """
+    Run MediaPipe over many images, optionally on a pool of processes.
+
+    Workers pull chunks of paths from the pool's task queue as they free up,
+    and results come back in input order, so the output does not depend on
+    the number of workers.
+
+    Args:
+        image_paths: list of image paths
+        workers: number of processes (1 = in this process, None = all CPUs)
+        chunksize: paths handed to a worker at a time
+        progress_every: seconds between progress lines
+        cache: optional LandmarkCache; only images whose content is not
+            cached yet go through MediaPipe, and their results are written
+            to the cache as they arrive (in batches, see LandmarkCache.put)
+        on_result: optional callback(index, points) called for each image
+            as its result arrives
+
+    Returns:
+        list with a (33, 4) landmark array or None per image
+    """
+    if cache is not None:
+        digests = [hash_file(path) for path in image_paths]
+        missing = {}
+        for digest, path in zip(digests, image_paths):
+            if digest not in cache and digest not in missing:
+                missing[digest] = path
+        print(f"Landmark cache: {len(image_paths) - len(missing)}/{len(image_paths)} "
+              f"images cached, extracting {len(missing)}")
+
+        if missing:
+            missing_digests = list(missing)
+            try:
+                extract_landmarks(list(missing.values()), workers=workers, chunksize=chunksize,
+                                  progress_every=progress_every,
+                                  on_result=lambda i, points: cache.put(missing_digests[i], points))
+            finally:
+                cache.flush()
+        return [cache.get(digest) for digest in digests]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(image_paths)))
+    total = len(image_paths)
+
+    pool = None
+    if workers == 1:
+        results_iter = map(process_image_landmarks, image_paths)
+    else:
+        # spawn rather than fork: a forked child would inherit MediaPipe's
+        # graph threads from the parent
+        pool = multiprocessing.get_context('spawn').Pool(
+            workers, initializer=_init_extraction_worker)
+        results_iter = pool.imap(process_image_landmarks, image_paths, chunksize=chunksize)
+
+    results = []
+    start = last_report = time.time()
+    try:
+        for points in results_iter:
+            if on_result is not None:
+                on_result(len(results), points)
+            results.append(points)
+            now = time.time()
+            if now - last_report >= progress_every:
+                done = len(results)
+                print(f"   [{done}/{total}] {done / (now - start):.1f} img/s")
+                last_report = now
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start
+    if total:
+        print(f"Extracted landmarks from {total} images in {elapsed:.1f}s "
+              f"({total / max(elapsed, 1e-9):.1f} img/s, {workers} worker(s))")
+    return results
+
+def load_dataset(dataset_path, workers=1, chunksize=8, cache_dir=None):
+    """
+    Load a folder-per-pose image dataset into features and labels.
 
-        print(f"\nProcessing {pose_name}: {len(image_files)} images...")
+    Args:
+        dataset_path: folder with one sub-folder of images per pose
+        workers: extraction processes (1 = in this process, None = all CPUs)
+        chunksize: images handed to a worker at a time
+        cache_dir: optional landmark cache directory; re-runs then only send
+            new or changed images through MediaPipe and recompute features
+            from the cached landmarks
 
-        success_count = 0
-        for img_file in image_files:
-            img_path = os.path.join(pose_path, img_file)
-            features = process_image(img_path)
+    Returns:
+        (X, y, pose_names)
+    """
+    cache = open_landmark_cache(cache_dir) if cache_dir else None
+    pose_folders, jobs = list_dataset_images(dataset_path)
 
-            if features is not None:
-                X.append(features)
-                y.append(pose_idx)
-                success_count += 1
+    print(f"\nFound {len(pose_folders)} pose classes:")
+    for i, pose in enumerate(pose_folders):
+        print(f"   {i}: {pose}")
 
-        print(f"Successfully processed: {success_count}/{len(image_files)} images")
-        pose_names.append(pose_name)
+    print(f"\nProcessing {len(jobs)} images...")
+    all_points = extract_landmarks([path for _, path in jobs],
+                                   workers=workers, chunksize=chunksize, cache=cache)
 
-    X = np.array(X)
+    landmark_rows = []
+    y = []
+    success_counts = np.zeros(len(pose_folders), dtype=int)
+    image_counts = np.zeros(len(pose_folders), dtype=int)
+    for (pose_idx, _), points in zip(jobs, all_points):
+        image_counts[pose_idx] += 1
+        if points is not None:
+            landmark_rows.append(points)
+            y.append(pose_idx)
+            success_counts[pose_idx] += 1
+
+    print()
+    for pose_idx, pose_name in enumerate(pose_folders):
+        print(f"{pose_name}: successfully processed "
+              f"{success_counts[pose_idx]}/{image_counts[pose_idx]} images")
+    pose_names = list(pose_folders)
+
+    # Extract features for every image in one vectorized pass
+    if landmark_rows:
+        X = extract_pose_features_batch(np.stack(landmark_rows))
+    else:
+        X = np.empty((0, NUM_FEATURES))
     y = np.array(y)
 
     print(f"\nDataset loaded: {X.shape[0]} samples, {X.shape[1]} features")
 
     return X, y, pose_names
 
-import cv2
-import matplotlib.pyplot as plt
-
 def draw_landmarks_with_names(image_rgb, results):
     """Draw skeleton + keypoint labels on the image."""
     if not results.pose_landmarks: